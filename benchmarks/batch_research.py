@@ -0,0 +1,109 @@
+"""
+Benchmark - Slotlar uchun postlar: ketma-ket full_research vs batch_research
+
+Standart holatda - lokal stand-in (benchmarks/e2e.py dagi soxta OpenAI: batch so'rovga
+"=== MAVZU n ===" bo'limlari bilan javob beradi). --real - haqiqiy OpenAI (OPENAI_API_KEY kerak).
+Har bir rejimdan oldin kesh tozalanadi; so'rovlar, tokenlar va embedding so'rovlari sanaladi.
+
+Ishlatish:
+    python -m benchmarks.batch_research [--latency 0.5] [--real] ["Mavzu 1" "Mavzu 2" ...]
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+
+class _UsageMeter:
+    """client.responses/chat.completions/embeddings.create ni o'rab, so'rov va tokenlarni sanash"""
+
+    def __init__(self, researcher):
+        self.calls = 0
+        self.embeddings = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        client = researcher.client
+        client.responses.create = self._wrap(client.responses.create)
+        client.chat.completions.create = self._wrap(client.chat.completions.create)
+        client.embeddings.create = self._wrap_embeddings(client.embeddings.create)
+
+    def _wrap(self, create):
+        async def wrapper(*args, **kwargs):
+            response = await create(*args, **kwargs)
+            self.calls += 1
+            usage = getattr(response, "usage", None)
+            if usage is not None:
+                self.input_tokens += getattr(usage, "input_tokens", None) or getattr(usage, "prompt_tokens", 0)
+                self.output_tokens += getattr(usage, "output_tokens", None) or getattr(usage, "completion_tokens", 0)
+            return response
+        return wrapper
+
+    def _wrap_embeddings(self, create):
+        async def wrapper(*args, **kwargs):
+            response = await create(*args, **kwargs)
+            self.embeddings += 1
+            return response
+        return wrapper
+
+    def reset(self):
+        self.calls = self.embeddings = self.input_tokens = self.output_tokens = 0
+
+
+def _report(name: str, meter: _UsageMeter, elapsed: float, results: list[dict]):
+    ok = sum(1 for r in results if r["success"]) or 1
+    print(
+        f"{name:<24} {elapsed:6.2f} s jami, {elapsed / ok:5.2f} s/post, "
+        f"{meter.calls} so'rov + {meter.embeddings} embedding, "
+        f"{(meter.input_tokens + meter.output_tokens) / ok:7.0f} token/post "
+        f"(kirish {meter.input_tokens}, chiqish {meter.output_tokens}), {ok}/{len(results)} muvaffaqiyatli"
+    )
+
+
+async def main(args):
+    runner = None
+    with tempfile.TemporaryDirectory() as directory:
+        if not args.real:
+            from benchmarks.edit_latency import _serve_stand_in
+
+            runner, base_url = await _serve_stand_in(args.latency, directory)
+            # Muhit sozlangach import qilinadi (config import paytida o'qiladi)
+            os.environ.update({
+                "OPENAI_API_KEY": "sk-bench", "OPENAI_BASE_URL": base_url,
+                "USAGE_FILE": "", "DEDUP_FILE": "", "ARCHIVE_DB": ""
+            })
+            print(f"stand-in: {base_url}, javob kechikishi {args.latency * 1000:.0f} ms "
+                  f"(web search {args.latency * 4000:.0f} ms)")
+
+        from bot.handlers import DEFAULT_SETTINGS
+        from core import SmartResearcher
+
+        topics = args.topics or DEFAULT_SETTINGS["topics"][:3]
+        researcher = SmartResearcher()
+        meter = _UsageMeter(researcher)
+        await researcher.start()
+
+        try:
+            researcher.cache.clear()
+            start = time.perf_counter()
+            results = [await researcher.full_research(topic, use_cache=False) for topic in topics]
+            _report("ketma-ket full_research", meter, time.perf_counter() - start, results)
+
+            researcher.cache.clear()
+            meter.reset()
+            start = time.perf_counter()
+            results = await researcher.batch_research(topics, use_cache=False)
+            _report("batch_research", meter, time.perf_counter() - start, results)
+        finally:
+            await researcher.close()
+            if runner is not None:
+                await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("topics", nargs="*", help="mavzular (standart - DEFAULT_SETTINGS dagi birinchi 3 tasi)")
+    parser.add_argument("--latency", type=float, default=0.5, help="stand-in javob kechikishi, soniya")
+    parser.add_argument("--real", action="store_true", help="haqiqiy OpenAI (OPENAI_API_KEY)")
+    asyncio.run(main(parser.parse_args()))
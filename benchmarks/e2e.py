@@ -0,0 +1,362 @@
+"""
+Benchmark - Offline end-to-end: haqiqiy router, soxta Telegram Bot API va soxta OpenAI
+
+API kalitlarisiz botning o'tkazuvchanligini o'lchash:
+- soxta OpenAI server: /v1/responses (web search, batch uchun "=== MAVZU n ===" bo'limlari),
+  /v1/chat/completions (stream ham), /v1/embeddings; sozlanadigan kechikish va jitter
+- soxta Telegram Bot API: sendMessage, editMessageText, sendPhoto, ... (+ rasm HEAD)
+- N ta parallel foydalanuvchi: /research -> qayta yozish -> kanalga, /quick -> tahrirlash,
+  /compare, /trending, bekor qilish
+- natija: buyruqlar bo'yicha p50/p95/p99, update/soniya, eng yuqori xotira;
+  --json bilan regressiyani kuzatish uchun faylga ham yoziladi
+
+Ishlatish:
+    python -m benchmarks.e2e --users 20 --rounds 2 --openai-latency 0.5 --jitter 0.2
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import re
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+
+from aiohttp import web
+
+# Batch web search: bitta so'rovda raqamlangan mavzular ro'yxati ("1. Mavzu")
+_BATCH_TOPIC_RE = re.compile(r"^\s*\d+\.\s+\S", re.MULTILINE)
+
+SEARCH_TEXT = (
+    "1. ASOSIY FAKTLAR\n" + "".join(f"- Fakt {i}: muhim ma'lumot va raqamlar.\n" for i in range(1, 8)) +
+    "2. MANBALAR\n- example.com\n3. SO'NGGI YANGILIKLAR\n- 2025-01-01: yangilik\n"
+)
+POST_TEXT = (
+    "<b>📱 SARLAVHA - YANGILIK</b>\n\nKirish jumlasi, mavzuni tanishtirish.\n\n" +
+    "".join(f"🔹 <b>Muhim nuqta {i}</b> - aniq fakt & raqam\n" for i in range(1, 4)) +
+    "\n<i>💡 Xulosa: qisqa xulosa</i>\n\n———\n📚 <b>Manbalar:</b>\n- Manba 1"
+)
+
+
+class FakeUpstreams:
+    """Soxta OpenAI va Telegram bitta aiohttp ilovada"""
+
+    def __init__(self, openai_latency: float, telegram_latency: float, jitter: float, chunk_delay: float):
+        self.openai_latency = openai_latency
+        self.telegram_latency = telegram_latency
+        self.jitter = jitter
+        self.chunk_delay = chunk_delay
+        self.calls: dict[str, int] = {}
+        self._message_ids = itertools.count(10_000)
+
+    async def _sleep(self, base: float):
+        if base > 0:
+            await asyncio.sleep(max(0.0, base + random.uniform(-self.jitter, self.jitter)))
+
+    def _count(self, name: str):
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    # ============ OPENAI ============
+
+    @staticmethod
+    def _usage(prompt: int, completion: int, responses_api: bool = False) -> dict:
+        if responses_api:
+            return {"input_tokens": prompt, "output_tokens": completion, "total_tokens": prompt + completion,
+                    "input_tokens_details": {"cached_tokens": 0}, "output_tokens_details": {"reasoning_tokens": 0}}
+        return {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": prompt + completion,
+                "prompt_tokens_details": {"cached_tokens": 0}}
+
+    async def responses(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        self._count("openai:responses")
+        await self._sleep(self.openai_latency * 4)  # web search - eng sekin bosqich
+
+        text, output_tokens = SEARCH_TEXT, 600
+        if "MAVZU <raqam>" in (body.get("instructions") or ""):
+            # Batch: har bir mavzu uchun alohida bo'lim (_batch_search shu formatni bo'laklaydi)
+            self._count("openai:batch_search")
+            count = len(_BATCH_TOPIC_RE.findall(body.get("input") or ""))
+            text = "".join(f"=== MAVZU {i} ===\n{SEARCH_TEXT}\n" for i in range(1, count + 1))
+            output_tokens *= count
+        return web.json_response({
+            "id": "resp_bench", "object": "response", "created_at": int(time.time()), "model": body["model"],
+            "status": "completed", "parallel_tool_calls": True, "tool_choice": "auto", "tools": [],
+            "output": [{
+                "type": "message", "id": "msg_bench", "status": "completed", "role": "assistant",
+                "content": [{"type": "output_text", "text": text, "annotations": []}]
+            }],
+            "usage": self._usage(200, output_tokens, responses_api=True)
+        })
+
+    async def chat(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        keyword = body.get("max_tokens") == 10
+        text = "technology" if keyword else POST_TEXT
+        self._count("openai:keyword" if keyword else "openai:chat")
+        await self._sleep(self.openai_latency)
+
+        base = {"id": "chatcmpl-bench", "created": int(time.time()), "model": body["model"]}
+        if not body.get("stream"):
+            return web.json_response({
+                **base, "object": "chat.completion",
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                "usage": self._usage(900, len(text) // 3)
+            })
+
+        resp = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await resp.prepare(request)
+
+        async def send(data: dict):
+            await resp.write(f"data: {json.dumps(data)}\n\n".encode())
+
+        words = text.split(" ")
+        for i, word in enumerate(words):
+            await send({**base, "object": "chat.completion.chunk", "choices": [{
+                "index": 0, "delta": {"content": word if i == 0 else f" {word}"},
+                "finish_reason": "stop" if i == len(words) - 1 else None
+            }]})
+            if self.chunk_delay:
+                await asyncio.sleep(self.chunk_delay)
+        if (body.get("stream_options") or {}).get("include_usage"):
+            await send({**base, "object": "chat.completion.chunk", "choices": [],
+                        "usage": self._usage(900, len(text) // 3)})
+        await resp.write(b"data: [DONE]\n\n")
+        return resp
+
+    async def embeddings(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        self._count("openai:embeddings")
+        await self._sleep(self.openai_latency / 4)
+        # Matn bo'yicha barqaror tasodifiy vektor - har xil mavzular o'xshash chiqmaydi
+        rng = random.Random(body["input"])
+        vector = [rng.gauss(0, 1) for _ in range(body.get("dimensions") or 256)]
+        return web.json_response({
+            "object": "list", "model": body["model"],
+            "data": [{"object": "embedding", "index": 0, "embedding": vector}],
+            "usage": {"prompt_tokens": len(body["input"]) // 4, "total_tokens": len(body["input"]) // 4}
+        })
+
+    # ============ TELEGRAM ============
+
+    def _message(self, params, text_field: str = "text") -> dict:
+        chat_id = params.get("chat_id", "0")
+        chat_id = int(chat_id) if str(chat_id).lstrip("-").isdigit() else -100123
+        message = {
+            "message_id": int(params.get("message_id") or next(self._message_ids)),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private" if chat_id > 0 else "channel"}
+        }
+        if text_field == "caption":
+            message["caption"] = params.get("caption", "")
+            message["photo"] = [{"file_id": "bench", "file_unique_id": "bench", "width": 800, "height": 600}]
+        else:
+            message["text"] = params.get("text", "")
+        return message
+
+    async def telegram(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params = await request.post()
+        self._count(f"telegram:{method}")
+        await self._sleep(self.telegram_latency)
+
+        if method in ("sendMessage", "editMessageText"):
+            result = self._message(params)
+        elif method in ("sendPhoto", "editMessageCaption"):
+            result = self._message(params, "caption")
+        elif method == "getMe":
+            result = {"id": 42, "is_bot": True, "first_name": "bench", "username": "bench_bot"}
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+    async def image(self, request: web.Request) -> web.Response:
+        self._count("image:probe")
+        await self._sleep(self.telegram_latency)
+        return web.Response(status=200)
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/v1/responses", self.responses)
+        app.router.add_post("/v1/chat/completions", self.chat)
+        app.router.add_post("/v1/embeddings", self.embeddings)
+        app.router.add_post("/bot{token}/{method}", self.telegram)
+        app.router.add_route("*", "/seed/{tail:.*}", self.image)
+        return app
+
+
+async def _serve(app: web.Application) -> tuple[web.AppRunner, int]:
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner, site._server.sockets[0].getsockname()[1]
+
+
+def _configure_env(port: int, args):
+    """Bot modullari import qilinishidan oldin: barcha tashqi manzillar - lokal stand-in"""
+    base = f"http://127.0.0.1:{port}"
+    os.environ.update({
+        "BOT_TOKEN": "42:bench",
+        "OPENAI_API_KEY": "sk-bench",
+        "OPENAI_BASE_URL": f"{base}/v1",
+        "IMAGE_BASE_URL": base,
+        "CHANNEL_USERNAME": "@bench_channel",
+        "MAX_CONCURRENT_RESEARCH": str(args.concurrency),
+        # Soxta Telegram flood limit qo'ymaydi - kanal navbati o'lchovni buzmasin
+        "TG_CHAT_RATE": "1000",
+        "TG_CHAT_BURST": "1000",
+        "TG_PRIVATE_RATE": "1000",
+        "TG_PRIVATE_BURST": "1000",
+        "TG_GLOBAL_RATE": "1000",
+        "USAGE_FILE": "",
+        "DRAFTS_DB": "",
+        "DEDUP_FILE": "",
+        "ARCHIVE_DB": "",
+        "REDIS_URL": ""
+    })
+
+
+class Driver:
+    """Foydalanuvchilar nomidan update yuborish va handler kechikishini yozish"""
+
+    def __init__(self, dp, bot):
+        self.dp = dp
+        self.bot = bot
+        self.latencies: dict[str, list[float]] = {}
+        self.errors = 0
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+
+    def _user(self, user_id: int) -> dict:
+        return {"id": user_id, "is_bot": False, "first_name": f"user{user_id}"}
+
+    async def _feed(self, name: str, update: dict):
+        start = time.perf_counter()
+        try:
+            await self.dp.feed_raw_update(self.bot, update)
+        except Exception as e:
+            self.errors += 1
+            print(f"  {name}: {e!r}", file=sys.stderr)
+        self.latencies.setdefault(name, []).append(time.perf_counter() - start)
+
+    async def message(self, user_id: int, text: str) -> int:
+        """Xabar yuborish; qaytadi - message_id (qoralama kaliti uchun)"""
+        message_id = next(self._message_ids)
+        name = text.split()[0] if text.startswith("/") else "text"
+        await self._feed(name, {"update_id": next(self._update_ids), "message": {
+            "message_id": message_id, "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"}, "from": self._user(user_id), "text": text
+        }})
+        return message_id
+
+    async def callback(self, user_id: int, data: str):
+        await self._feed(f"cb:{data.split(':')[0]}", {"update_id": next(self._update_ids), "callback_query": {
+            "id": str(next(self._update_ids)), "from": self._user(user_id), "chat_instance": "bench", "data": data,
+            "message": {"message_id": next(self._message_ids), "date": int(time.time()),
+                        "chat": {"id": user_id, "type": "private"}, "text": "post"}
+        }})
+
+
+async def _scenario(driver: Driver, user_id: int, rounds: int):
+    for r in range(rounds):
+        topic = f"Mavzu {user_id}-{r}"
+
+        message_id = await driver.message(user_id, f"/research {topic}")
+        post_id = f"{user_id}_{message_id}"
+        await driver.callback(user_id, f"regenerate:{post_id}")
+        await driver.callback(user_id, f"publish:{post_id}")
+
+        message_id = await driver.message(user_id, f"/quick {topic} qisqa")
+        post_id = f"{user_id}_{message_id}"
+        await driver.callback(user_id, f"edit:{post_id}")
+        await driver.message(user_id, "Ko'proq emoji qo'sh")
+        await driver.callback(user_id, f"cancel:{post_id}")
+
+        await driver.message(user_id, f"/compare {topic} vs Boshqa {user_id}-{r}")
+        await driver.message(user_id, "/trending")
+
+
+def _percentile(values: list[float], q: float) -> float:
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def main(args):
+    upstreams = FakeUpstreams(args.openai_latency, args.telegram_latency, args.jitter, args.chunk_delay)
+    runner, port = await _serve(upstreams.app())
+    _configure_env(port, args)
+
+    # Muhit sozlangach import qilinadi (config va OpenAI klienti import paytida o'qiladi)
+    from aiogram import Bot, Dispatcher
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+    from bot import router
+    from bot.handlers import admission
+    from core import SmartResearcher
+
+    # Kunlik limit o'lchanmaydi - har bir foydalanuvchi ko'p buyruq yuboradi
+    admission.daily_limit = 10 ** 9
+
+    bot = Bot("42:bench", session=AiohttpSession(api=TelegramAPIServer.from_base(f"http://127.0.0.1:{port}")))
+    researcher = SmartResearcher()
+    dp = Dispatcher(researcher=researcher)
+    dp.include_router(router)
+    await researcher.start()
+    driver = Driver(dp, bot)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    await asyncio.gather(*[_scenario(driver, 1_000 + u, args.rounds) for u in range(args.users)])
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    await researcher.close()
+    await bot.session.close()
+    await runner.cleanup()
+
+    total = sum(len(v) for v in driver.latencies.values())
+    report = {
+        "users": args.users, "rounds": args.rounds, "concurrency": args.concurrency,
+        "openai_latency": args.openai_latency, "telegram_latency": args.telegram_latency, "jitter": args.jitter,
+        "elapsed": elapsed, "updates": total, "updates_per_sec": total / elapsed, "errors": driver.errors,
+        "peak_traced_mb": peak / 2 ** 20,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "upstream_calls": upstreams.calls,
+        "commands": {}
+    }
+
+    print(f"{'buyruq':<14}{'soni':>6}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for name, values in sorted(driver.latencies.items()):
+        values.sort()
+        stats = {"count": len(values), "p50": statistics.median(values),
+                 "p95": _percentile(values, 0.95), "p99": _percentile(values, 0.99)}
+        report["commands"][name] = stats
+        print(f"{name:<14}{stats['count']:>6}{stats['p50']:>8.2f}s{stats['p95']:>8.2f}s{stats['p99']:>8.2f}s")
+
+    print(
+        f"\n{total} update {elapsed:.1f} s da: {report['updates_per_sec']:.1f} update/s, xato: {driver.errors}\n"
+        f"xotira: tracemalloc peak {report['peak_traced_mb']:.1f} MB, max RSS {report['max_rss_mb']:.0f} MB\n"
+        f"upstream: {json.dumps(upstreams.calls, ensure_ascii=False)}"
+    )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=3, help="MAX_CONCURRENT_RESEARCH")
+    parser.add_argument("--openai-latency", type=float, default=0.5, help="soniya (web search - 4 barobar)")
+    parser.add_argument("--telegram-latency", type=float, default=0.03, help="soniya")
+    parser.add_argument("--jitter", type=float, default=0.1, help="+/- soniya")
+    parser.add_argument("--chunk-delay", type=float, default=0.005, help="stream bo'laklari orasida")
+    parser.add_argument("--json", help="natijani JSON faylga yozish")
+    asyncio.run(main(parser.parse_args()))
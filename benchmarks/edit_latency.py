@@ -0,0 +1,132 @@
+"""
+Benchmark - Ketma-ket tahrirlashlar: har safar yangi OpenAI klienti vs umumiy pool
+
+Eski process_edit har bir so'rovda AsyncOpenAI yaratardi: yangi httpx pool, har safar
+TCP + TLS handshake. edit_post umumiy klientdan foydalanadi (keep-alive, HTTP/2).
+
+Standart holatda - lokal stand-in (benchmarks/e2e.py dagi soxta OpenAI) HTTPS orqali:
+o'z-o'zidan imzolangan sertifikat (openssl kerak) bilan, TLS handshake narxi ham o'lchanadi.
+--real - haqiqiy OpenAI (OPENAI_API_KEY kerak).
+
+Ishlatish:
+    python -m benchmarks.edit_latency [--edits 20] [--latency 0.05] [--real]
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+
+POST = "<b>📱 SARLAVHA</b>\n\nKirish.\n\n🔹 <b>Nuqta 1</b> - fakt\n\n<i>💡 Xulosa</i>"
+INSTRUCTION = "Sarlavhani qisqartir"
+
+
+def _self_signed_cert(directory: str) -> tuple[str, str] | None:
+    """127.0.0.1 uchun vaqtinchalik sertifikat (openssl bo'lmasa - None, stand-in HTTP da)"""
+    if shutil.which("openssl") is None:
+        return None
+    cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1", "-subj", "/CN=127.0.0.1",
+         "-addext", "subjectAltName=IP:127.0.0.1", "-keyout", key, "-out", cert],
+        check=True, capture_output=True
+    )
+    return cert, key
+
+
+async def _serve_stand_in(latency: float, directory: str):
+    """Soxta OpenAI (e2e.FakeUpstreams) - HTTPS (imkoni bo'lsa). (runner, base_url)"""
+    import ssl
+
+    from aiohttp import web
+
+    from benchmarks.e2e import FakeUpstreams
+
+    upstreams = FakeUpstreams(latency, telegram_latency=0, jitter=0, chunk_delay=0)
+    runner = web.AppRunner(upstreams.app())
+    await runner.setup()
+
+    ssl_context, scheme = None, "http"
+    cert = _self_signed_cert(directory)
+    if cert is not None:
+        ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        ssl_context.load_cert_chain(*cert)
+        scheme = "https"
+        # Klientlar (eski va umumiy) shu sertifikatga ishonadi
+        os.environ["SSL_CERT_FILE"] = cert[0]
+
+    site = web.TCPSite(runner, "127.0.0.1", 0, ssl_context=ssl_context)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"{scheme}://127.0.0.1:{port}/v1"
+
+
+def _report(name: str, latencies: list[float]):
+    rest = latencies[1:] or latencies
+    print(
+        f"{name:<26} birinchi {latencies[0] * 1000:7.1f} ms, keyingilar: "
+        f"o'rtacha {statistics.mean(rest) * 1000:7.1f} ms, p50 {statistics.median(rest) * 1000:7.1f} ms"
+    )
+
+
+async def main(args):
+    runner = None
+    with tempfile.TemporaryDirectory() as directory:
+        if not args.real:
+            runner, base_url = await _serve_stand_in(args.latency, directory)
+            # Muhit sozlangach import qilinadi (config import paytida o'qiladi)
+            os.environ.update({
+                "OPENAI_API_KEY": "sk-bench", "OPENAI_BASE_URL": base_url,
+                "USAGE_FILE": "", "DEDUP_FILE": "", "ARCHIVE_DB": ""
+            })
+            print(f"stand-in: {base_url}, javob kechikishi {args.latency * 1000:.0f} ms")
+
+        from config import OPENAI_API_KEY
+        from core import SmartResearcher
+        from core.prompts import edit_request
+
+        async def old_edit(model: str) -> str:
+            """Eski usul: har bir tahrirda yangi klient"""
+            from openai import AsyncOpenAI
+
+            client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+            try:
+                response = await client.chat.completions.create(
+                    model=model,
+                    **edit_request(POST, INSTRUCTION),
+                    temperature=0.7
+                )
+            finally:
+                await client.close()
+            return response.choices[0].message.content
+
+        researcher = SmartResearcher()
+        await researcher.start()
+
+        try:
+            for name, edit in (
+                ("yangi klient (eski)", lambda: old_edit(researcher.router.model("edit"))),
+                ("umumiy klient (edit_post)", lambda: researcher.edit_post(POST, INSTRUCTION))
+            ):
+                latencies = []
+                for _ in range(args.edits):
+                    start = time.perf_counter()
+                    await edit()
+                    latencies.append(time.perf_counter() - start)
+                _report(name, latencies)
+        finally:
+            await researcher.close()
+            if runner is not None:
+                await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--edits", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="stand-in javob kechikishi, soniya")
+    parser.add_argument("--real", action="store_true", help="haqiqiy OpenAI (OPENAI_API_KEY)")
+    asyncio.run(main(parser.parse_args()))
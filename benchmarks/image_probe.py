@@ -0,0 +1,81 @@
+"""
+Benchmark - Rasm tekshirish: har safar yangi sessiya vs umumiy sessiya
+
+Lokal aiohttp server picsum.photos o'rnini bosadi (302 -> 200).
+
+Ishlatish:
+    python -m benchmarks.image_probe [so'rovlar_soni]
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+import aiohttp
+from aiohttp import web
+
+from core import SmartResearcher
+
+
+async def _image(request: web.Request) -> web.Response:
+    return web.Response(body=b"\0" * 50_000, content_type="image/jpeg")
+
+
+async def _seed(request: web.Request) -> web.Response:
+    raise web.HTTPFound("/id/1/800/600")
+
+
+async def _start_server() -> tuple[web.AppRunner, str]:
+    app = web.Application()
+    app.router.add_route("*", "/seed/{seed}/800/600", _seed)
+    app.router.add_route("*", "/id/1/800/600", _image)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+async def _per_call_session(url: str) -> str | None:
+    """Eski usul: har chaqiruvda yangi ClientSession + GET"""
+    async with aiohttp.ClientSession() as session:
+        async with session.get(url, allow_redirects=True) as resp:
+            if resp.status == 200:
+                return str(resp.url)
+    return None
+
+
+async def _measure(name: str, probe, base: str, n: int):
+    timings = []
+    for i in range(n):
+        start = time.perf_counter()
+        assert await probe(f"{base}/seed/bench{i}/800/600")
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    print(
+        f"{name:<22} mean={statistics.mean(timings):7.3f} ms  "
+        f"p50={timings[len(timings) // 2]:7.3f} ms  p95={timings[int(len(timings) * 0.95)]:7.3f} ms"
+    )
+
+
+async def main(n: int):
+    runner, base = await _start_server()
+    researcher = SmartResearcher()
+    await researcher.start()
+
+    try:
+        await _measure("yangi sessiya + GET", _per_call_session, base, n)
+        await _measure("umumiy sessiya + HEAD", researcher._probe_image, base, n)
+    finally:
+        await researcher.close()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200))
@@ -0,0 +1,78 @@
+"""
+Benchmark - sanitize_html: eski regex sikli vs bir o'tishli tokenizer
+
+Korpus - model javoblari namunalari (promptlardagi formatlar, shu jumladan
+yopilmagan/noto'g'ri ichma-ich teglar va ekranlanmagan belgilar bilan).
+
+Ishlatish:
+    python -m benchmarks.sanitize_html [takrorlar_soni]
+"""
+
+import re
+import sys
+import time
+
+from bot.formatting import sanitize_html
+
+CORPUS = [
+    # To'liq post (POST_SYSTEM_PROMPT)
+    "<b>📱 PYTHON 3.13 CHIQDI</b>\n\nPython 3.13 versiyasi rasman e'lon qilindi.\n\n"
+    "🔹 <b>JIT kompilyator</b> - eksperimental rejimda\n"
+    "🔹 <b>GIL'siz build</b> - free-threaded rejim\n"
+    "🔹 <b>Yangi REPL</b> - rangli va ko'p qatorli\n\n"
+    "<i>💡 Xulosa: Tezlik va parallellik sari katta qadam</i>\n\n———\n"
+    "📚 <b>Manbalar:</b>\n- python.org\n- Real Python\n\n#python #release #dev",
+    # Yopilmagan teglar
+    "<b>⚡ GPT-5 HAQIDA\n\nOpenAI yangi modelni <i>sinovdan o'tkazmoqda. "
+    "Narxi 1 < 2 & tezligi > oldingi.\n\n🔗 <i>Batafsil: openai.com\n\n#ai #gpt",
+    # Noto'g'ri ichma-ichlik va kod
+    "<b>⚔️ REACT vs VUE</b>\n\n<b><i>React afzalliklari:</b></i>\n- <code>useState</code> va "
+    "<code>useEffect</code>\n- Katta ekotizim\n\n<b>✅ Vue afzalliklari:</b>\n- <code>v-model</code>\n"
+    "<pre><code class=\"language-js\">const a = b < c && d > e;</code></pre>\n"
+    "<i>💡 Xulosa: ikkalasi ham yaxshi</i>\n\n#react #vue",
+    # Qo'llanmaydigan teglar
+    "<b>🔥 BUGUNGI IT TRENDLAR</b>\n\n<p>1️⃣ <b>Trend 1</b></p><br>   └ <i>Qisqa izoh</i>\n"
+    "<ul><li>2️⃣ <b>Trend 2</b></li></ul>\n   └ <i>Izoh &nbsp; bilan</i>\n"
+    "<a href=\"https://example.com/?a=1&b=2\">manba</a>\n\n#trending #tech #news",
+] * 5
+
+
+def old_sanitize_html(text: str) -> str:
+    """bot/handlers.py dagi oldingi versiya"""
+    if not text:
+        return text
+
+    tags = ['b', 'i', 'code', 'pre', 'a']
+
+    for tag in tags:
+        open_count = len(re.findall(f'<{tag}[^>]*>', text, re.IGNORECASE))
+        close_count = len(re.findall(f'</{tag}>', text, re.IGNORECASE))
+
+        while open_count > close_count:
+            text += f'</{tag}>'
+            close_count += 1
+
+    return text
+
+
+def _bench(name: str, func, n: int):
+    start = time.perf_counter()
+    for _ in range(n):
+        for text in CORPUS:
+            func(text)
+    per_doc = (time.perf_counter() - start) / (n * len(CORPUS)) * 1e6
+    print(f"{name:<28} {per_doc:8.1f} us/post")
+
+
+def main(n: int):
+    _bench("eski sanitize_html", old_sanitize_html, n)
+    _bench("yangi sanitize_html", sanitize_html, n)
+    _bench("yangi + limit=1024", lambda text: sanitize_html(text, limit=1024, suffix="..."), n)
+
+    print("\nNamuna (2-post):")
+    print("eski :", old_sanitize_html(CORPUS[1]).replace("\n", " ")[-80:])
+    print("yangi:", sanitize_html(CORPUS[1]).replace("\n", " ")[-80:])
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,140 @@
+"""
+Benchmark - Sozlamalar: har safar faylni o'qish/yozish vs SettingsStore
+
+Ombor chaqiruvlari va handlerlar (/toggle, /settimes javobi) to'liq kechikishi:
+eski handler (faylni loop ichida o'qish/yozish) vs hozirgi (bot.handlers, xatoni tekshirish bilan).
+
+Ishlatish:
+    python -m benchmarks.settings_store [takrorlar_soni]
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+from bot import handlers
+from bot.handlers import DEFAULT_SETTINGS
+from bot.settings_store import SettingsStore
+
+
+class _Message:
+    """Handler uchun soxta xabar: javob yuborilmaydi"""
+
+    def __init__(self, text: str = ""):
+        self.text = text
+
+    async def answer(self, *args, **kwargs):
+        pass
+
+
+class _State:
+    async def clear(self):
+        pass
+
+
+def _old_load(path: str) -> dict:
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return DEFAULT_SETTINGS.copy()
+
+
+def _old_save(path: str, settings: dict):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(settings, f, ensure_ascii=False, indent=2)
+
+
+def _report(name: str, start: float, n: int):
+    print(f"{name:<34} {(time.perf_counter() - start) / n * 1e6:9.1f} us/op")
+
+
+async def _old_toggle(path: str, message: _Message):
+    """Eski cmd_toggle: load_settings() + save_settings() loop ichida"""
+    settings = _old_load(path)
+    settings["auto_post_enabled"] = not settings["auto_post_enabled"]
+    _old_save(path, settings)
+    await message.answer("status", parse_mode="HTML")
+
+
+async def _old_settimes(path: str, message: _Message, state: _State):
+    """Eski process_settimes: tekshirish + load_settings() + save_settings() loop ichida"""
+    valid_times = []
+    for t in (t.strip() for t in message.text.split(",")):
+        hour, minute = (int(part) for part in t.split(":"))
+        valid_times.append(f"{hour:02d}:{minute:02d}")
+    settings = _old_load(path)
+    settings["post_times"] = valid_times
+    _old_save(path, settings)
+    await message.answer("saqlandi", parse_mode="HTML")
+    await state.clear()
+
+
+async def _measure(name: str, handler, n: int):
+    """Handler to'liq kechikishi va shundan loop bloklangan qismi"""
+    blocked = 0.0
+    start = time.perf_counter()
+    for _ in range(n):
+        t = time.perf_counter()
+        task = asyncio.ensure_future(handler())
+        await asyncio.sleep(0)
+        blocked += time.perf_counter() - t
+        await task
+    _report(name, start, n)
+    print(f"{'  shundan loop bloklangan':<34} {blocked / n * 1e6:9.1f} us/op")
+
+
+async def main(n: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "settings.json")
+        _old_save(path, DEFAULT_SETTINGS)
+        store = SettingsStore(path, DEFAULT_SETTINGS)
+
+        # /settings, /status: faqat o'qish
+        start = time.perf_counter()
+        for _ in range(n):
+            _old_load(path)
+        _report("eski load_settings()", start, n)
+
+        start = time.perf_counter()
+        for _ in range(n):
+            store.get()
+        _report("SettingsStore.get()", start, n)
+
+        # /toggle: o'qish + o'zgartirish + yozish
+        start = time.perf_counter()
+        for _ in range(n // 10):
+            settings = _old_load(path)
+            settings["auto_post_enabled"] = not settings["auto_post_enabled"]
+            _old_save(path, settings)
+        _report("eski load + save (loop ichida)", start, n // 10)
+
+        def toggle(settings: dict):
+            settings["auto_post_enabled"] = not settings["auto_post_enabled"]
+
+        # Yozish loop'dan tashqarida: loop qancha bloklanishini alohida o'lchaymiz
+        blocked = 0.0
+        start = time.perf_counter()
+        for _ in range(n // 10):
+            t = time.perf_counter()
+            task = asyncio.ensure_future(store.update(toggle))
+            await asyncio.sleep(0)
+            blocked += time.perf_counter() - t
+            await task
+        _report("SettingsStore.update() (jami)", start, n // 10)
+        print(f"{'  shundan loop bloklangan':<34} {blocked / (n // 10) * 1e6:9.1f} us/op")
+
+        # Handlerlar: foydalanuvchi javob olguncha (saqlash natijasi tekshiriladi)
+        handlers.settings_store = store
+        state = _State()
+        toggle_message, times_message = _Message("/toggle"), _Message("09:00, 14:00, 20:00, 14:00")
+        await _measure("eski /toggle handler", lambda: _old_toggle(path, toggle_message), n // 10)
+        await _measure("cmd_toggle", lambda: handlers.cmd_toggle(toggle_message), n // 10)
+        await _measure("eski /settimes handler", lambda: _old_settimes(path, times_message, state), n // 10)
+        await _measure("process_settimes", lambda: handlers.process_settimes(times_message, state), n // 10)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000))
@@ -0,0 +1,108 @@
+"""
+Benchmark - Umumiy holat ombori: ikki "nusxa" (replica) bitta ombor orqali
+
+Tekshiriladi va o'lchanadi:
+- A nusxada saqlangan qoralama B nusxada topiladi (publish/regenerate callback)
+- A dagi sozlama o'zgarishi B da refresh() orqali ko'rinadi (listener chaqiriladi)
+- lider faqat bitta, lider to'xtasa boshqasi egallaydi
+- qoralama get/put kechikishi: jarayon ichida vs umumiy ombor
+
+Ishlatish:
+    python -m benchmarks.shared_state [takrorlar_soni] [redis_url]
+    (redis_url berilmasa - memory:// stand-in)
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from bot.drafts import Draft, DraftStore
+from bot.handlers import DEFAULT_SETTINGS
+from bot.settings_store import SettingsStore
+from bot.state import LeaderLease, create_backend
+
+
+def _report(name: str, start: float, n: int):
+    print(f"{name:<34} {(time.perf_counter() - start) / n * 1e6:9.1f} us/op")
+
+
+async def check_replicas(url: str):
+    backend_a, backend_b = create_backend(url, "bench"), create_backend(url, "bench")
+    if url.startswith("memory://"):
+        # Stand-in jarayon ichida - ikkala nusxa bitta lug'atni ko'rishi kerak
+        backend_b = backend_a
+
+    # Qoralamalar
+    drafts_a = DraftStore(ttl=60, max_size=100, backend=backend_a)
+    drafts_b = DraftStore(ttl=60, max_size=100, backend=backend_b)
+    await drafts_a.put("1_1", Draft("mavzu", "<b>post</b>"))
+    draft = await drafts_b.get("1_1")
+    assert draft is not None and draft.post == "<b>post</b>", "qoralama B da topilmadi"
+    await drafts_b.delete("1_1")
+    assert await drafts_a.get("1_1") is None
+    print("qoralamalar:  A -> B  ok")
+
+    # Sozlamalar
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "settings.json")
+        await backend_a.delete(SettingsStore.KEY)
+        store_a = SettingsStore(path, DEFAULT_SETTINGS, backend=backend_a)
+        store_b = SettingsStore(path, DEFAULT_SETTINGS, backend=backend_b)
+        await store_a.refresh()
+        await store_b.refresh()
+
+        reloaded = []
+        store_b.listeners.append(lambda: reloaded.append(True))
+        await store_a.update(lambda s: s.update(post_times=["07:30"]))
+        await store_b.refresh()
+        assert store_b.get()["post_times"] == ["07:30"] and reloaded, "sozlama B da ko'rinmadi"
+        await backend_a.delete(SettingsStore.KEY)
+    print("sozlamalar:   A -> B  ok")
+
+    # Lider tanlash
+    lease_a = LeaderLease(backend_a, "bench:leader", ttl=0.5)
+    lease_b = LeaderLease(backend_b, "bench:leader", ttl=0.5)
+    assert await lease_a.acquire() and not await lease_b.acquire(), "ikkita lider"
+    assert await lease_a.acquire(), "lider uzaytira olmadi"
+    await lease_a.release()
+    assert await lease_b.acquire(), "lider bo'shagach B egallamadi"
+    await asyncio.sleep(0.6)
+    assert await lease_a.acquire(), "muddat tugagach A egallamadi"
+    await lease_a.release()
+    print("lider:        bitta, almashinuv ok")
+
+    return backend_a, backend_b
+
+
+async def main(n: int, url: str):
+    backend_a, backend_b = await check_replicas(url)
+
+    local = DraftStore(ttl=60, max_size=n)
+    shared = DraftStore(ttl=60, max_size=n, backend=backend_a)
+
+    for name, store in (("jarayon ichida", local), (f"umumiy ({url.split(':')[0]})", shared)):
+        start = time.perf_counter()
+        for i in range(n):
+            await store.put(f"1_{i}", Draft("mavzu", "post " * 200))
+        _report(f"put: {name}", start, n)
+
+        start = time.perf_counter()
+        for i in range(n):
+            await store.get(f"1_{i}")
+        _report(f"get: {name}", start, n)
+
+        for i in range(n):
+            await store.delete(f"1_{i}")
+
+    await backend_a.close()
+    if backend_b is not backend_a:
+        await backend_b.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 2000,
+        sys.argv[2] if len(sys.argv) > 2 else "memory://"
+    ))
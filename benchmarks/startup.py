@@ -0,0 +1,101 @@
+"""
+Benchmark - Import va ishga tushish vaqti (python -X importtime)
+
+Har bir o'lchov yangi jarayonda (modullar keshlanmagan holda) bajariladi:
+- import main    : faqat config - BOT_TOKEN shu bosqichda tekshiriladi
+- import aiogram : asos (aiogram.types pydantic modellari ~2 s - bizning kod emas)
+- import bot     : aiogram + handlerlar (OpenAI/httpx/redis yuklanmasligi kerak)
+- AppContext()   : bot, dispatcher, routerlar, SmartResearcher va AutoPoster tayyor
+
+Budjet "import bot" ning aiogram ustidan qo'shgan vaqtiga qo'llanadi (aiogram
+versiyasi va mashinaga bog'liq emas). O'lchangan: ~40-70 ms, budjet - 250 ms.
+Budjet oshsa yoki import paytida og'ir modul yuklansa - chiqish kodi 1 (CI uchun).
+
+Ishlatish:
+    python -m benchmarks.startup [--runs 5] [--budget-ms 250] [--top 15]
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+# import paytida yuklanmasligi kerak bo'lgan modullar (birinchi so'rovda yoki startup'da yuklanadi)
+LAZY_MODULES = ("openai", "httpx", "redis", "numpy")
+
+SCENARIOS = {
+    "import main": "import main",
+    "import aiogram": "import aiogram",
+    "import bot": "import bot",
+    "AppContext()": "import main; main.AppContext()"
+}
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def _run(code: str) -> tuple[float, list[tuple[int, str]], set[str]]:
+    """(jami ms, [(cumulative us, modul)] - yuqori darajadagilar, yuklangan og'ir modullar)"""
+    probe = f"{code}\nimport sys\nprint(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    env = {**os.environ, "BOT_TOKEN": os.environ.get("BOT_TOKEN") or "42:startup-bench"}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        capture_output=True, text=True, env=env, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+
+    top_level = []
+    modules = []
+    for line in proc.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match is None:
+            continue
+        _, cumulative, indent, name = match.groups()
+        modules.append((int(cumulative), name))
+        if len(indent) <= 1:
+            top_level.append(int(cumulative))
+
+    loaded = {m for m in proc.stdout.strip().split(",") if m}
+    return sum(top_level) / 1000, sorted(modules, reverse=True), loaded
+
+
+def main(args) -> int:
+    failed = False
+    medians: dict[str, float] = {}
+
+    for name, code in SCENARIOS.items():
+        totals = []
+        modules, loaded = [], set()
+        for _ in range(args.runs):
+            total, modules, loaded = _run(code)
+            totals.append(total)
+
+        median = medians[name] = statistics.median(totals)
+        print(f"{name:<16} {median:8.1f} ms (median, {args.runs} ta), min {min(totals):.1f} ms")
+        if loaded:
+            print(f"   ⚠️ import paytida yuklangan: {', '.join(sorted(loaded))}")
+            failed = True
+
+        if name == "import bot":
+            own = median - medians["import aiogram"]
+            print(f"   aiogram ustidan: {own:.1f} ms")
+            if args.budget_ms and own > args.budget_ms:
+                print(f"   ⚠️ budjet oshdi: {own:.1f} ms > {args.budget_ms} ms")
+                failed = True
+
+        if args.top:
+            for cumulative, module in modules[:args.top]:
+                print(f"   {cumulative / 1000:8.1f} ms  {module}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=250,
+                        help="'import bot' - 'import aiogram' uchun (0 - tekshirilmaydi)")
+    parser.add_argument("--top", type=int, default=0, help="eng sekin N ta modulni ko'rsatish")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,167 @@
+"""
+Benchmark - Long polling vs webhook: update -> handler kechikishi va update/soniya
+
+Telegram o'rniga lokal stand-in:
+- polling: soxta Bot API server (getUpdates navbatdan beradi)
+- webhook: stand-in klient update'larni bot/webhook.py ilovasiga POST qiladi
+
+Handler o'lchov uchun oddiy (OpenAI chaqirmaydi) - faqat transport solishtiriladi.
+
+Ishlatish:
+    python -m benchmarks.webhook_vs_polling [update_soni] [parallel_klientlar]
+"""
+
+import asyncio
+import json
+import statistics
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+from aiogram import Bot, Dispatcher, Router, types
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+
+from bot.webhook import create_webhook_app
+
+TOKEN = "42:bench"
+SECRET = "bench-secret"
+WEBHOOK_PATH = "/webhook"
+
+
+def _update(update_id: int) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": 1000 + update_id % 50, "type": "private"},
+            "from": {"id": 1000 + update_id % 50, "is_bot": False, "first_name": "bench"},
+            "text": f"/ping {time.perf_counter()!r}"
+        }
+    }
+
+
+class FakeTelegram:
+    """Soxta Bot API: getUpdates (long polling), getMe va boshqa metodlar uchun ok"""
+
+    def __init__(self):
+        self.queue: asyncio.Queue[dict] = asyncio.Queue()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        if method == "getMe":
+            return web.json_response({
+                "ok": True, "result": {"id": 42, "is_bot": True, "first_name": "bench", "username": "bench_bot"}
+            })
+        if method != "getUpdates":
+            return web.json_response({"ok": True, "result": True})
+
+        data = await request.post() if request.content_type != "application/json" else await request.json()
+        timeout = float(data.get("timeout") or 0)
+        updates = []
+        try:
+            updates.append(await asyncio.wait_for(self.queue.get(), timeout=timeout or 0.01))
+            while not self.queue.empty() and len(updates) < 100:
+                updates.append(self.queue.get_nowait())
+        except asyncio.TimeoutError:
+            pass
+        return web.json_response({"ok": True, "result": updates})
+
+
+async def _serve(app: web.Application) -> tuple[web.AppRunner, int]:
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner, site._server.sockets[0].getsockname()[1]
+
+
+def _make_dispatcher(latencies: list[float], done: asyncio.Event, total: int) -> Dispatcher:
+    router = Router()
+
+    @router.message()
+    async def on_ping(message: types.Message):
+        latencies.append(time.perf_counter() - float(message.text.split()[1]))
+        if len(latencies) >= total:
+            done.set()
+
+    dp = Dispatcher()
+    dp.include_router(router)
+    return dp
+
+
+def _report(name: str, latencies: list[float], elapsed: float):
+    ms = sorted(x * 1000 for x in latencies)
+    print(
+        f"{name:<8} {len(ms) / elapsed:8.0f} update/s   "
+        f"p50={statistics.median(ms):7.2f} ms  p95={ms[int(len(ms) * 0.95)]:7.2f} ms  "
+        f"p99={ms[int(len(ms) * 0.99)]:7.2f} ms"
+    )
+
+
+async def bench_polling(fake: FakeTelegram, api_port: int, total: int, clients: int):
+    latencies, done = [], asyncio.Event()
+    dp = _make_dispatcher(latencies, done, total)
+    bot = Bot(TOKEN, session=AiohttpSession(api=TelegramAPIServer.from_base(f"http://127.0.0.1:{api_port}")))
+
+    polling = asyncio.create_task(dp.start_polling(bot, handle_signals=False, polling_timeout=1))
+    await asyncio.sleep(0.2)
+
+    async def client(offset: int):
+        for i in range(offset, total, clients):
+            fake.queue.put_nowait(_update(i + 1))
+            await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[client(c) for c in range(clients)])
+    await asyncio.wait_for(done.wait(), timeout=60)
+    _report("polling", latencies, time.perf_counter() - start)
+
+    await dp.stop_polling()
+    await polling
+    await bot.session.close()
+
+
+async def bench_webhook(total: int, clients: int):
+    latencies, done = [], asyncio.Event()
+    dp = _make_dispatcher(latencies, done, total)
+    bot = Bot(TOKEN)
+    runner, port = await _serve(create_webhook_app(dp, bot, WEBHOOK_PATH, SECRET))
+    url = f"http://127.0.0.1:{port}{WEBHOOK_PATH}"
+    headers = {"X-Telegram-Bot-Api-Secret-Token": SECRET, "Content-Type": "application/json"}
+
+    async with aiohttp.ClientSession() as session:
+        async def client(offset: int):
+            for i in range(offset, total, clients):
+                async with session.post(url, data=json.dumps(_update(i + 1)), headers=headers) as resp:
+                    assert resp.status == 200, resp.status
+
+        start = time.perf_counter()
+        await asyncio.gather(*[client(c) for c in range(clients)])
+        await asyncio.wait_for(done.wait(), timeout=60)
+        _report("webhook", latencies, time.perf_counter() - start)
+
+    await runner.cleanup()
+    await bot.session.close()
+
+
+async def main(total: int, clients: int):
+    fake = FakeTelegram()
+    api = web.Application()
+    api.router.add_route("*", "/bot{token}/{method}", fake.handle)
+    api_runner, api_port = await _serve(api)
+
+    try:
+        await bench_polling(fake, api_port, total, clients)
+        await bench_webhook(total, clients)
+    finally:
+        await api_runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 2000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    ))
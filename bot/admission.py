@@ -0,0 +1,248 @@
+"""
+Admission Control - Qimmat buyruqlar uchun navbat, parallel cheklov va kunlik limit
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
+from aiogram.exceptions import TelegramAPIError
+from aiogram.types import CallbackQuery, TelegramObject
+
+logger = logging.getLogger(__name__)
+
+Notify = Callable[[int], Awaitable[Any]]
+
+ADMIN_PRIORITY = 0
+USER_PRIORITY = 1
+
+
+class QuotaExceeded(Exception):
+    """Foydalanuvchi limiti tugadi"""
+
+    def __init__(self, limit: int, retry_in: float):
+        self.limit = limit
+        self.retry_in = retry_in
+        super().__init__(
+            f"Kunlik limit ({limit} ta so'rov) tugadi. "
+            f"Taxminan {max(1, round(retry_in / 60))} daqiqadan keyin urinib ko'ring."
+        )
+
+
+class SlidingWindowCounter:
+    """
+    Sirpanuvchi oyna (taxminiy): joriy va oldingi oyna hisoblagichlari.
+    Har bir foydalanuvchi uchun O(1) xotira va vaqt.
+    """
+
+    __slots__ = ("window", "limit", "start", "current", "previous")
+
+    def __init__(self, window: float, limit: int):
+        self.window = window
+        self.limit = limit
+        self.start = time.time()
+        self.current = 0
+        self.previous = 0
+
+    def _roll(self, now: float):
+        elapsed = int((now - self.start) // self.window)
+        if elapsed == 1:
+            self.previous, self.current = self.current, 0
+        elif elapsed > 1:
+            self.previous = self.current = 0
+        self.start += elapsed * self.window
+
+    def count(self, now: float | None = None) -> float:
+        now = time.time() if now is None else now
+        self._roll(now)
+        weight = 1 - (now - self.start) / self.window
+        return self.previous * weight + self.current
+
+    def allowed(self) -> bool:
+        """Yana bitta so'rov mumkinmi (hisobga olmasdan)"""
+        return self.count() + 1 <= self.limit
+
+    def hit(self) -> bool:
+        """Bitta so'rovni hisobga olish. Limit tugagan bo'lsa - False"""
+        if not self.allowed():
+            return False
+        self.current += 1
+        return True
+
+    def retry_in(self) -> float:
+        """Taxminan qancha vaqtdan keyin yana so'rov mumkin"""
+        return self.start + self.window - time.time()
+
+
+class AdmissionController:
+    """
+    Bir vaqtda ko'pi bilan `max_concurrent` ta qimmat so'rov bajariladi, qolganlari
+    navbatda kutadi (admin - oldinda). Oddiy foydalanuvchilar uchun sutkalik limit:
+    navbatga kirishda faqat tekshiriladi, joy olingandagina hisobga olinadi.
+    """
+
+    def __init__(self, max_concurrent: int, daily_limit: int, admin_id: int = 0, window: float = 86400):
+        self.max_concurrent = max_concurrent
+        self.daily_limit = daily_limit
+        self.admin_id = admin_id
+        self.window = window
+        self._active = 0
+        self._waiters: list[list] = []  # [priority, seq, future, notify]
+        self._seq = itertools.count()
+        self._quotas: dict[int, SlidingWindowCounter] = {}
+        self._notify_tasks: set[asyncio.Task] = set()
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for entry in self._waiters if not entry[2].done())
+
+    def _quota(self, user_id: int) -> SlidingWindowCounter:
+        counter = self._quotas.get(user_id)
+        if counter is None:
+            counter = self._quotas[user_id] = SlidingWindowCounter(self.window, self.daily_limit)
+        return counter
+
+    def _notify_positions(self):
+        for position, entry in enumerate(sorted(e for e in self._waiters if not e[2].done()), 1):
+            notify = entry[3]
+            if notify is not None:
+                # Havola saqlanadi - aks holda vazifa tugamasdan GC tomonidan yig'ilishi mumkin
+                task = asyncio.ensure_future(notify(position))
+                self._notify_tasks.add(task)
+                task.add_done_callback(self._notify_tasks.discard)
+
+    async def _acquire(self, priority: int, notify: Notify | None):
+        if self._active < self.max_concurrent and not self._waiters:
+            self._active += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        entry = [priority, next(self._seq), future, notify]
+        heapq.heappush(self._waiters, entry)
+        self._notify_positions()
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Joy berilgan edi, lekin kutuvchi bekor qilindi - joyni qaytaramiz
+                self._release()
+            else:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._notify_positions()
+            raise
+
+    def _release(self):
+        self._active -= 1
+        while self._waiters and self._active < self.max_concurrent:
+            _, _, future, _ = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            self._active += 1
+            future.set_result(None)
+        self._notify_positions()
+
+    @asynccontextmanager
+    async def slot(self, user_id: int, notify: Notify | None = None):
+        """Qimmat so'rov uchun joy olish (limit tekshiriladi, kerak bo'lsa navbat)"""
+        is_admin = bool(self.admin_id) and user_id == self.admin_id
+        quota = None
+
+        if not is_admin:
+            quota = self._quota(user_id)
+            if not quota.allowed():
+                raise QuotaExceeded(self.daily_limit, quota.retry_in())
+
+        await self._acquire(ADMIN_PRIORITY if is_admin else USER_PRIORITY, notify)
+
+        # Navbatda kutgan paytda limit boshqa so'rovlar bilan tugagan bo'lishi mumkin
+        if quota is not None and not quota.hit():
+            self._release()
+            raise QuotaExceeded(self.daily_limit, quota.retry_in())
+
+        try:
+            yield
+        finally:
+            self._release()
+
+
+class AdmissionMiddleware(BaseMiddleware):
+    """
+    flags={"expensive": True} bo'lgan handlerlarni AdmissionController orqali o'tkazish.
+    Callback navbatga tushsa, darhol "Navbatda..." deb javob beriladi (Telegram callback'ni
+    ~15 soniyada eskirtiradi) - handler buni `callback_answered` argumentidan biladi.
+    """
+
+    def __init__(self, controller: AdmissionController):
+        self.controller = controller
+
+    async def __call__(self, handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+                       event: TelegramObject, data: dict[str, Any]) -> Any:
+        if not get_flag(data, "expensive"):
+            return await handler(event, data)
+
+        user = data.get("event_from_user")
+        user_id = user.id if user else 0
+        message = event.message if isinstance(event, CallbackQuery) else event
+        queue_msg = None
+        admitted = False
+        answered = False
+        lock = asyncio.Lock()
+
+        async def notify(position: int):
+            async with lock:
+                await show_position(position)
+
+        async def show_position(position: int):
+            nonlocal queue_msg, answered
+            if admitted:
+                return
+            if isinstance(event, CallbackQuery) and not answered:
+                answered = True
+                try:
+                    await event.answer(f"⏳ Navbatda: {position}-o'rin")
+                except TelegramAPIError:
+                    pass
+            if message is None:
+                return
+            text = (
+                f"⏳ <b>Navbatdasiz:</b> {position}-o'rin\n\n"
+                f"Boshqa so'rovlar bajarilmoqda, biroz kuting..."
+            )
+            try:
+                if queue_msg is None:
+                    queue_msg = await message.answer(text, parse_mode="HTML")
+                else:
+                    await queue_msg.edit_text(text, parse_mode="HTML")
+            except TelegramAPIError:
+                pass
+
+        try:
+            async with self.controller.slot(user_id, notify):
+                async with lock:
+                    # Navbat xabari/javobi yuborilayotgan bo'lsa - tugashini kutamiz
+                    admitted = True
+                if isinstance(event, CallbackQuery):
+                    data["callback_answered"] = answered
+                if queue_msg is not None:
+                    try:
+                        await queue_msg.delete()
+                    except TelegramAPIError:
+                        pass
+                return await handler(event, data)
+        except QuotaExceeded as e:
+            if isinstance(event, CallbackQuery) and not answered:
+                await event.answer(f"⛔ {e}", show_alert=True)
+            elif message is not None:
+                await message.answer(f"⛔ <b>Limit:</b> {e}", parse_mode="HTML")
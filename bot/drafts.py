@@ -0,0 +1,228 @@
+"""
+Draft Store - Kanalga yuborilmagan postlar (qoralamalar) ombori
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from .state import StateBackend
+
+logger = logging.getLogger(__name__)
+
+
+class Draft:
+    """
+    Bitta qoralama. research (qidiruv natijasi matni) va post_type saqlanadi -
+    qayta yozishda web search takrorlanmaydi va post turi o'zgarmaydi.
+    archive_id - arxivdagi yozuv (kanalga chiqqanda yangilanadi).
+    """
+
+    __slots__ = ("topic", "post", "image_url", "research", "post_type", "archive_id", "updated_at")
+
+    def __init__(self, topic: str, post: str, image_url: str | None = None, research: str | None = None,
+                 post_type: str = "full", archive_id: int | None = None, updated_at: float | None = None):
+        self.topic = topic
+        self.post = post
+        self.image_url = image_url
+        self.research = research
+        self.post_type = post_type
+        self.archive_id = archive_id
+        self.updated_at = time.time() if updated_at is None else updated_at
+
+    @property
+    def has_image(self) -> bool:
+        return bool(self.image_url)
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def size(self) -> int:
+        """Taxminiy xotira hajmi (bayt)"""
+        return sys.getsizeof(self) + sum(sys.getsizeof(getattr(self, name)) for name in self.__slots__)
+
+
+def draft_key(chat_id: int, message_id: int) -> str:
+    """Chatlar orasida takrorlanmaydigan kalit (callback_data ichida ham ishlatiladi)"""
+    return f"{chat_id}_{message_id}"
+
+
+class DraftStore:
+    """
+    Qoralamalar: TTL va maksimal soni bo'yicha tozalanadi (eng eskisi birinchi).
+    db_path berilsa, SQLite'ga ham yoziladi va bot qayta ishga tushganda tiklanadi.
+    backend berilsa, qoralamalar faqat umumiy omborda (TTL bilan) saqlanadi -
+    callback boshqa nusxaga tushsa ham post topiladi.
+    SQLite birinchi murojaatda ochiladi (import paytida emas); o'qish/yozish bitta fon oqimida -
+    event loop bloklanmaydi, ulanish o'zi yaratilgan oqimda qoladi.
+    """
+
+    def __init__(self, ttl: float, max_size: int, db_path: str = "", backend: StateBackend | None = None):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.backend = backend
+        self._items: OrderedDict[str, Draft] = OrderedDict()
+        self._bytes = 0
+        self._db: sqlite3.Connection | None = None
+        self._db_path = db_path if backend is None else ""
+        self._executor: ThreadPoolExecutor | None = None
+        self._open_lock = asyncio.Lock()
+
+    # ============ SQLITE ============
+
+    async def _run(self, func: Callable[..., Any], *args) -> Any:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="drafts")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def _open(self):
+        if not self._db_path:
+            return
+        # Ochilayotganda kelgan so'rovlar yuklash tugashini kutadi
+        async with self._open_lock:
+            if not self._db_path:
+                return
+            try:
+                rows = await self._run(self._load, self._db_path)
+            finally:
+                self._db_path = ""
+            for key, data in reversed(rows):
+                self._remember(key, Draft(**json.loads(data)))
+
+    def _load(self, db_path: str) -> list[tuple[str, str]]:
+        """(Fon oqimida) bazani ochish va muddati o'tmagan qoralamalarni o'qish"""
+        self._db = sqlite3.connect(db_path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS drafts (id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._db.execute("DELETE FROM drafts WHERE updated_at < ?", (time.time() - self.ttl,))
+        rows = self._db.execute(
+            "SELECT id, data FROM drafts ORDER BY updated_at DESC LIMIT ?", (self.max_size,)
+        ).fetchall()
+        self._db.commit()
+        return rows
+
+    async def _db_write(self, key: str, draft: Draft):
+        if self._db is None:
+            return
+        # JSON loop'da: fon oqimi o'zgarib turgan Draft obyektini o'qimaydi
+        await self._run(self._write, key, json.dumps(draft.to_dict(), ensure_ascii=False), draft.updated_at)
+
+    def _write(self, key: str, data: str, updated_at: float):
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO drafts (id, data, updated_at) VALUES (?, ?, ?)", (key, data, updated_at)
+            )
+            self._db.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Qoralamani saqlashda xato: {e}")
+
+    async def _db_delete(self, keys: list[str]):
+        if self._db is None or not keys:
+            return
+        await self._run(self._delete, keys)
+
+    def _delete(self, keys: list[str]):
+        try:
+            self._db.executemany("DELETE FROM drafts WHERE id = ?", [(k,) for k in keys])
+            self._db.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Qoralamani o'chirishda xato: {e}")
+
+    # ============ XOTIRA ============
+
+    def _remember(self, key: str, draft: Draft):
+        old = self._items.pop(key, None)
+        if old is not None:
+            self._bytes -= old.size()
+        self._items[key] = draft
+        self._bytes += draft.size()
+
+    def _forget(self, key: str) -> Draft | None:
+        draft = self._items.pop(key, None)
+        if draft is not None:
+            self._bytes -= draft.size()
+        return draft
+
+    async def _evict(self):
+        """Muddati o'tgan va ortiqcha qoralamalarni o'chirish"""
+        expired_before = time.time() - self.ttl
+        removed = []
+
+        while self._items:
+            key, draft = next(iter(self._items.items()))
+            if draft.updated_at >= expired_before and len(self._items) <= self.max_size:
+                break
+            self._forget(key)
+            removed.append(key)
+
+        await self._db_delete(removed)
+
+    # ============ API ============
+
+    async def put(self, key: str, draft: Draft):
+        """Qoralamani saqlash (yangilangan vaqt bilan)"""
+        draft.updated_at = time.time()
+        if self.backend is not None:
+            await self.backend.set(
+                f"draft:{key}", json.dumps(draft.to_dict(), ensure_ascii=False), ttl=self.ttl
+            )
+            return
+        await self._open()
+        self._remember(key, draft)
+        await self._db_write(key, draft)
+        await self._evict()
+
+    async def get(self, key: str) -> Draft | None:
+        """Qoralamani olish (muddati o'tgan bo'lsa None)"""
+        if self.backend is not None:
+            data = await self.backend.get(f"draft:{key}")
+            return Draft(**json.loads(data)) if data else None
+        await self._open()
+        await self._evict()
+        return self._items.get(key)
+
+    async def update(self, key: str, **fields) -> Draft | None:
+        """Qoralama maydonlarini o'zgartirish"""
+        draft = await self.get(key)
+        if draft is None:
+            return None
+        self._forget(key)
+        for name, value in fields.items():
+            setattr(draft, name, value)
+        await self.put(key, draft)
+        return draft
+
+    async def delete(self, key: str):
+        if self.backend is not None:
+            await self.backend.delete(f"draft:{key}")
+            return
+        await self._open()
+        if self._forget(key) is not None:
+            await self._db_delete([key])
+
+    def memory_usage(self) -> int:
+        """Qoralamalar egallagan taxminiy xotira (bayt)"""
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    async def close(self):
+        if self._executor is not None:
+            await self._run(self._close)
+            self._executor.shutdown(wait=False)
+            self._executor = None
@@ -0,0 +1,192 @@
+"""
+Formatting - Telegram HTML uchun bir o'tishli tozalash va muvozanatlash
+"""
+
+import html
+import re
+from functools import lru_cache
+
+# Telegram qo'llaydigan teglar va ularning ruxsat etilgan atributlari
+ALLOWED_TAGS = {
+    "b": (), "strong": (), "i": (), "em": (), "u": (), "ins": (),
+    "s": (), "strike": (), "del": (), "tg-spoiler": (),
+    "span": ("class",), "a": ("href",), "code": ("class",), "pre": (),
+    "blockquote": ("expandable",), "tg-emoji": ("emoji-id",)
+}
+
+# Atributsiz yaroqsiz bo'lgan teglar
+_REQUIRED_ATTR_TAGS = {"a", "span", "tg-emoji"}
+
+# Ichida boshqa teg bo'lishi mumkin bo'lmaganlar (<pre><code> bundan mustasno)
+_RAW_TAGS = {"code", "pre"}
+
+_TOKEN_RE = re.compile(
+    r"<(/?)([a-zA-Z][\w-]*)((?:\s+[^<>]*?)?)\s*/?>"  # teg
+    r"|&(?:#\d{1,7}|#[xX][0-9a-fA-F]{1,6}|lt|gt|amp|quot);"  # entity
+    r"|[<>&]"  # yakka belgi
+)
+_ESCAPES = {"<": "&lt;", ">": "&gt;", "&": "&amp;"}
+_PARTIAL_ENTITY_RE = re.compile(r"&#?\w*$")
+_PARTIAL_TAG_RE = re.compile(r"</?[a-zA-Z][^<>]*$")
+_ATTR_RE = re.compile(r"""([\w-]+)(?:\s*=\s*("[^"]*"|'[^']*'|[^\s"'>]+))?""")
+
+
+@lru_cache(maxsize=256)
+def _opening(tag: str, raw: str) -> str | None:
+    """Tozalangan ochuvchi teg (postlarda bir xil teglar takrorlanadi - keshlanadi). Yaroqsiz bo'lsa - None"""
+    attrs = _clean_attrs(tag, raw)
+    return None if attrs is None else f"<{tag}{attrs}>"
+
+
+def _clean_attrs(tag: str, raw: str) -> str | None:
+    """Ruxsat etilgan atributlarni qoldirish. Teg yaroqsiz bo'lsa - None"""
+    allowed = ALLOWED_TAGS[tag]
+    if not allowed or not raw:
+        return None if tag in _REQUIRED_ATTR_TAGS else ""
+
+    attrs = {}
+    for name, value in _ATTR_RE.findall(raw):
+        name = name.lower()
+        if name in allowed:
+            attrs[name] = html.unescape(value.strip("\"'"))
+
+    if tag == "a" and not attrs.get("href"):
+        return None
+    if tag == "span" and attrs.get("class") != "tg-spoiler":
+        return None
+    if tag == "code" and not attrs.get("class", "language-").startswith("language-"):
+        attrs.pop("class")
+    if tag == "tg-emoji" and not attrs.get("emoji-id"):
+        return None
+
+    parts = []
+    for name, value in attrs.items():
+        if tag == "blockquote":
+            parts.append(f" {name}")
+        else:
+            parts.append(f' {name}="{html.escape(value, quote=True)}"')
+    return "".join(parts)
+
+
+def sanitize_html(text: str, limit: int | None = None, suffix: str = "") -> str:
+    """
+    Telegram HTML ni bir o'tishda tozalash:
+    - qo'llab-quvvatlanmagan teglar va yakka <, >, & belgilar ekranlanadi, <br> - yangi qator
+    - teglar to'g'ri ichma-ich yopiladi (<b><i>x</b> -> <b><i>x</i></b><i>)
+    - limit berilsa, ko'rinadigan matn shu uzunlikda kesiladi (teg va entity bo'linmaydi),
+      oxiriga suffix qo'shiladi
+    """
+    if not text:
+        return text
+    if limit is not None and len(text) <= limit:
+        # Ko'rinadigan matn manba uzunligidan oshmaydi - kesish kerak emas
+        limit = None
+
+    out = []
+    stack: list[tuple[str, str]] = []  # (teg, ochuvchi teg matni)
+    open_count: dict[str, int] = {}
+    visible = 0
+    truncated = False
+    pos = 0
+
+    def emit_text(chunk: str, width: int | None = None) -> bool:
+        """Matn qo'shish. Limitga yetsa - False"""
+        nonlocal visible, truncated
+        if limit is None:
+            out.append(chunk)
+            return True
+        width = len(chunk) if width is None else width
+        if visible + width > limit:
+            if width == len(chunk) and visible < limit:
+                out.append(chunk[:limit - visible])
+            visible = limit
+            truncated = True
+            return False
+        out.append(chunk)
+        visible += width
+        return True
+
+    for match in _TOKEN_RE.finditer(text):
+        start, end = match.span()
+        if pos < start and not emit_text(text[pos:start]):
+            break
+        pos = end
+
+        closing, tag, raw_attrs = match.groups()
+
+        if tag is None:
+            token = match.group(0)
+            # Entity yoki yakka belgi - ko'rinishda bitta belgi
+            if not emit_text(_ESCAPES.get(token, token), 1):
+                break
+            continue
+
+        tag = tag.lower()
+
+        if tag == "br":
+            if not emit_text("\n"):
+                break
+            continue
+
+        inside_raw = bool(stack) and stack[-1][0] in _RAW_TAGS
+
+        if tag not in ALLOWED_TAGS or (inside_raw and not (stack[-1][0] == "pre" and tag == "code")
+                                       and not (closing and tag == stack[-1][0])):
+            token = match.group(0)
+            if not emit_text(html.escape(token, quote=False), len(token)):
+                break
+            continue
+
+        if not closing:
+            opening = _opening(tag, raw_attrs)
+            if opening is None or (tag == "a" and open_count.get("a")):
+                # Yaroqsiz (masalan href'siz <a>) - tegni tashlab, matnni qoldiramiz
+                continue
+            stack.append((tag, opening))
+            open_count[tag] = open_count.get(tag, 0) + 1
+            out.append(opening)
+            continue
+
+        # Yopuvchi teg: ochilmagan bo'lsa - tashlab yuboramiz
+        if not open_count.get(tag):
+            continue
+        open_count[tag] -= 1
+
+        # Noto'g'ri ichma-ichlikni tuzatish: ichkilarini yopib, keyin qayta ochamiz
+        reopen = []
+        while stack:
+            open_tag, opening = stack.pop()
+            out.append(f"</{open_tag}>")
+            if open_tag == tag:
+                break
+            reopen.append((open_tag, opening))
+        for open_tag, opening in reversed(reopen):
+            stack.append((open_tag, opening))
+            out.append(opening)
+    else:
+        if pos < len(text):
+            emit_text(text[pos:])
+
+    # Bo'sh qolgan (endigina qayta ochilgan) teglarni olib tashlash va qolganlarini yopish
+    while stack:
+        open_tag, opening = stack.pop()
+        if out and out[-1] == opening:
+            out.pop()
+        else:
+            out.append(f"</{open_tag}>")
+
+    if truncated and suffix:
+        out.append(suffix)
+
+    return "".join(out)
+
+
+def partial_html(text: str, limit: int | None = None) -> str:
+    """Yozilayotgan (to'liq bo'lmagan) matnni yaroqli HTML holatiga keltirish"""
+    # Oxiridagi chala teg: "<b" yoki "</i" (yakka "<" - oddiy matn, ekranlanadi)
+    text = _PARTIAL_TAG_RE.sub("", text)
+
+    # Oxiridagi chala entity: "&amp" yoki "&#12"
+    text = _PARTIAL_ENTITY_RE.sub("", text)
+
+    return sanitize_html(text, limit=limit)
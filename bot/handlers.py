@@ -4,20 +4,41 @@ Bot Handlers - Barcha buyruqlar va callbacklar
 
 import asyncio
 import logging
-import json
-import os
-import re
+from html import escape
+from typing import AsyncIterator, Callable
 from aiogram import Router, types, F, Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
 from aiogram.filters import Command, CommandStart
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 
 from core import SmartResearcher
-from config import CHANNEL_USERNAME, MAX_POST_LENGTH, ADMIN_ID, OPENAI_API_KEY
-from .keyboards import get_post_keyboard
-
+from core.metrics import metrics
+from config import (
+    CHANNEL_USERNAME, MAX_POST_LENGTH, ADMIN_ID, IMAGE_GRACE, AUTO_POST_ENABLED,
+    DRAFT_TTL, DRAFT_MAX_COUNT, DRAFTS_DB, DAILY_LIMIT, MAX_CONCURRENT_RESEARCH
+)
+from .keyboards import get_post_keyboard, get_duplicate_keyboard
+from .settings_store import SettingsStore
+from .drafts import Draft, DraftStore, draft_key
+from .sender import outbound
+from .formatting import sanitize_html, partial_html
+from .admission import AdmissionController, AdmissionMiddleware
+from .state import state_backend
+from .metrics import MetricsMiddleware, format_archive, format_breakers, format_perf, format_usage
+
+# SmartResearcher main.AppContext da yaratiladi va handlerlarga dispatcher orqali
+# (`researcher` argumenti) beriladi - import paytida hech narsa qurilmaydi
 router = Router()
-researcher = SmartResearcher()
+
+# Har bir handler kechikishi (navbatda kutish bilan birga) - /perf va /metrics
+router.message.middleware(MetricsMiddleware(metrics))
+router.callback_query.middleware(MetricsMiddleware(metrics))
+
+# Qimmat buyruqlar (flags={"expensive": True}): parallel cheklov, navbat va kunlik limit
+admission = AdmissionController(MAX_CONCURRENT_RESEARCH, DAILY_LIMIT, ADMIN_ID)
+router.message.middleware(AdmissionMiddleware(admission))
+router.callback_query.middleware(AdmissionMiddleware(admission))
 logger = logging.getLogger(__name__)
 
 # ============ SOZLAMALAR ============
@@ -25,7 +46,7 @@ logger = logging.getLogger(__name__)
 SETTINGS_FILE = "settings.json"
 
 DEFAULT_SETTINGS = {
-    "auto_post_enabled": True,
+    "auto_post_enabled": False,
     "post_times": ["09:00", "14:00", "20:00"],
     "topics": [
         "AI sun'iy intellekt yangiliklari",
@@ -37,50 +58,32 @@ DEFAULT_SETTINGS = {
     "timezone_offset": 5
 }
 
-# Vaqtinchalik postlar
-temp_posts = {}
-
-
-def load_settings() -> dict:
-    """Sozlamalarni yuklash"""
-    try:
-        if os.path.exists(SETTINGS_FILE):
-            with open(SETTINGS_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-    except Exception as e:
-        logger.error(f"Sozlamalarni yuklashda xato: {e}")
-    return DEFAULT_SETTINGS.copy()
-
+# Vaqtinchalik postlar (qoralamalar)
+drafts = DraftStore(ttl=DRAFT_TTL, max_size=DRAFT_MAX_COUNT, db_path=DRAFTS_DB, backend=state_backend)
 
-def save_settings(settings: dict):
-    """Sozlamalarni saqlash"""
-    try:
-        with open(SETTINGS_FILE, "w", encoding="utf-8") as f:
-            json.dump(settings, f, ensure_ascii=False, indent=2)
-    except Exception as e:
-        logger.error(f"Sozlamalarni saqlashda xato: {e}")
+# Stream paytida xabarni tahrirlash oralig'i (Telegram: bitta chatda ~1 tahrir/soniya)
+STREAM_EDIT_INTERVAL = 1.5
 
+# Qayta yozishda (saqlangan qidiruv natijasidan) boshqacha matn chiqishi uchun
+REGENERATE_TEMPERATURE = 0.95
 
-def sanitize_html(text: str) -> str:
-    """HTML teglarini tozalash va to'g'rilash"""
-    if not text:
-        return text
+settings_store = SettingsStore(SETTINGS_FILE, DEFAULT_SETTINGS, backend=state_backend)
+SAVE_FAILED = "❌ Sozlamalarni saqlab bo'lmadi, keyinroq qayta urinib ko'ring."
 
-    # Ochiq teglarni yopish
-    tags = ['b', 'i', 'code', 'pre', 'a']
 
-    for tag in tags:
-        # Ochiq teglar soni
-        open_count = len(re.findall(f'<{tag}[^>]*>', text, re.IGNORECASE))
-        # Yopiq teglar soni
-        close_count = len(re.findall(f'</{tag}>', text, re.IGNORECASE))
+async def load_settings() -> dict:
+    """Sozlamalarni yuklash (fayl yoki umumiy ombor o'zgarmagan bo'lsa - xotiradan)"""
+    await settings_store.refresh()
+    return settings_store.get()
 
-        # Agar ochiq ko'p bo'lsa, yopamiz
-        while open_count > close_count:
-            text += f'</{tag}>'
-            close_count += 1
 
-    return text
+async def save_settings(mutate: Callable[[dict], None]) -> dict | None:
+    """Sozlamalarni o'zgartirib saqlash; saqlanmasa - None (foydalanuvchiga "saqlandi" deyilmaydi)"""
+    try:
+        return await settings_store.update(mutate)
+    except Exception as e:
+        logger.error(f"Sozlamalarni saqlashda xato: {e}")
+        return None
 
 
 # ============ STATES ============
@@ -93,31 +96,38 @@ class EditStates(StatesGroup):
 
 # ============ YORDAMCHI FUNKSIYALAR ============
 
-async def send_to_channel(bot: Bot, text: str, image_url: str = None) -> bool:
-    """Kanalga post yuborish"""
+async def send_to_channel(bot: Bot, researcher: SmartResearcher, text: str, image_url: str = None,
+                          topic: str | None = None, archive_id: int | None = None) -> bool:
+    """Kanalga post yuborish (yuborilgan post arxivga va takrorlarni aniqlash indeksiga qo'shiladi)"""
     try:
         if not CHANNEL_USERNAME:
             logger.warning("CHANNEL_USERNAME sozlanmagan!")
             return False
 
-        # HTML ni tozalash
-        clean_text = sanitize_html(text)
-
-        if image_url:
-            await bot.send_photo(
-                chat_id=CHANNEL_USERNAME,
-                photo=image_url,
-                caption=clean_text[:1024],
-                parse_mode="HTML"
-            )
-        else:
-            await bot.send_message(
-                chat_id=CHANNEL_USERNAME,
-                text=clean_text,
-                parse_mode="HTML"
-            )
+        # HTML ni tozalash (rasm izohi 1024 belgigacha)
+        clean_text = sanitize_html(text, limit=1024 if image_url else MAX_POST_LENGTH)
+
+        # Navbat orqali: flood limitlar va RetryAfter avtomatik hisobga olinadi
+        with metrics.track("send_to_channel"):
+            if image_url:
+                sent = await outbound.send(CHANNEL_USERNAME, lambda: bot.send_photo(
+                    chat_id=CHANNEL_USERNAME,
+                    photo=image_url,
+                    caption=clean_text,
+                    parse_mode="HTML"
+                ))
+            else:
+                sent = await outbound.send(CHANNEL_USERNAME, lambda: bot.send_message(
+                    chat_id=CHANNEL_USERNAME,
+                    text=clean_text,
+                    parse_mode="HTML"
+                ))
 
         logger.info(f"Post kanalga yuborildi: {CHANNEL_USERNAME}")
+        await researcher.archive.published(
+            archive_id, topic or "", text, CHANNEL_USERNAME, getattr(sent, "message_id", None)
+        )
+        await researcher.remember_published(text, topic)
         return True
 
     except Exception as e:
@@ -125,6 +135,39 @@ async def send_to_channel(bot: Bot, text: str, image_url: str = None) -> bool:
         return False
 
 
+async def stream_to_message(message: types.Message, chunks: AsyncIterator[str], header: str = "",
+                            interval: float = STREAM_EDIT_INTERVAL) -> str:
+    """Stream qilinayotgan postni xabarda bosqichma-bosqich ko'rsatish"""
+    loop = asyncio.get_running_loop()
+    parts = []
+    shown = ""
+    next_edit = 0.0
+    limit = MAX_POST_LENGTH - len(header) - 2
+
+    async for delta in chunks:
+        parts.append(delta)
+
+        if loop.time() < next_edit:
+            continue
+
+        preview = partial_html("".join(parts), limit)
+        if not preview.strip() or preview == shown:
+            continue
+
+        try:
+            await message.edit_text(f"{header}{preview} ▌", parse_mode="HTML")
+            shown = preview
+        except TelegramRetryAfter as e:
+            next_edit = loop.time() + e.retry_after
+            continue
+        except TelegramBadRequest as e:
+            logger.debug(f"Stream tahrirlashda xato: {e}")
+
+        next_edit = loop.time() + interval
+
+    return "".join(parts)
+
+
 # ============ /start ============
 
 @router.message(CommandStart())
@@ -150,7 +193,10 @@ async def cmd_start(message: types.Message):
         "<code>/settimes</code> - Vaqtlarni sozlash\n"
         "<code>/settopics</code> - Mavzularni sozlash\n"
         "<code>/toggle</code> - Avtomatikni yoqish/o'chirish\n"
-        "<code>/status</code> - Bot holati\n\n"
+        "<code>/status</code> - Bot holati\n"
+        "<code>/perf</code> - Bosqichlar tezligi\n"
+        "<code>/usage</code> - Tokenlar va xarajat\n"
+        "<code>/archive [so'z]</code> - Arxivdan qidirish\n\n"
         "━━━━━━━━━━━━━━━━━━━━\n"
         "💡 <b>Misol:</b> <code>/research React 19 yangiliklari</code>",
         parse_mode="HTML"
@@ -186,7 +232,7 @@ async def cmd_help(message: types.Message):
 
 @router.message(Command("settings"))
 async def cmd_settings(message: types.Message):
-    settings = load_settings()
+    settings = await load_settings()
 
     times_str = ", ".join(settings["post_times"])
     topics_str = "\n".join([f"   {i + 1}. {t}" for i, t in enumerate(settings["topics"])])
@@ -209,12 +255,14 @@ async def cmd_settings(message: types.Message):
 # ============ /status ============
 
 @router.message(Command("status"))
-async def cmd_status(message: types.Message):
-    settings = load_settings()
+async def cmd_status(message: types.Message, researcher: SmartResearcher):
+    settings = await load_settings()
 
     auto_status = "✅ Ishlayapti" if settings["auto_post_enabled"] else "⏸ To'xtatilgan"
     times = ", ".join(settings["post_times"])
     topics_count = len(settings["topics"])
+    delivery = outbound.stats()
+    breakers = format_breakers(researcher.resilience.breakers)
 
     await message.answer(
         f"📊 <b>Bot holati</b>\n\n"
@@ -222,24 +270,110 @@ async def cmd_status(message: types.Message):
         f"📢 <b>Kanal:</b> {CHANNEL_USERNAME}\n"
         f"🔄 <b>Avtomatik:</b> {auto_status}\n"
         f"⏰ <b>Vaqtlar:</b> {times}\n"
-        f"📝 <b>Mavzular:</b> {topics_count} ta",
+        f"📝 <b>Mavzular:</b> {topics_count} ta\n"
+        f"📤 <b>Yuborilgan:</b> {delivery['sent']} ta, xato: {delivery['failed']}, "
+        f"flood: {delivery['retry_after']}, navbatda: {delivery['queued']}\n"
+        f"🧮 <b>Tadqiqotlar:</b> {admission.active}/{admission.max_concurrent} bajarilmoqda, "
+        f"{admission.waiting} ta navbatda\n"
+        f"🔌 <b>OpenAI:</b> {breakers}",
+        parse_mode="HTML"
+    )
+
+
+# ============ /perf ============
+
+@router.message(Command("perf"))
+async def cmd_perf(message: types.Message, researcher: SmartResearcher):
+    if ADMIN_ID and message.from_user.id != ADMIN_ID:
+        return
+
+    summary = metrics.summary()
+    if not summary:
+        await message.answer("📈 Hali o'lchovlar yo'q")
+        return
+
+    fallbacks = ", ".join(f"{op}: {n}" for op, n in researcher.router.fallbacks.items()) or "yo'q"
+    hedged = ", ".join(f"{op}: {n}" for op, n in researcher.resilience.hedged.items()) or "yo'q"
+    duplicates = ", ".join(f"{kind}: {n}" for kind, n in researcher.dedup_hits.items()) or "yo'q"
+
+    await message.answer(
+        f"📈 <b>Bosqichlar tezligi</b> (oxirgi {metrics.window} ta o'lchov)\n\n"
+        f"{format_perf(summary)}\n"
+        f"🔀 <b>Zaxira modelga o'tishlar:</b> {fallbacks}\n"
+        f"👯 <b>Hedged so'rovlar:</b> {hedged}\n"
+        f"🧬 <b>Takrorlar:</b> {duplicates}",
+        parse_mode="HTML"
+    )
+
+
+# ============ /usage ============
+
+@router.message(Command("usage"))
+async def cmd_usage(message: types.Message, researcher: SmartResearcher):
+    if ADMIN_ID and message.from_user.id != ADMIN_ID:
+        return
+
+    today = researcher.usage.today()
+    if not today:
+        await message.answer("💵 Bugun OpenAI chaqiruvlari bo'lmagan")
+        return
+
+    await message.answer(
+        f"💵 <b>Bugungi tokenlar va xarajat</b>\n\n"
+        f"{format_usage(today, researcher.usage.budgets())}",
         parse_mode="HTML"
     )
 
 
+# ============ /archive ============
+
+@router.message(Command("archive"))
+async def cmd_archive(message: types.Message, researcher: SmartResearcher):
+    if ADMIN_ID and message.from_user.id != ADMIN_ID:
+        return
+
+    query = message.text.replace("/archive", "", 1).strip()
+    if not query:
+        await message.answer(
+            "❌ <b>Qidiruv so'zini yozing!</b>\n\n"
+            "✅ Misol: <code>/archive React</code>",
+            parse_mode="HTML"
+        )
+        return
+
+    results = await researcher.archive.search(query)
+    if not results:
+        await message.answer(f"🗄 Arxivda topilmadi: <i>{escape(query)}</i>", parse_mode="HTML")
+        return
+
+    await message.answer(
+        f"🗄 <b>Arxiv:</b> <i>{escape(query)}</i> - {len(results)} ta natija\n\n"
+        f"{format_archive(results)}",
+        parse_mode="HTML",
+        disable_web_page_preview=True
+    )
+
+
 # ============ /toggle ============
 
 @router.message(Command("toggle"))
 async def cmd_toggle(message: types.Message):
-    settings = load_settings()
-    settings["auto_post_enabled"] = not settings["auto_post_enabled"]
-    save_settings(settings)
+    def toggle(settings: dict):
+        settings["auto_post_enabled"] = not settings["auto_post_enabled"]
+
+    settings = await save_settings(toggle)
+    if settings is None:
+        await message.answer(SAVE_FAILED)
+        return
 
     if settings["auto_post_enabled"]:
         status = "✅ <b>Avtomatik posting YOQILDI!</b>\n\nBot belgilangan vaqtlarda post chiqaradi."
     else:
         status = "❌ <b>Avtomatik posting O'CHIRILDI!</b>\n\nBot faqat buyruq bilan ishlaydi."
 
+    if not AUTO_POST_ENABLED:
+        status += "\n\n⚠️ Serverda <code>AUTO_POST_ENABLED=False</code> - scheduler ishga tushmagan."
+
     await message.answer(status, parse_mode="HTML")
 
 
@@ -247,7 +381,7 @@ async def cmd_toggle(message: types.Message):
 
 @router.message(Command("settimes"))
 async def cmd_settimes(message: types.Message, state: FSMContext):
-    settings = load_settings()
+    settings = await load_settings()
     current = ", ".join(settings["post_times"])
 
     await message.answer(
@@ -285,16 +419,18 @@ async def process_settimes(message: types.Message, state: FSMContext):
 
             valid_times.append(f"{hour:02d}:{minute:02d}")
 
-        settings = load_settings()
-        settings["post_times"] = valid_times
-        save_settings(settings)
+        # Takroriy vaqtlar - bitta slot, tartiblangan
+        valid_times = sorted(set(valid_times))
 
-        await message.answer(
-            f"✅ <b>Vaqtlar saqlandi!</b>\n\n"
-            f"Yangi vaqtlar: <code>{', '.join(valid_times)}</code>\n\n"
-            f"Bot shu vaqtlarda avtomatik post chiqaradi.",
-            parse_mode="HTML"
-        )
+        if await save_settings(lambda settings: settings.update(post_times=valid_times)) is None:
+            await message.answer(SAVE_FAILED)
+        else:
+            await message.answer(
+                f"✅ <b>Vaqtlar saqlandi!</b>\n\n"
+                f"Yangi vaqtlar: <code>{', '.join(valid_times)}</code>\n\n"
+                f"Bot shu vaqtlarda avtomatik post chiqaradi.",
+                parse_mode="HTML"
+            )
 
     except ValueError as e:
         await message.answer(
@@ -310,7 +446,7 @@ async def process_settimes(message: types.Message, state: FSMContext):
 
 @router.message(Command("settopics"))
 async def cmd_settopics(message: types.Message, state: FSMContext):
-    settings = load_settings()
+    settings = await load_settings()
     current = "\n".join([f"{i + 1}. {t}" for i, t in enumerate(settings["topics"])])
 
     await message.answer(
@@ -342,9 +478,10 @@ async def process_settopics(message: types.Message, state: FSMContext):
         await message.answer("❌ Kamida 1 ta mavzu kiriting!")
         return
 
-    settings = load_settings()
-    settings["topics"] = topics
-    save_settings(settings)
+    if await save_settings(lambda settings: settings.update(topics=topics)) is None:
+        await message.answer(SAVE_FAILED)
+        await state.clear()
+        return
 
     topics_str = "\n".join([f"   {i + 1}. {t}" for i, t in enumerate(topics)])
     await message.answer(
@@ -357,8 +494,8 @@ async def process_settopics(message: types.Message, state: FSMContext):
 
 
 # ============ /research ============
-@router.message(Command("research"))
-async def cmd_research(message: types.Message):
+@router.message(Command("research"), flags={"expensive": True})
+async def cmd_research(message: types.Message, researcher: SmartResearcher):
     topic = message.text.replace("/research", "").strip()
 
     if not topic:
@@ -375,19 +512,16 @@ async def cmd_research(message: types.Message):
         parse_mode="HTML"
     )
 
-    try:
-        await asyncio.sleep(2)
-        await status_msg.edit_text(
-            f"🔍 <b>Mavzu:</b> {topic}\n\n"
-            f"📖 Maqolalar tahlil qilinmoqda...",
-            parse_mode="HTML"
-        )
+    # Rasm faqat mavzuga bog'liq - qidiruv va yozish bilan parallel
+    image_task = asyncio.create_task(researcher.get_image_for_topic(topic))
 
-        result = await researcher.full_research(topic, with_image=True)
+    try:
+        research = await researcher.search_and_analyze(topic)
 
-        if not result["success"]:
+        if research["status"] != "success":
+            image_task.cancel()
             await status_msg.edit_text(
-                f"❌ <b>Xatolik:</b> {result.get('error', 'Nomalum xato')}",
+                f"❌ <b>Xatolik:</b> {research.get('error', 'Nomalum xato')}",
                 parse_mode="HTML"
             )
             return
@@ -398,27 +532,31 @@ async def cmd_research(message: types.Message):
             parse_mode="HTML"
         )
 
-        post = sanitize_html(result["post"])
+        text = await stream_to_message(
+            status_msg,
+            researcher.stream_post(research),
+            header=f"🧠 <b>Yozilmoqda:</b> {topic}\n\n"
+        )
+        # Rasm kechiksa - postni rasmsiz ko'rsatamiz
+        done, _ = await asyncio.wait({image_task}, timeout=IMAGE_GRACE)
+        image_url = image_task.result() if done else None
+        image_task.cancel()
 
-        if len(post) > MAX_POST_LENGTH:
-            post = post[:MAX_POST_LENGTH] + "\n\n...(davomi kesildi)"
+        post = sanitize_html(text, limit=MAX_POST_LENGTH, suffix="\n\n...(davomi kesildi)")
 
-        post_id = str(message.message_id)
-        temp_posts[post_id] = {
-            "topic": topic,
-            "post": post,
-            "image_url": result.get("image_url"),
-            "has_image": bool(result.get("image_url"))
-        }
+        post_id = draft_key(message.chat.id, message.message_id)
+        archive_id = await researcher.archive.add(topic, research["research"], post)
+        await drafts.put(post_id, Draft(topic, post, image_url, research=research["research"],
+                                        archive_id=archive_id))
 
-        if result.get("image_url"):
+        if image_url:
             try:
                 await status_msg.delete()
             except:
                 pass
             await message.answer_photo(
-                photo=result["image_url"],
-                caption=f"✅ <b>Tayyor!</b>\n\n{post[:900]}",
+                photo=image_url,
+                caption=f"✅ <b>Tayyor!</b>\n\n{sanitize_html(post, limit=900)}",
                 parse_mode="HTML",
                 reply_markup=get_post_keyboard(post_id)
             )
@@ -431,6 +569,7 @@ async def cmd_research(message: types.Message):
         )
 
     except Exception as e:
+        image_task.cancel()
         logger.error(f"Research xatolik: {e}")
         try:
             await status_msg.edit_text(
@@ -442,8 +581,8 @@ async def cmd_research(message: types.Message):
 
 # ============ /publish ============
 
-@router.message(Command("publish"))
-async def cmd_publish(message: types.Message, bot: Bot):
+@router.message(Command("publish"), flags={"expensive": True})
+async def cmd_publish(message: types.Message, bot: Bot, researcher: SmartResearcher):
     topic = message.text.replace("/publish", "").strip()
 
     if not topic:
@@ -470,7 +609,23 @@ async def cmd_publish(message: types.Message, bot: Bot):
             )
             return
 
-        success = await send_to_channel(bot, result["post"], result.get("image_url"))
+        duplicate = await researcher.find_published_duplicate(result["post"])
+        if duplicate:
+            # Yubormasdan qoralama sifatida ko'rsatamiz - admin baribir yuborishi mumkin
+            post = sanitize_html(result["post"], limit=MAX_POST_LENGTH)
+            post_id = draft_key(message.chat.id, message.message_id)
+            await drafts.put(post_id, Draft(topic, post, result.get("image_url"), research=result["research"],
+                                            archive_id=result.get("archive_id")))
+            await status_msg.edit_text(
+                f"⚠️ <b>Kanalda yaqinda deyarli bir xil post chiqqan:</b>\n<i>{escape(duplicate)}</i>\n\n"
+                f"{sanitize_html(post, limit=3000)}",
+                parse_mode="HTML",
+                reply_markup=get_duplicate_keyboard(post_id)
+            )
+            return
+
+        success = await send_to_channel(bot, researcher, result["post"], result.get("image_url"), topic=topic,
+                                        archive_id=result.get("archive_id"))
 
         if success:
             await status_msg.edit_text(
@@ -495,8 +650,8 @@ async def cmd_publish(message: types.Message, bot: Bot):
 
 # ============ /quick ============
 
-@router.message(Command("quick"))
-async def cmd_quick(message: types.Message):
+@router.message(Command("quick"), flags={"expensive": True})
+async def cmd_quick(message: types.Message, researcher: SmartResearcher):
     topic = message.text.replace("/quick", "").strip()
 
     if not topic:
@@ -513,13 +668,10 @@ async def cmd_quick(message: types.Message):
         result = await researcher.quick_post(topic)
 
         if result["success"]:
-            post = sanitize_html(result["post"])
-            post_id = str(message.message_id)
-            temp_posts[post_id] = {
-                "topic": topic,
-                "post": post,
-                "has_image": False
-            }
+            post = sanitize_html(result["post"], limit=MAX_POST_LENGTH)
+            post_id = draft_key(message.chat.id, message.message_id)
+            await drafts.put(post_id, Draft(topic, post, research=result["research"], post_type="quick",
+                                            archive_id=result.get("archive_id")))
 
             await status_msg.edit_text(
                 f"⚡ <b>Tezkor post:</b>\n\n{post}",
@@ -536,8 +688,8 @@ async def cmd_quick(message: types.Message):
 
 # ============ /compare ============
 
-@router.message(Command("compare"))
-async def cmd_compare(message: types.Message):
+@router.message(Command("compare"), flags={"expensive": True})
+async def cmd_compare(message: types.Message, researcher: SmartResearcher):
     text = message.text.replace("/compare", "").strip()
 
     if " vs " not in text.lower():
@@ -566,13 +718,11 @@ async def cmd_compare(message: types.Message):
         result = await researcher.compare_topics(topic1, topic2)
 
         if result["success"]:
-            post = sanitize_html(result["post"])
-            post_id = str(message.message_id)
-            temp_posts[post_id] = {
-                "topic": f"{topic1} vs {topic2}",
-                "post": post,
-                "has_image": False
-            }
+            post = sanitize_html(result["post"], limit=MAX_POST_LENGTH)
+            post_id = draft_key(message.chat.id, message.message_id)
+            await drafts.put(post_id, Draft(f"{topic1} vs {topic2}", post,
+                                            research=result["research"], post_type="compare",
+                                            archive_id=result.get("archive_id")))
 
             await status_msg.edit_text(
                 post,
@@ -589,25 +739,24 @@ async def cmd_compare(message: types.Message):
 
 # ============ /trending ============
 
-@router.message(Command("trending"))
-async def cmd_trending(message: types.Message):
+@router.message(Command("trending"), flags={"expensive": True})
+async def cmd_trending(message: types.Message, researcher: SmartResearcher):
     status_msg = await message.answer("🔥 Trendlar qidirilmoqda...")
 
     try:
         result = await researcher.get_trending()
 
         if result["success"]:
-            post = sanitize_html(result["post"])
-            temp_posts["trending"] = {
-                "topic": "Bugungi trendlar",
-                "post": post,
-                "has_image": False
-            }
+            post = sanitize_html(result["post"], limit=MAX_POST_LENGTH)
+            post_id = draft_key(message.chat.id, message.message_id)
+            await drafts.put(post_id, Draft("Bugungi trendlar", post,
+                                            research=result["research"], post_type="trending",
+                                            archive_id=result.get("archive_id")))
 
             await status_msg.edit_text(
                 post,
                 parse_mode="HTML",
-                reply_markup=get_post_keyboard("trending")
+                reply_markup=get_post_keyboard(post_id)
             )
         else:
             await status_msg.edit_text("❌ Xatolik yuz berdi")
@@ -619,24 +768,35 @@ async def cmd_trending(message: types.Message):
 
 # ============ CALLBACK: Kanalga yuborish ============
 
-@router.callback_query(F.data.startswith("publish:"))
-async def callback_publish(callback: types.CallbackQuery, bot: Bot):
-    post_id = callback.data.split(":")[1]
+@router.callback_query(F.data.startswith("publish:") | F.data.startswith("publish_force:"))
+async def callback_publish(callback: types.CallbackQuery, bot: Bot, researcher: SmartResearcher):
+    action, post_id = callback.data.split(":")[:2]
 
-    if post_id not in temp_posts:
+    data = await drafts.get(post_id)
+    if data is None:
         await callback.answer("❌ Post topilmadi!", show_alert=True)
         return
 
-    data = temp_posts[post_id]
+    if action == "publish":
+        duplicate = await researcher.find_published_duplicate(data.post)
+        if duplicate:
+            await callback.answer("⚠️ Kanalda o'xshash post bor")
+            await outbound.send(callback.message.chat.id, lambda: callback.message.answer(
+                f"⚠️ <b>Kanalda yaqinda deyarli bir xil post chiqqan:</b>\n<i>{escape(duplicate)}</i>",
+                parse_mode="HTML",
+                reply_markup=get_duplicate_keyboard(post_id)
+            ))
+            return
 
     await callback.answer("📤 Kanalga yuborilmoqda...")
 
-    success = await send_to_channel(bot, data["post"], data.get("image_url"))
+    success = await send_to_channel(bot, researcher, data.post, data.image_url, topic=data.topic,
+                                    archive_id=data.archive_id)
 
     if success:
         # Tugmalarni olib tashlash
         try:
-            if data.get("has_image"):
+            if data.has_image:
                 await callback.message.edit_caption(
                     caption=callback.message.caption,
                     reply_markup=None
@@ -646,44 +806,59 @@ async def callback_publish(callback: types.CallbackQuery, bot: Bot):
         except:
             pass
 
-        await callback.message.answer(
+        await outbound.send(callback.message.chat.id, lambda: callback.message.answer(
             f"✅ <b>Post kanalga yuborildi!</b>\n"
             f"📢 {CHANNEL_USERNAME}",
             parse_mode="HTML"
-        )
+        ))
     else:
-        await callback.answer(
-            "❌ Yuborib bo'lmadi!\nBot kanalda admin ekanligini tekshiring.",
-            show_alert=True
-        )
+        # Callback yuqorida javob olgan - ikkinchi marta answer() ishlamaydi
+        await outbound.send(callback.message.chat.id, lambda: callback.message.answer(
+            "❌ <b>Yuborib bo'lmadi!</b>\nBot kanalda admin ekanligini tekshiring.",
+            parse_mode="HTML"
+        ))
 
 
 # ============ CALLBACK: Qayta yozish ============
 
-@router.callback_query(F.data.startswith("regenerate:"))
-async def callback_regenerate(callback: types.CallbackQuery):
+@router.callback_query(F.data.startswith("regenerate:"), flags={"expensive": True})
+async def callback_regenerate(callback: types.CallbackQuery, researcher: SmartResearcher,
+                              callback_answered: bool = False):
     post_id = callback.data.split(":")[1]
 
-    if post_id not in temp_posts:
-        await callback.answer("❌ Post topilmadi!", show_alert=True)
+    data = await drafts.get(post_id)
+    if data is None:
+        if callback_answered:
+            await callback.message.answer("❌ Post topilmadi!")
+        else:
+            await callback.answer("❌ Post topilmadi!", show_alert=True)
         return
 
-    topic = temp_posts[post_id]["topic"]
-    has_image = temp_posts[post_id].get("has_image", False)
+    topic = data.topic
+    has_image = data.has_image
 
-    await callback.answer("🔄 Qayta yozilmoqda... (15-20 soniya)")
+    # Navbatda kutgan bo'lsa, callback'ga AdmissionMiddleware javob bergan
+    if not callback_answered:
+        await callback.answer("🔄 Qayta yozilmoqda... (5-10 soniya)" if data.research
+                              else "🔄 Qayta yozilmoqda... (15-20 soniya)")
 
     try:
-        result = await researcher.full_research(topic, with_image=False)
+        if data.research:
+            # Qidiruv natijasi saqlangan - faqat post qayta yoziladi (boshqacha matn uchun yuqoriroq temperature)
+            research = {"query": topic, "research": data.research, "status": "success"}
+            post = await researcher.generate_post(research, data.post_type, temperature=REGENERATE_TEMPERATURE)
+            result = {"success": True, "post": post, "research": data.research}
+        else:
+            result = await researcher.full_research(topic, data.post_type, with_image=False)
 
         if result["success"]:
-            post = sanitize_html(result["post"])
-            temp_posts[post_id]["post"] = post
+            post = sanitize_html(result["post"], limit=MAX_POST_LENGTH)
+            await drafts.update(post_id, post=post, research=result["research"])
 
             # Rasmli post bo'lsa, caption ni o'zgartirish
             if has_image:
                 await callback.message.edit_caption(
-                    caption=f"✅ <b>Qayta yozildi!</b>\n\n{post[:900]}",
+                    caption=f"✅ <b>Qayta yozildi!</b>\n\n{sanitize_html(post, limit=900)}",
                     parse_mode="HTML",
                     reply_markup=get_post_keyboard(post_id)
                 )
@@ -710,8 +885,7 @@ async def callback_regenerate(callback: types.CallbackQuery):
 async def callback_cancel(callback: types.CallbackQuery):
     post_id = callback.data.split(":")[1]
 
-    if post_id in temp_posts:
-        del temp_posts[post_id]
+    await drafts.delete(post_id)
 
     await callback.answer("❌ Bekor qilindi")
 
@@ -727,7 +901,7 @@ async def callback_cancel(callback: types.CallbackQuery):
 async def callback_edit(callback: types.CallbackQuery, state: FSMContext):
     post_id = callback.data.split(":")[1]
 
-    if post_id not in temp_posts:
+    if await drafts.get(post_id) is None:
         await callback.answer("❌ Post topilmadi!", show_alert=True)
         return
 
@@ -748,8 +922,8 @@ async def callback_edit(callback: types.CallbackQuery, state: FSMContext):
     )
 
 
-@router.message(EditStates.waiting_for_edit)
-async def process_edit(message: types.Message, state: FSMContext):
+@router.message(EditStates.waiting_for_edit, flags={"expensive": True})
+async def process_edit(message: types.Message, state: FSMContext, researcher: SmartResearcher):
     if message.text == "/cancel":
         await state.clear()
         await message.answer("❌ Bekor qilindi")
@@ -758,38 +932,22 @@ async def process_edit(message: types.Message, state: FSMContext):
     data = await state.get_data()
     post_id = data.get("post_id")
 
-    if not post_id or post_id not in temp_posts:
+    draft = await drafts.get(post_id) if post_id else None
+    if draft is None:
         await state.clear()
         await message.answer("❌ Post topilmadi!")
         return
 
-    original_post = temp_posts[post_id]["post"]
+    original_post = draft.post
     edit_request = message.text
 
     status_msg = await message.answer("✏️ Tahrirlanmoqda...")
 
     try:
-        from openai import AsyncOpenAI
-
-        edit_client = AsyncOpenAI(api_key=OPENAI_API_KEY)
-
-        response = await edit_client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "Sen matn tahrirlovchisisan. Postni so'rov bo'yicha tahrirlash. HTML formatni to'g'ri saqlash - har bir ochilgan teg yopilishi kerak (<b></b>, <i></i>, <code></code>). Faqat tahrirlangan postni qaytar, boshqa hech narsa yozma."
-                },
-                {
-                    "role": "user",
-                    "content": f"POST:\n{original_post}\n\nSO'ROV: {edit_request}"
-                }
-            ],
-            temperature=0.7
-        )
+        edited = await researcher.edit_post(original_post, edit_request)
 
-        edited_post = sanitize_html(response.choices[0].message.content)
-        temp_posts[post_id]["post"] = edited_post
+        edited_post = sanitize_html(edited, limit=MAX_POST_LENGTH)
+        await drafts.update(post_id, post=edited_post)
 
         await status_msg.edit_text(
             f"✅ <b>Tahrirlandi!</b>\n\n{edited_post}",
@@ -33,6 +33,16 @@ def get_post_keyboard(post_id: str = "0") -> InlineKeyboardMarkup:
     ])
 
 
+def get_duplicate_keyboard(post_id: str) -> InlineKeyboardMarkup:
+    """Kanalda o'xshash post bor - baribir yuborish yoki bekor qilish"""
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [
+            InlineKeyboardButton(text="📢 Baribir yuborish", callback_data=f"publish_force:{post_id}"),
+            InlineKeyboardButton(text="❌ Bekor qilish", callback_data=f"cancel:{post_id}")
+        ]
+    ])
+
+
 def get_confirm_keyboard() -> InlineKeyboardMarkup:
     """Tasdiqlash tugmalari"""
     return InlineKeyboardMarkup(inline_keyboard=[
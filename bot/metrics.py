@@ -0,0 +1,119 @@
+"""
+Metrics Middleware - Har bir buyruq va callback handlerining kechikishi va xatolari
+"""
+
+from datetime import datetime
+from html import escape
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from core.metrics import Metrics
+from core.usage import current_command
+
+
+class MetricsMiddleware(BaseMiddleware):
+    """
+    Handler nomi bo'yicha (masalan handler:cmd_research) o'lchash, navbatda kutish ham kiradi.
+    Nom token statistikasi uchun current_command ga ham yoziladi.
+    """
+
+    def __init__(self, registry: Metrics):
+        self.registry = registry
+
+    async def __call__(self, handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+                       event: TelegramObject, data: dict[str, Any]) -> Any:
+        handler_object = data.get("handler")
+        name = getattr(getattr(handler_object, "callback", None), "__name__", "unknown")
+
+        token = current_command.set(name)
+        try:
+            with self.registry.track(f"handler:{name}"):
+                return await handler(event, data)
+        finally:
+            current_command.reset(token)
+
+
+def format_perf(summary: dict[str, dict]) -> str:
+    """/perf uchun jadval (HTML <pre>)"""
+    def fmt(seconds: float | None) -> str:
+        if seconds is None:
+            return "-"
+        return f"{seconds * 1000:.0f}ms" if seconds < 1 else f"{seconds:.1f}s"
+
+    rows = [f"{'bosqich':<31}{'soni':>6}{'xato':>5}{'jar.':>5}{'p50':>8}{'p95':>8}{'p99':>8}"]
+    for name, s in summary.items():
+        rows.append(
+            f"{name[:30]:<31}{s['count']:>6}{s['errors']:>5}{s['inflight']:>5}"
+            f"{fmt(s['p50']):>8}{fmt(s['p95']):>8}{fmt(s['p99']):>8}"
+        )
+    return "<pre>" + "\n".join(rows) + "</pre>"
+
+
+def format_usage(today: dict[str, dict], budgets: dict[str, int]) -> str:
+    """/usage uchun: bugungi tokenlar va narx (buyruq bo'yicha), joriy max_tokens"""
+    by_command: dict[str, dict] = {}
+    for key, row in today.items():
+        command = key.split("|", 1)[0]
+        total = by_command.setdefault(
+            command, {"calls": 0, "prompt": 0, "cached": 0, "completion": 0, "latency": 0.0, "cost": 0.0}
+        )
+        total["calls"] += row["calls"]
+        total["prompt"] += row["prompt_tokens"]
+        total["cached"] += row.get("cached_tokens", 0)
+        total["completion"] += row["completion_tokens"]
+        total["latency"] += row["latency"]
+        total["cost"] += row["cost"]
+
+    def cached_share(t: dict) -> str:
+        return f"{t['cached'] * 100 // t['prompt']}%" if t["prompt"] else "-"
+
+    rows = [f"{'buyruq':<22}{'soni':>5}{'kirish':>9}{'kesh':>6}{'chiqish':>9}{'vaqt':>7}{'$':>8}"]
+    for command, t in sorted(by_command.items(), key=lambda item: -item[1]["cost"]):
+        rows.append(
+            f"{command[:21]:<22}{t['calls']:>5}{t['prompt']:>9}{cached_share(t):>6}{t['completion']:>9}"
+            f"{t['latency'] / t['calls']:>6.1f}s{t['cost']:>8.3f}"
+        )
+    total_cost = sum(t["cost"] for t in by_command.values())
+    prompt = sum(t["prompt"] for t in by_command.values())
+    cached = sum(t["cached"] for t in by_command.values())
+    limits = ", ".join(f"{post_type}: {tokens}" for post_type, tokens in budgets.items())
+
+    return (
+        "<pre>" + "\n".join(rows) + "</pre>\n"
+        f"💵 <b>Jami:</b> ${total_cost:.3f}\n"
+        f"🗂 <b>Prompt keshi:</b> {cached_share({'prompt': prompt, 'cached': cached})} kirish tokenlari\n"
+        f"🎚 <b>max_tokens:</b> {limits}"
+    )
+
+
+def format_breakers(breakers: dict) -> str:
+    """/status uchun: model -> circuit breaker holati"""
+    if not breakers:
+        return "✅"
+    parts = []
+    for model, breaker in sorted(breakers.items()):
+        if breaker.state == breaker.CLOSED:
+            parts.append(f"{model} ✅")
+        elif breaker.state == breaker.HALF_OPEN:
+            parts.append(f"{model} 🟡 sinovda")
+        else:
+            parts.append(f"{model} ⛔ {breaker.retry_in():.0f}s")
+    return ", ".join(parts)
+
+
+def format_archive(results: list[dict]) -> str:
+    """/archive uchun: mavzu, post turi, sana, kanal havolasi va mos parcha"""
+    blocks = []
+    for i, r in enumerate(results, 1):
+        line = (f"{i}. <b>{escape(r['topic'])}</b> · {r['post_type']} · "
+                f"{datetime.fromtimestamp(r['created_at']):%d.%m.%Y %H:%M}")
+        if r["published_at"]:
+            channel = (r["channel"] or "").lstrip("@")
+            if r["message_id"] and channel and not channel.lstrip("-").isdigit():
+                line += f' · 📢 <a href="https://t.me/{channel}/{r["message_id"]}">kanalda</a>'
+            else:
+                line += " · 📢 kanalda"
+        blocks.append(f"{line}\n<i>{r['snippet']}</i>")
+    return "\n\n".join(blocks)
@@ -0,0 +1,339 @@
+"""
+Auto Poster - Belgilangan vaqtlarda kanalga avtomatik post chiqarish
+"""
+
+import asyncio
+import heapq
+import json
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from aiogram import Bot
+
+from config import (
+    AUTO_POST_ENABLED, AUTO_POST_PREFETCH_MINUTES, AUTO_POST_CATCHUP_MINUTES, AUTO_POST_BATCH_WINDOW_MINUTES, LEADER_TTL
+)
+from core import SmartResearcher
+from core.usage import current_command
+from .handlers import load_settings, send_to_channel, settings_store
+from .state import LeaderLease, StateBackend, state_backend
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = "scheduler_state.json"
+STATE_KEY = "scheduler:state"
+LEADER_KEY = "scheduler:leader"
+
+
+def _parse_time(value: str) -> tuple[int, int]:
+    hour, minute = value.split(":")
+    return int(hour), int(minute)
+
+
+def next_fire(post_time: str, now: float, offset_hours: int) -> float:
+    """post_time ("HH:MM", mahalliy vaqt) ning `now` dan keyingi UTC timestamp"""
+    tz = timezone(timedelta(hours=offset_hours))
+    hour, minute = _parse_time(post_time)
+
+    local_now = datetime.fromtimestamp(now, tz)
+    fire = local_now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if fire.timestamp() <= now:
+        fire += timedelta(days=1)
+
+    return fire.timestamp()
+
+
+class AutoPoster:
+    """
+    post_times bo'yicha navbat (heap). Har bir slot uchun post PREFETCH daqiqa oldin
+    tayyorlanadi, slot vaqtida faqat kanalga yuboriladi. BATCH_WINDOW ichidagi keyingi
+    slotlar ham birga (bitta web search bilan) tayyorlanadi.
+
+    Umumiy ombor (backend) bo'lsa, bir nechta nusxadan faqat lider post chiqaradi,
+    holat (oxirgi slot, mavzu indeksi) ham omborda saqlanadi.
+
+    AUTO_POST_ENABLED=False (env) - scheduler umuman ishga tushmaydi, /toggle dan qat'i nazar.
+    """
+
+    def __init__(self, researcher: SmartResearcher, prefetch_minutes: float = AUTO_POST_PREFETCH_MINUTES,
+                 catchup_minutes: float = AUTO_POST_CATCHUP_MINUTES,
+                 batch_window_minutes: float = AUTO_POST_BATCH_WINDOW_MINUTES,
+                 backend: StateBackend | None = state_backend, leader_ttl: float = LEADER_TTL,
+                 enabled: bool = AUTO_POST_ENABLED):
+        self.enabled = enabled
+        self.researcher = researcher
+        self.prefetch = prefetch_minutes * 60
+        self.catchup = catchup_minutes * 60
+        self._bot: Bot | None = None
+        self._task: asyncio.Task | None = None
+        self._changed = asyncio.Event()
+        self._heap: list[tuple[float, str]] = []
+        self.batch_window = batch_window_minutes * 60
+        self._prepared: dict[float, tuple[int, str, dict]] = {}
+        self._state: dict = {}
+        self.backend = backend
+        self.lease = LeaderLease(backend, LEADER_KEY, leader_ttl) if backend is not None else None
+
+    # ============ HOLAT ============
+
+    async def _load_state(self) -> dict:
+        try:
+            if self.backend is not None:
+                data = await self.backend.get(STATE_KEY)
+                return json.loads(data) if data else {}
+            if os.path.exists(STATE_FILE):
+                with open(STATE_FILE, "r", encoding="utf-8") as f:
+                    return json.load(f)
+        except Exception as e:
+            logger.error(f"Scheduler holatini yuklashda xato: {e}")
+        return {}
+
+    async def _save_state(self):
+        try:
+            if self.backend is not None:
+                await self.backend.set(STATE_KEY, json.dumps(self._state))
+                return
+            await asyncio.to_thread(self._write_state, json.dumps(self._state))
+        except Exception as e:
+            logger.error(f"Scheduler holatini saqlashda xato: {e}")
+
+    @staticmethod
+    def _write_state(data: str):
+        """Atomik yozish: vaqtinchalik fayl + rename (yarim yozilgan holat fayli qolmaydi)"""
+        directory = os.path.dirname(os.path.abspath(STATE_FILE))
+        fd, tmp_path = tempfile.mkstemp(prefix=".scheduler-", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, STATE_FILE)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    # ============ BOSHQARUV ============
+
+    def start(self, bot: Bot):
+        """Fon vazifasini boshlash (AUTO_POST_ENABLED=False bo'lsa - ishga tushmaydi)"""
+        if not self.enabled:
+            logger.info("Avtomatik posting o'chiq (AUTO_POST_ENABLED=False)")
+            return
+        self._bot = bot
+        if self.reload not in settings_store.listeners:
+            settings_store.listeners.append(self.reload)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run() if self.lease is None else self._lead())
+
+    async def stop(self):
+        """Fon vazifasini to'xtatish"""
+        if self.reload in settings_store.listeners:
+            settings_store.listeners.remove(self.reload)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def reload(self):
+        """Sozlamalar o'zgardi (/settimes, /settopics, /toggle) - navbatni qayta qurish"""
+        self._changed.set()
+
+    def next_slot(self) -> float | None:
+        """Navbatdagi slot (UTC timestamp)"""
+        return self._heap[0][0] if self._heap else None
+
+    @property
+    def is_leader(self) -> bool:
+        return self.lease is None or self.lease.is_leader
+
+    # ============ LIDER ============
+
+    async def _lead(self):
+        """Liderlikni ushlab turish: lider bo'lgan nusxagina _run() ni bajaradi"""
+        run_task: asyncio.Task | None = None
+        try:
+            while True:
+                try:
+                    leader = await self.lease.acquire()
+                    # Boshqa nusxada o'zgargan sozlamalar - listeners orqali reload()
+                    await settings_store.refresh()
+                except Exception as e:
+                    logger.error(f"Liderlikni tekshirishda xato: {e}")
+                    leader = False
+
+                if run_task is not None and run_task.done():
+                    if not run_task.cancelled() and run_task.exception():
+                        logger.error(f"Scheduler to'xtadi: {run_task.exception()}")
+                    run_task = None
+
+                if leader and run_task is None:
+                    logger.info(f"Scheduler lideri: {self.lease.owner}")
+                    run_task = asyncio.create_task(self._run())
+                elif not leader and run_task is not None:
+                    logger.warning("Scheduler liderligi yo'qotildi")
+                    run_task.cancel()
+                    await asyncio.gather(run_task, return_exceptions=True)
+                    run_task = None
+                    self._prepared.clear()
+
+                await asyncio.sleep(self.lease.ttl / 3)
+        finally:
+            if run_task is not None:
+                run_task.cancel()
+                await asyncio.gather(run_task, return_exceptions=True)
+            await self.lease.release()
+
+    # ============ ASOSIY SIKL ============
+
+    async def _sleep_until(self, ts: float) -> bool:
+        """ts gacha kutish. Sozlamalar o'zgarsa - False"""
+        delay = ts - time.time()
+        if delay <= 0:
+            return not self._changed.is_set()
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout=delay)
+            return False
+        except asyncio.TimeoutError:
+            return True
+
+    def _build_heap(self, settings: dict, now: float):
+        offset = settings.get("timezone_offset", 5)
+        # Takroriy vaqt - bitta slot (aks holda bir vaqtda ikki post)
+        self._heap = [(next_fire(t, now, offset), t) for t in set(settings["post_times"])]
+        heapq.heapify(self._heap)
+
+        # Vaqtlar o'zgargan bo'lsa - eski slotlar uchun tayyorlanganlarni tashlash
+        fire_times = {ts for ts, _ in self._heap}
+        for ts in [ts for ts in self._prepared if ts not in fire_times]:
+            del self._prepared[ts]
+
+    async def _missed_slot(self, settings: dict, now: float) -> float | None:
+        """Bot o'chiq paytida o'tib ketgan oxirgi slot (catch-up oynasi ichida)"""
+        last = self._state.get("last_slot")
+        if last is None:
+            # Birinchi ishga tushish - o'tgan slotlarni chiqarmaymiz
+            self._state["last_slot"] = now
+            await self._save_state()
+            return None
+
+        offset = settings.get("timezone_offset", 5)
+        latest = max(next_fire(t, now, offset) - 86400 for t in settings["post_times"])
+        if latest > last and now - latest <= self.catchup:
+            return latest
+        return None
+
+    async def _skip_missed(self, now: float):
+        """Shu paytgacha o'tgan slotlar catch-up qilinmaydi"""
+        self._state["last_slot"] = now
+        await self._save_state()
+
+    async def _run(self):
+        current_command.set("auto_post")
+        self._state = await self._load_state()
+        # Catch-up faqat ishga tushganda (bot o'chiq turgan vaqt uchun)
+        startup = True
+
+        while True:
+            self._changed.clear()
+            settings = await load_settings()
+            now = time.time()
+
+            if not settings.get("auto_post_enabled") or not settings.get("post_times") or not settings.get("topics"):
+                self._heap = []
+                self._prepared.clear()
+                # O'chiq paytida o'tgan slotlar qayta yoqilganda chiqarilmaydi
+                await self._skip_missed(now)
+                startup = False
+                await self._changed.wait()
+                continue
+
+            if not startup:
+                # Sozlamalar o'zgardi (/settimes, /toggle) - o'tib ketgan vaqtlar "o'tkazib yuborilgan" emas
+                await self._skip_missed(now)
+            startup = False
+            self._build_heap(settings, now)
+
+            missed = await self._missed_slot(settings, now)
+            if missed is not None:
+                logger.info("O'tkazib yuborilgan slot uchun post chiqarilmoqda")
+                await self._fire(missed)
+
+            while self._heap and not self._changed.is_set():
+                fire_ts, post_time = self._heap[0]
+
+                if not await self._sleep_until(fire_ts - self.prefetch):
+                    break
+                await self._prepare(fire_ts)
+
+                if not await self._sleep_until(fire_ts):
+                    break
+                await self._fire(fire_ts)
+
+                heapq.heapreplace(self._heap, (fire_ts + 86400, post_time))
+
+    # ============ POST ============
+
+    def _slot_topic(self, topics: list[str], offset: int) -> tuple[int, str]:
+        """Navbatdagi `offset`-slot uchun mavzu (topics bo'yicha aylanib)"""
+        index = self._state.get("topic_index", 0) + offset
+        return index, topics[index % len(topics)]
+
+    async def _prepare(self, fire_ts: float):
+        """Slot uchun postni oldindan tayyorlash (oynaga tushgan keyingi slotlar bilan birga)"""
+        if fire_ts in self._prepared:
+            return
+
+        slots = [fire_ts] + sorted(
+            ts for ts, _ in self._heap if fire_ts < ts <= fire_ts + self.batch_window
+        )
+        slots = [ts for ts in slots if ts not in self._prepared]
+        all_topics = (await load_settings())["topics"]
+        topics = [self._slot_topic(all_topics, offset) for offset in range(len(slots))]
+
+        try:
+            if len(slots) == 1:
+                results = [await self.researcher.full_research(topics[0][1], with_image=True)]
+            else:
+                # Bir nechta slot - bitta web search, postlar parallel
+                results = await self.researcher.batch_research([topic for _, topic in topics], with_image=True)
+        except Exception as e:
+            logger.error(f"Avtomatik post tayyorlashda xato: {e}")
+            return
+
+        for ts, (index, topic), result in zip(slots, topics, results):
+            if result["success"]:
+                self._prepared[ts] = (index, topic, result)
+            else:
+                logger.error(f"Avtomatik post tayyorlanmadi ({topic}): {result.get('error')}")
+
+    async def _fire(self, fire_ts: float):
+        """Slot vaqti - tayyor postni kanalga yuborish"""
+        if fire_ts not in self._prepared:
+            await self._prepare(fire_ts)
+
+        prepared = self._prepared.pop(fire_ts, None)
+        if prepared is None:
+            logger.error("Slot uchun post yo'q, o'tkazib yuborildi")
+        else:
+            index, topic, result = prepared
+            duplicate = await self.researcher.find_published_duplicate(result["post"])
+            if duplicate:
+                # Navbatdagi mavzuga o'tamiz - keyingi slotda boshqa post chiqadi
+                logger.warning(f"Avtomatik post o'tkazib yuborildi ({topic}) - kanalda o'xshash post bor: {duplicate}")
+                self._state["topic_index"] = index + 1
+            elif await send_to_channel(self._bot, self.researcher, result["post"], result.get("image_url"),
+                                       topic=topic, archive_id=result.get("archive_id")):
+                logger.info(f"Avtomatik post chiqdi: {topic}")
+                self._state["topic_index"] = index + 1
+
+        self._state["last_slot"] = fire_ts
+        await self._save_state()
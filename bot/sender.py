@@ -0,0 +1,136 @@
+"""
+Outbound Queue - Telegram'ga yuboriladigan xabarlar uchun tezlik cheklovi va qayta urinish
+"""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable
+
+from aiogram.exceptions import TelegramNetworkError, TelegramRetryAfter, TelegramServerError
+
+from config import TG_GLOBAL_RATE, TG_CHAT_RATE, TG_CHAT_BURST, TG_PRIVATE_RATE, TG_PRIVATE_BURST, TG_SEND_RETRIES
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Token bucket: sekundiga `rate` ta, ko'pi bilan `capacity` ta ketma-ket"""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated", "blocked_until", "_lock")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def block(self, seconds: float):
+        """Telegram retry_after - shu vaqtgacha hech narsa yubormaslik"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+    async def acquire(self):
+        # Lock FIFO tartibda ishlaydi - kutayotganlar navbat bilan o'tadi
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                wait = self.blocked_until - now
+                if wait <= 0:
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+
+                await asyncio.sleep(wait)
+
+
+class OutboundQueue:
+    """
+    Barcha chiquvchi xabarlar global va har bir chat uchun alohida token bucket'dan o'tadi.
+    Guruh/kanal (chat_id < 0 yoki @username) - ~20 xabar/daqiqa, shaxsiy chat - ~1 xabar/soniya.
+    RetryAfter bo'lsa - ko'rsatilgan vaqt kutiladi, tarmoq/server xatolarida
+    jitter bilan qayta uriniladi.
+    """
+
+    def __init__(self, global_rate: float = TG_GLOBAL_RATE, chat_rate: float = TG_CHAT_RATE,
+                 chat_burst: float = TG_CHAT_BURST, private_rate: float = TG_PRIVATE_RATE,
+                 private_burst: float = TG_PRIVATE_BURST, max_retries: int = TG_SEND_RETRIES):
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.private_rate = private_rate
+        self.private_burst = private_burst
+        self.max_retries = max_retries
+        self._chats: dict[int | str, TokenBucket] = {}
+        self.metrics = {
+            "sent": 0,
+            "failed": 0,
+            "retries": 0,
+            "retry_after": 0,
+            "queued": 0,
+            "total_latency": 0.0
+        }
+
+    def _chat_bucket(self, chat_id: int | str) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if isinstance(chat_id, str) or chat_id < 0:
+                bucket = TokenBucket(self.chat_rate, self.chat_burst)
+            else:
+                bucket = TokenBucket(self.private_rate, self.private_burst)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    async def send(self, chat_id: int | str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """call() ni tezlik cheklovlari va qayta urinishlar bilan bajarish"""
+        bucket = self._chat_bucket(chat_id)
+        started = time.monotonic()
+        self.metrics["queued"] += 1
+
+        try:
+            for attempt in range(self.max_retries + 1):
+                await bucket.acquire()
+                await self.global_bucket.acquire()
+
+                try:
+                    result = await call()
+                except TelegramRetryAfter as e:
+                    # Keyingi urinish bucket orqali retry_after tugagach o'tadi
+                    self.metrics["retry_after"] += 1
+                    bucket.block(e.retry_after + random.random())
+                    logger.warning(f"Telegram flood limit ({chat_id}): {e.retry_after} s kutiladi")
+                    if attempt == self.max_retries:
+                        raise
+                except (TelegramNetworkError, TelegramServerError) as e:
+                    logger.warning(f"Telegram'ga yuborishda xato ({chat_id}), urinish {attempt + 1}: {e}")
+                    if attempt == self.max_retries:
+                        raise
+                    await asyncio.sleep(min(2 ** attempt, 30) * (0.5 + random.random()))
+                else:
+                    self.metrics["sent"] += 1
+                    self.metrics["total_latency"] += time.monotonic() - started
+                    return result
+
+                self.metrics["retries"] += 1
+        except Exception:
+            self.metrics["failed"] += 1
+            raise
+        finally:
+            self.metrics["queued"] -= 1
+
+    def stats(self) -> dict:
+        sent = self.metrics["sent"]
+        return {
+            **self.metrics,
+            "avg_latency": self.metrics["total_latency"] / sent if sent else 0.0
+        }
+
+
+outbound = OutboundQueue()
@@ -0,0 +1,143 @@
+"""
+Settings Store - settings.json uchun xotiradagi kesh va atomik yozish
+"""
+
+import asyncio
+import copy
+import json
+import logging
+import os
+import tempfile
+from typing import Callable
+
+from .state import StateBackend
+
+logger = logging.getLogger(__name__)
+
+
+class SettingsStore:
+    """
+    Sozlamalar xotirada saqlanadi va fayl o'zgargandagina (mtime) qayta o'qiladi.
+    O'zgartirishlar lock orqali ketma-ket bajariladi va faylga event loop'dan
+    tashqarida atomik (vaqtinchalik fayl + rename) yoziladi.
+
+    backend berilsa, sozlamalar umumiy omborda saqlanadi (fayl faqat boshlang'ich
+    qiymat sifatida o'qiladi) va refresh() boshqa nusxalardagi o'zgarishni ko'radi.
+    Lock faqat shu jarayon ichida ishlaydi - nusxalar orasida update() compare-and-set
+    bilan yozadi: boshqa nusxa oraliqda o'zgartirgan bo'lsa, o'qish va o'zgartirish qaytariladi.
+    """
+
+    KEY = "settings"
+    MAX_CAS_ATTEMPTS = 10
+
+    def __init__(self, path: str, defaults: dict, backend: StateBackend | None = None):
+        self.path = path
+        self.defaults = defaults
+        self.backend = backend
+        self.listeners: list[Callable[[], None]] = []
+        self._lock = asyncio.Lock()
+        self._data: dict | None = None
+        self._stamp: tuple[int, int] | None = None
+        self._raw: str | None = None
+
+    def _file_stamp(self) -> tuple[int, int] | None:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _read(self) -> dict:
+        data = copy.deepcopy(self.defaults)
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data.update(json.load(f))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Sozlamalarni yuklashda xato: {e}")
+        return data
+
+    def _notify(self):
+        for listener in self.listeners:
+            listener()
+
+    async def refresh(self):
+        """Umumiy ombordagi sozlamalarni olish; boshqa nusxa o'zgartirgan bo'lsa - listeners"""
+        if self.backend is None:
+            return
+
+        raw = await self.backend.get(self.KEY)
+        if raw is None:
+            # Ombor bo'sh - fayldagi (yoki standart) sozlamalar bilan boshlaymiz
+            raw = json.dumps(self._read(), ensure_ascii=False)
+            if not await self.backend.set(self.KEY, raw, nx=True):
+                raw = await self.backend.get(self.KEY)
+        if raw == self._raw:
+            return
+
+        changed = self._raw is not None
+        data = copy.deepcopy(self.defaults)
+        data.update(json.loads(raw))
+        self._data, self._raw = data, raw
+        if changed:
+            self._notify()
+
+    def get(self) -> dict:
+        """Joriy sozlamalar (nusxa)"""
+        if self.backend is not None:
+            return copy.deepcopy(self._data if self._data is not None else self.defaults)
+
+        stamp = self._file_stamp()
+        if self._data is None or stamp != self._stamp:
+            self._data = self._read()
+            self._stamp = stamp
+        return copy.deepcopy(self._data)
+
+    def _write(self, data: dict):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".settings-", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    async def _update_shared(self, mutate: Callable[[dict], None]) -> dict:
+        """Umumiy omborda o'qish-o'zgartirish-yozish (optimistik: compare-and-set, to'qnashuvda qayta)"""
+        for _ in range(self.MAX_CAS_ATTEMPTS):
+            await self.refresh()
+            data = self.get()
+            mutate(data)
+            raw = json.dumps(data, ensure_ascii=False)
+            if await self.backend.compare_and_set(self.KEY, self._raw, raw):
+                self._raw = raw
+                return data
+        raise RuntimeError(f"{self.MAX_CAS_ATTEMPTS} ta urinishda boshqa nusxalar bilan to'qnashuv")
+
+    async def update(self, mutate: Callable[[dict], None]) -> dict:
+        """
+        Sozlamalarni o'zgartirish va saqlash. Yangi sozlamalarni qaytaradi.
+        Saqlanmasa (yozish xatosi, to'qnashuvlar) - xato chaqiruvchiga o'tadi, xotiradagi sozlamalar o'zgarmaydi.
+        """
+        async with self._lock:
+            if self.backend is not None:
+                data = await self._update_shared(mutate)
+            else:
+                data = self.get()
+                mutate(data)
+                await asyncio.to_thread(self._write, data)
+                self._stamp = self._file_stamp()
+
+            self._data = data
+
+        self._notify()
+
+        return copy.deepcopy(data)
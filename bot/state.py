@@ -0,0 +1,210 @@
+"""
+State Backend - Bir nechta bot nusxasi (replica) uchun umumiy holat ombori
+
+REDIS_URL bo'sh bo'lsa - umumiy ombor yo'q, hamma narsa jarayon ichida (oldingidek).
+REDIS_URL=redis://... - Redis; REDIS_URL=memory:// - jarayon ichidagi stand-in
+(Redis semantikasi bilan, sinov va bitta jarayonda bir nechta "replica" uchun).
+"""
+
+import logging
+import os
+import socket
+import time
+import uuid
+from abc import ABC, abstractmethod
+
+from aiogram.fsm.storage.base import BaseStorage
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from config import REDIS_URL, STATE_PREFIX
+
+logger = logging.getLogger(__name__)
+
+# Kalit qiymati `owner` ga teng bo'lsagina muddatini uzaytirish / o'chirish
+_EXTEND_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+# Kalit qiymati ARGV[2] ga teng (ARGV[2] berilmasa - kalit yo'q) bo'lsagina ARGV[1] ni yozish
+_CAS_SCRIPT = """
+local current = redis.call('get', KEYS[1])
+if (#ARGV == 1 and not current) or (#ARGV == 2 and current == ARGV[2]) then
+    redis.call('set', KEYS[1], ARGV[1])
+    return 1
+end
+return 0
+"""
+
+
+class StateBackend(ABC):
+    """Bot uchun kerakli Redis buyruqlari to'plami (kalitlar prefiks bilan)"""
+
+    def __init__(self, prefix: str = ""):
+        self.prefix = prefix
+
+    @abstractmethod
+    async def get(self, key: str) -> str | None:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: str, ttl: float | None = None, nx: bool = False) -> bool:
+        """SET (ttl - soniya, nx - faqat kalit yo'q bo'lsa). Yozildi - True"""
+
+    @abstractmethod
+    async def compare_and_set(self, key: str, expected: str | None, value: str) -> bool:
+        """Kalit qiymati hali `expected` bo'lsa (None - kalit yo'q) - `value` ni yozish. Yozildi - True"""
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> int:
+        ...
+
+    @abstractmethod
+    async def extend(self, key: str, owner: str, ttl: float) -> bool:
+        """Kalit `owner` ga tegishli bo'lsa - muddatini uzaytirish"""
+
+    @abstractmethod
+    async def release(self, key: str, owner: str) -> bool:
+        """Kalit `owner` ga tegishli bo'lsa - o'chirish"""
+
+    async def close(self):
+        pass
+
+
+class MemoryBackend(StateBackend):
+    """Jarayon ichidagi stand-in: Redis bilan bir xil semantika (TTL, NX)"""
+
+    def __init__(self, prefix: str = ""):
+        super().__init__(prefix)
+        self._items: dict[str, tuple[str, float | None]] = {}
+
+    def _get(self, key: str) -> str | None:
+        item = self._items.get(self.prefix + key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._items[self.prefix + key]
+            return None
+        return value
+
+    async def get(self, key: str) -> str | None:
+        return self._get(key)
+
+    async def set(self, key: str, value: str, ttl: float | None = None, nx: bool = False) -> bool:
+        if nx and self._get(key) is not None:
+            return False
+        self._items[self.prefix + key] = (value, time.monotonic() + ttl if ttl else None)
+        return True
+
+    async def compare_and_set(self, key: str, expected: str | None, value: str) -> bool:
+        if self._get(key) != expected:
+            return False
+        self._items[self.prefix + key] = (value, None)
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        return sum(self._items.pop(self.prefix + key, None) is not None for key in keys)
+
+    async def extend(self, key: str, owner: str, ttl: float) -> bool:
+        if self._get(key) != owner:
+            return False
+        self._items[self.prefix + key] = (owner, time.monotonic() + ttl)
+        return True
+
+    async def release(self, key: str, owner: str) -> bool:
+        if self._get(key) != owner:
+            return False
+        return await self.delete(key) == 1
+
+
+class RedisBackend(StateBackend):
+    """Redis (redis.asyncio). Ulanish birinchi buyruqda ochiladi."""
+
+    def __init__(self, url: str, prefix: str = ""):
+        super().__init__(prefix)
+        from redis.asyncio import Redis
+
+        self._redis = Redis.from_url(url, decode_responses=True)
+
+    async def get(self, key: str) -> str | None:
+        return await self._redis.get(self.prefix + key)
+
+    async def set(self, key: str, value: str, ttl: float | None = None, nx: bool = False) -> bool:
+        px = int(ttl * 1000) if ttl else None
+        return bool(await self._redis.set(self.prefix + key, value, px=px, nx=nx))
+
+    async def compare_and_set(self, key: str, expected: str | None, value: str) -> bool:
+        args = (value,) if expected is None else (value, expected)
+        return bool(await self._redis.eval(_CAS_SCRIPT, 1, self.prefix + key, *args))
+
+    async def delete(self, *keys: str) -> int:
+        return await self._redis.delete(*[self.prefix + key for key in keys])
+
+    async def extend(self, key: str, owner: str, ttl: float) -> bool:
+        return bool(await self._redis.eval(_EXTEND_SCRIPT, 1, self.prefix + key, owner, int(ttl * 1000)))
+
+    async def release(self, key: str, owner: str) -> bool:
+        return bool(await self._redis.eval(_RELEASE_SCRIPT, 1, self.prefix + key, owner))
+
+    async def close(self):
+        await self._redis.aclose()
+
+
+def create_backend(url: str = REDIS_URL, prefix: str = STATE_PREFIX) -> StateBackend | None:
+    """REDIS_URL bo'yicha ombor (bo'sh bo'lsa - None)"""
+    if not url:
+        return None
+    if url.startswith("memory://"):
+        return MemoryBackend(f"{prefix}:")
+    return RedisBackend(url, f"{prefix}:")
+
+
+def create_fsm_storage(url: str = REDIS_URL, prefix: str = STATE_PREFIX) -> BaseStorage:
+    """FSM holatlari uchun ombor: Redis yoki (oldingidek) xotira"""
+    if url and not url.startswith("memory://"):
+        from aiogram.fsm.storage.redis import DefaultKeyBuilder, RedisStorage
+
+        return RedisStorage.from_url(url, key_builder=DefaultKeyBuilder(prefix=f"{prefix}:fsm"))
+    return MemoryStorage()
+
+
+class LeaderLease:
+    """
+    Muddatli qulf orqali lider tanlash: kalitni egallagan nusxa - lider.
+    Lider acquire() ni ttl dan tez-tez chaqirib turishi kerak, aks holda
+    kalit muddati tugaydi va boshqa nusxa lider bo'ladi.
+    """
+
+    def __init__(self, backend: StateBackend, key: str, ttl: float):
+        self.backend = backend
+        self.key = key
+        self.ttl = ttl
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.is_leader = False
+
+    async def acquire(self) -> bool:
+        """Liderlikni olish yoki uzaytirish. Hozir lider bo'lsa - True"""
+        if self.is_leader:
+            self.is_leader = await self.backend.extend(self.key, self.owner, self.ttl)
+        if not self.is_leader:
+            self.is_leader = await self.backend.set(self.key, self.owner, ttl=self.ttl, nx=True)
+        return self.is_leader
+
+    async def release(self):
+        if self.is_leader:
+            self.is_leader = False
+            try:
+                await self.backend.release(self.key, self.owner)
+            except Exception as e:
+                logger.error(f"Liderlikni bo'shatishda xato: {e}")
+
+
+state_backend = create_backend()
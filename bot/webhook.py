@@ -0,0 +1,48 @@
+"""
+Webhook - aiohttp ilova: Telegram webhook handler, health va Prometheus metrics endpointlari
+"""
+
+import time
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+from core.metrics import metrics
+
+_started_at = time.time()
+
+
+async def _health(request: web.Request) -> web.Response:
+    return web.json_response({
+        "status": "ok",
+        "mode": request.app["mode"],
+        "uptime": round(time.time() - _started_at)
+    })
+
+
+async def _metrics(request: web.Request) -> web.Response:
+    return web.Response(text=metrics.render(), content_type="text/plain", charset="utf-8")
+
+
+def create_metrics_app(mode: str = "polling") -> web.Application:
+    """Faqat /health va /metrics (polling rejimida alohida port uchun)"""
+    app = web.Application()
+    app["mode"] = mode
+    app.router.add_get("/health", _health)
+    app.router.add_get("/metrics", _metrics)
+    return app
+
+
+def create_webhook_app(dp: Dispatcher, bot: Bot, path: str, secret_token: str | None = None) -> web.Application:
+    """
+    Webhook uchun aiohttp ilova.
+    secret_token berilsa, X-Telegram-Bot-Api-Secret-Token sarlavhasi tekshiriladi.
+    Dispatcher startup/shutdown hooklari ilova bilan birga ishga tushadi.
+    """
+    app = create_metrics_app("webhook")
+
+    SimpleRequestHandler(dispatcher=dp, bot=bot, secret_token=secret_token).register(app, path=path)
+    setup_application(app, dp, bot=bot)
+
+    return app
@@ -12,7 +12,103 @@ CHANNEL_USERNAME = os.getenv("CHANNEL_USERNAME", "")
 # Limitlar
 MAX_SEARCH_RESULTS = 5
 MAX_POST_LENGTH = 4000
-DAILY_LIMIT = 20
+DAILY_LIMIT = 20  # oddiy foydalanuvchi uchun sutkada (admin - cheklovsiz)
+MAX_CONCURRENT_RESEARCH = int(os.getenv("MAX_CONCURRENT_RESEARCH", "3"))
 
 # Avtomatik posting (True/False)
-AUTO_POST_ENABLED = os.getenv("AUTO_POST_ENABLED", "True").lower() == "true"
\ No newline at end of file
+AUTO_POST_ENABLED = os.getenv("AUTO_POST_ENABLED", "True").lower() == "true"
+
+# Modellar: amallar (search, full, quick, compare, trending, edit, keyword) darajalarga bog'lanadi
+MODEL_LARGE = os.getenv("MODEL_LARGE", "gpt-4o")
+MODEL_SMALL = os.getenv("MODEL_SMALL", "gpt-4o-mini")
+MODEL_ROUTES = os.getenv("MODEL_ROUTES", "")  # masalan: quick=small:large,edit=small (amal=asosiy:zaxira)
+# Asosiy model shu vaqtda javob bermasa - zaxira model (0 - faqat rate limit'da)
+MODEL_PRIMARY_TIMEOUT = float(os.getenv("MODEL_PRIMARY_TIMEOUT", "35"))  # soniya
+
+# OpenAI so'rovlari: vaqtinchalik xatolarda qayta urinish, circuit breaker, hedging
+OPENAI_RETRIES = int(os.getenv("OPENAI_RETRIES", "2"))
+OPENAI_RETRY_BASE_DELAY = float(os.getenv("OPENAI_RETRY_BASE_DELAY", "0.5"))  # soniya
+OPENAI_RETRY_MAX_DELAY = float(os.getenv("OPENAI_RETRY_MAX_DELAY", "8"))
+# Bitta urinish uchun vaqt chegarasi (0 - faqat bosqich chegarasi); oshsa - qayta urinish (breaker xatosi emas)
+OPENAI_ATTEMPT_TIMEOUT = float(os.getenv("OPENAI_ATTEMPT_TIMEOUT", "20"))  # soniya
+# Web search odatda 10-20 soniya, sekin so'rovlar undan ham uzoq - alohida chegara
+OPENAI_SEARCH_ATTEMPT_TIMEOUT = float(os.getenv("OPENAI_SEARCH_ATTEMPT_TIMEOUT", "45"))  # soniya
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "5"))  # ketma-ket xatolar
+BREAKER_RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", "30"))  # soniya
+# p95 dan sekin javobda ikkinchi so'rov yuboriladigan amallar (bo'sh - o'chiq), masalan: quick,keyword,edit
+HEDGE_OPERATIONS = os.getenv("HEDGE_OPERATIONS", "")
+
+# OpenAI token/narx statistikasi va post turlari uchun moslashuvchan max_tokens
+USAGE_FILE = os.getenv("USAGE_FILE", "usage.json")  # bo'sh - faylga yozilmaydi
+ADAPTIVE_MAX_TOKENS = os.getenv("ADAPTIVE_MAX_TOKENS", "True").lower() == "true"
+
+# OpenAI HTTP klienti (bitta pool barcha so'rovlar uchun)
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+OPENAI_MAX_KEEPALIVE = int(os.getenv("OPENAI_MAX_KEEPALIVE", "10"))
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "60"))  # soniya
+OPENAI_HTTP2 = os.getenv("OPENAI_HTTP2", "True").lower() == "true"  # h2 paketi kerak
+
+# Tadqiqot keshi
+RESEARCH_CACHE_TTL = int(os.getenv("RESEARCH_CACHE_TTL", "1800"))  # soniya
+RESEARCH_CACHE_SIZE = int(os.getenv("RESEARCH_CACHE_SIZE", "128"))
+
+# Tadqiqot va postlar arxivi (SQLite FTS5, /archive)
+ARCHIVE_DB = os.getenv("ARCHIVE_DB", "archive.db")  # bo'sh - arxiv o'chiq
+# full_research shu vaqtdan yangi (kanalga chiqmagan) arxiv tadqiqotini qayta ishlatadi (0 - o'chiq)
+ARCHIVE_REUSE_MAX_AGE = float(os.getenv("ARCHIVE_REUSE_HOURS", "6")) * 3600  # soniya
+
+# Takroriy mavzu/postlarni aniqlash (embeddinglar, numpy kerak)
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "True").lower() == "true"
+DEDUP_FILE = os.getenv("DEDUP_FILE", "dedup.npz")  # bo'sh - faqat xotirada
+DEDUP_MAX_ITEMS = int(os.getenv("DEDUP_MAX_ITEMS", "5000"))
+DEDUP_WINDOW = float(os.getenv("DEDUP_WINDOW_DAYS", "7")) * 86400  # shu vaqt ichidagi postlar bilan solishtiriladi
+DEDUP_TOPIC_THRESHOLD = float(os.getenv("DEDUP_TOPIC_THRESHOLD", "0.85"))  # cosine
+DEDUP_POST_THRESHOLD = float(os.getenv("DEDUP_POST_THRESHOLD", "0.92"))
+DEDUP_TIMEOUT = float(os.getenv("DEDUP_TIMEOUT", "5"))  # embedding so'rovi, soniya
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "256"))
+
+# Rasm tekshirish uchun HTTP sessiya
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "20"))
+IMAGE_PROBE_TIMEOUT = float(os.getenv("IMAGE_PROBE_TIMEOUT", "5"))  # soniya
+IMAGE_BASE_URL = os.getenv("IMAGE_BASE_URL", "https://picsum.photos").rstrip("/")
+
+# Bosqichlar uchun vaqt chegaralari (soniya)
+SEARCH_TIMEOUT = float(os.getenv("SEARCH_TIMEOUT", "60"))
+POST_TIMEOUT = float(os.getenv("POST_TIMEOUT", "60"))
+IMAGE_TIMEOUT = float(os.getenv("IMAGE_TIMEOUT", "10"))
+IMAGE_GRACE = float(os.getenv("IMAGE_GRACE", "1"))  # post tayyor bo'lgach rasmni kutish
+
+# Avtomatik posting: postni necha daqiqa oldin tayyorlash va
+# bot o'chiq paytida o'tib ketgan slotni qancha vaqtgacha chiqarish
+AUTO_POST_PREFETCH_MINUTES = float(os.getenv("AUTO_POST_PREFETCH_MINUTES", "10"))
+AUTO_POST_CATCHUP_MINUTES = float(os.getenv("AUTO_POST_CATCHUP_MINUTES", "120"))
+# Shu oraliqdagi keyingi slotlar bitta web search bilan birga tayyorlanadi (0 - o'chiq)
+AUTO_POST_BATCH_WINDOW_MINUTES = float(os.getenv("AUTO_POST_BATCH_WINDOW_MINUTES", "0"))
+
+# Qoralamalar (kanalga yuborilmagan postlar)
+DRAFT_TTL = float(os.getenv("DRAFT_TTL_HOURS", "24")) * 3600  # soniya
+DRAFT_MAX_COUNT = int(os.getenv("DRAFT_MAX_COUNT", "500"))
+DRAFTS_DB = os.getenv("DRAFTS_DB", "")  # masalan: drafts.db (bo'sh - faqat xotirada)
+
+# Telegram'ga yuborish cheklovlari
+TG_GLOBAL_RATE = float(os.getenv("TG_GLOBAL_RATE", "25"))  # xabar/soniya (barcha chatlar)
+TG_CHAT_RATE = float(os.getenv("TG_CHAT_RATE", str(20 / 60)))  # xabar/soniya (bitta guruh/kanal)
+TG_CHAT_BURST = float(os.getenv("TG_CHAT_BURST", "3"))
+TG_PRIVATE_RATE = float(os.getenv("TG_PRIVATE_RATE", "1"))  # xabar/soniya (bitta shaxsiy chat)
+TG_PRIVATE_BURST = float(os.getenv("TG_PRIVATE_BURST", "3"))
+TG_SEND_RETRIES = int(os.getenv("TG_SEND_RETRIES", "3"))
+
+# Webhook rejimi (WEBHOOK_URL bo'sh bo'lsa - long polling)
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "").rstrip("/")  # masalan: https://bot.example.com
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+WEBAPP_HOST = os.getenv("WEBAPP_HOST", "0.0.0.0")
+WEBAPP_PORT = int(os.getenv("WEBAPP_PORT", "8080"))
+# Polling rejimida /metrics va /health uchun port (0 - o'chiq; webhook rejimida WEBAPP_PORT da)
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+# Umumiy holat (bir nechta nusxa uchun): FSM, qoralamalar, sozlamalar, scheduler lideri
+REDIS_URL = os.getenv("REDIS_URL", "")  # masalan: redis://redis:6379/0 (bo'sh - jarayon ichida)
+STATE_PREFIX = os.getenv("STATE_PREFIX", "smartbot")
+LEADER_TTL = float(os.getenv("LEADER_TTL", "30"))  # soniya
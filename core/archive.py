@@ -0,0 +1,253 @@
+"""
+Archive - Tadqiqotlar va postlar arxivi (SQLite FTS5 bilan to'liq matnli qidiruv)
+"""
+
+import asyncio
+import logging
+import re
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from html import escape
+from typing import Any, Callable
+
+from .cache import normalize_topic
+
+logger = logging.getLogger(__name__)
+
+# snippet() belgilari - HTML escape'dan keyin <b> ga almashtiriladi
+_MARK_START, _MARK_END = "\x02", "\x03"
+# Post HTML teglari (snippet chegarasida kesilgan bo'lishi ham mumkin)
+_TAG_RE = re.compile(r"</?[a-zA-Z][^>]*>?")
+
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS archive (
+        id INTEGER PRIMARY KEY,
+        topic TEXT NOT NULL,
+        topic_key TEXT NOT NULL,
+        research TEXT NOT NULL DEFAULT '',
+        post TEXT NOT NULL DEFAULT '',
+        post_type TEXT NOT NULL DEFAULT 'full',
+        created_at REAL NOT NULL,
+        updated_at REAL NOT NULL,
+        published_at REAL,
+        channel TEXT,
+        message_id INTEGER
+    )""",
+    "CREATE INDEX IF NOT EXISTS archive_topic_key ON archive (topic_key, created_at)",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS archive_fts USING fts5(
+        topic, research, post, content='archive', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    # FTS indeksi asosiy jadval bilan triggerlar orqali sinxron
+    """CREATE TRIGGER IF NOT EXISTS archive_ai AFTER INSERT ON archive BEGIN
+        INSERT INTO archive_fts (rowid, topic, research, post) VALUES (new.id, new.topic, new.research, new.post);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS archive_ad AFTER DELETE ON archive BEGIN
+        INSERT INTO archive_fts (archive_fts, rowid, topic, research, post)
+        VALUES ('delete', old.id, old.topic, old.research, old.post);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS archive_au AFTER UPDATE OF topic, research, post ON archive BEGIN
+        INSERT INTO archive_fts (archive_fts, rowid, topic, research, post)
+        VALUES ('delete', old.id, old.topic, old.research, old.post);
+        INSERT INTO archive_fts (rowid, topic, research, post) VALUES (new.id, new.topic, new.research, new.post);
+    END"""
+)
+
+
+def fts_query(text: str) -> str:
+    """Foydalanuvchi so'rovi -> FTS5 ifodasi: har bir so'z qo'shtirnoqda (maxsus belgilar ishlamaydi)"""
+    words = [word.replace('"', '""') for word in text.split()]
+    return " ".join(f'"{word}"' for word in words if word.strip('"'))
+
+
+class Archive:
+    """
+    Har bir tadqiqot (mavzu, qidiruv natijasi, post, post turi, vaqtlar) va kanalga chiqqan
+    postlar (kanal, message_id) saqlanadi. search() - bm25 bo'yicha tartiblangan natijalar.
+    Baza birinchi murojaatda ochiladi (import paytida emas); path bo'sh bo'lsa - arxiv o'chiq.
+    Xatolar log qilinadi, chaqiruvchiga uzatilmaydi - arxiv asosiy jarayonni to'xtatmaydi.
+    Barcha SQLite chaqiruvlari bitta fon oqimida bajariladi: event loop bloklanmaydi,
+    ulanish o'zi yaratilgan oqimda qoladi va yozuvlar ketma-ket.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._db: sqlite3.Connection | None = None
+        self._executor: ThreadPoolExecutor | None = None
+
+    async def _run(self, func: Callable[..., Any], *args) -> Any:
+        if self._db is None and not self.path:
+            # Arxiv o'chiq (yoki ochilmadi) - oqimga o'tish shart emas
+            return func(*args)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="archive")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def _open(self) -> sqlite3.Connection | None:
+        if self._db is not None or not self.path:
+            return self._db
+        path, self.path = self.path, ""
+
+        try:
+            db = sqlite3.connect(path)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            for statement in _SCHEMA:
+                db.execute(statement)
+            db.commit()
+        except sqlite3.Error as e:
+            # Masalan, SQLite FTS5 siz yig'ilgan
+            logger.error(f"Arxivni ochishda xato: {e}")
+            return None
+
+        db.row_factory = sqlite3.Row
+        self._db = db
+        return db
+
+    def _close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    async def close(self):
+        await self._run(self._close)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    # ============ YOZISH ============
+
+    async def add(self, topic: str, research: str, post: str = "", post_type: str = "full") -> int | None:
+        """Yangi yozuv; id qaytaradi (arxiv o'chiq yoki xato bo'lsa - None)"""
+        return await self._run(self._add, topic, research, post, post_type)
+
+    def _add(self, topic: str, research: str, post: str = "", post_type: str = "full") -> int | None:
+        db = self._open()
+        if db is None:
+            return None
+        now = time.time()
+        try:
+            cursor = db.execute(
+                "INSERT INTO archive (topic, topic_key, research, post, post_type, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (topic, normalize_topic(topic), research, post, post_type, now, now)
+            )
+            db.commit()
+            return cursor.lastrowid
+        except sqlite3.Error as e:
+            logger.error(f"Arxivga yozishda xato: {e}")
+            return None
+
+    async def published(self, record_id: int | None, topic: str, post: str, channel: str, message_id: int | None):
+        """Kanalga chiqqan post: mavjud yozuv yangilanadi (post tahrirlangan bo'lishi mumkin) yoki yangisi"""
+        return await self._run(self._published, record_id, topic, post, channel, message_id)
+
+    def _published(self, record_id: int | None, topic: str, post: str, channel: str, message_id: int | None):
+        db = self._open()
+        if db is None:
+            return
+        now = time.time()
+        try:
+            updated = 0
+            if record_id is not None:
+                updated = db.execute(
+                    "UPDATE archive SET post = ?, updated_at = ?, published_at = ?, channel = ?, message_id = ? "
+                    "WHERE id = ?",
+                    (post, now, now, channel, message_id, record_id)
+                ).rowcount
+            if not updated:
+                db.execute(
+                    "INSERT INTO archive (topic, topic_key, post, created_at, updated_at, published_at, channel, "
+                    "message_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (topic, normalize_topic(topic), post, now, now, now, channel, message_id)
+                )
+            db.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Arxivni yangilashda xato: {e}")
+
+    # ============ O'QISH ============
+
+    async def fresh_research(self, topic: str, max_age: float, published_window: float = 0) -> str | None:
+        """
+        Shu mavzu bo'yicha max_age soniyadan yangi, hali kanalga chiqmagan tadqiqot.
+        Mavzu published_window soniya ichida kanalga chiqqan bo'lsa (boshqa yozuv orqali ham) - None:
+        eski tadqiqot emas, yangi jihatlar kerak.
+        """
+        return await self._run(self._fresh_research, topic, max_age, published_window)
+
+    def _fresh_research(self, topic: str, max_age: float, published_window: float = 0) -> str | None:
+        db = self._open()
+        if db is None or max_age <= 0:
+            return None
+        now = time.time()
+        try:
+            row = db.execute(
+                "SELECT research FROM archive WHERE topic_key = ? AND created_at >= ? AND research != '' "
+                "AND published_at IS NULL AND NOT EXISTS (SELECT 1 FROM archive p WHERE p.topic_key = "
+                "archive.topic_key AND p.published_at >= ?) ORDER BY created_at DESC LIMIT 1",
+                (normalize_topic(topic), now - max_age, now - published_window)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Arxivdan o'qishda xato: {e}")
+            return None
+        return row["research"] if row else None
+
+    async def last_published(self, topic: str) -> float | None:
+        """Shu mavzu (normallashtirilgan kalit bo'yicha) oxirgi marta kanalga chiqqan vaqt"""
+        return await self._run(self._last_published, topic)
+
+    def _last_published(self, topic: str) -> float | None:
+        db = self._open()
+        if db is None:
+            return None
+        try:
+            row = db.execute(
+                "SELECT MAX(published_at) FROM archive WHERE topic_key = ?", (normalize_topic(topic),)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Arxivdan o'qishda xato: {e}")
+            return None
+        return row[0] if row else None
+
+    async def search(self, text: str, limit: int = 10) -> list[dict]:
+        """
+        To'liq matnli qidiruv (bm25: mavzudagi moslik postdagidan, postdagi - tadqiqotdagidan muhimroq).
+        snippet - HTML escape qilingan, mos so'zlar <b> ichida.
+        """
+        return await self._run(self._search, text, limit)
+
+    def _search(self, text: str, limit: int = 10) -> list[dict]:
+        db = self._open()
+        query = fts_query(text)
+        if db is None or not query:
+            return []
+        try:
+            rows = db.execute(
+                "SELECT a.id, a.topic, a.post_type, a.created_at, a.published_at, a.channel, a.message_id, "
+                f"snippet(archive_fts, -1, '{_MARK_START}', '{_MARK_END}', '…', 16) AS snippet "
+                "FROM archive_fts JOIN archive a ON a.id = archive_fts.rowid "
+                "WHERE archive_fts MATCH ? ORDER BY bm25(archive_fts, 10.0, 1.0, 3.0) LIMIT ?",
+                (query, limit)
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Arxivda qidirishda xato: {e}")
+            return []
+
+        results = []
+        for row in rows:
+            result = dict(row)
+            result["snippet"] = (
+                escape(" ".join(_TAG_RE.sub("", result["snippet"]).split()))
+                .replace(_MARK_START, "<b>").replace(_MARK_END, "</b>")
+            )
+            results.append(result)
+        return results
+
+    async def count(self) -> int:
+        return await self._run(self._count)
+
+    def _count(self) -> int:
+        db = self._open()
+        if db is None:
+            return 0
+        return db.execute("SELECT COUNT(*) FROM archive").fetchone()[0]
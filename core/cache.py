@@ -0,0 +1,83 @@
+"""
+Research Cache - Tadqiqot natijalari uchun TTL + LRU kesh
+"""
+
+import re
+import time
+from collections import OrderedDict
+
+_PUNCT_RE = re.compile(r"[^\w\s]+", re.UNICODE)
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_topic(topic: str) -> str:
+    """Mavzuni kalitga aylantirish (katta-kichik harf, bo'sh joy, tinish belgilari)"""
+    if not topic:
+        return ""
+    text = _PUNCT_RE.sub(" ", topic.casefold())
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+class ResearchCache:
+    """Cheklangan hajmli, muddatli (TTL) va LRU bo'yicha tozalanadigan kesh"""
+
+    def __init__(self, ttl: float = 1800, max_size: int = 128):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+
+    def get(self, topic: str) -> dict | None:
+        """Keshdan olish (muddati o'tgan bo'lsa None)"""
+        key = normalize_topic(topic)
+        entry = self._data.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return dict(value)
+
+    def set(self, topic: str, value: dict):
+        """Keshga yozish"""
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+
+        key = normalize_topic(topic)
+        self._data[key] = (time.monotonic() + self.ttl, dict(value))
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def invalidate(self, topic: str):
+        """Bitta mavzuni o'chirish"""
+        self._data.pop(normalize_topic(topic), None)
+
+    def clear(self):
+        """Keshni tozalash"""
+        self._data.clear()
+
+    def stats(self) -> dict:
+        """Statistika"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,167 @@
+"""
+Dedup Index - Embeddinglar bo'yicha deyarli bir xil mavzu va postlarni topish
+"""
+
+import asyncio
+import logging
+import os
+import tempfile
+import time
+
+logger = logging.getLogger(__name__)
+
+# Yozuv turlari
+TOPIC = "topic"          # tadqiqot qilingan mavzu
+PUBLISHED = "published"  # kanalga chiqqan post mavzusi
+POST = "post"            # kanalga chiqqan post matni
+
+
+class DedupIndex:
+    """
+    Normallashtirilgan embeddinglar matritsasi (xotirada float32, diskda float16) va
+    har bir qator uchun tur, qisqa matn (ko'rsatish uchun), kalit (to'liq, masalan kesh kaliti) va vaqt. Qidiruv - bitta matritsa ko'paytmasi
+    (cosine), bir necha ming yozuvda millisekundlar.
+    Eng eski yozuvlar max_items dan oshganda o'chiriladi. NumPy birinchi murojaatda
+    yuklanadi; o'rnatilmagan bo'lsa indeks o'chiq (enabled=False).
+    """
+
+    def __init__(self, path: str, max_items: int = 5000, save_delay: float = 5):
+        self.path = path
+        self.max_items = max_items
+        self.save_delay = save_delay
+        self.enabled = True
+        self._np = None
+        self._vectors = None
+        self._kinds: list[str] = []
+        self._texts: list[str] = []
+        self._keys: list[str] = []
+        self._times: list[float] = []
+        self._save_task: asyncio.Task | None = None
+        self._loaded = False
+
+    def __len__(self) -> int:
+        self._load()
+        return len(self._kinds)
+
+    def available(self) -> bool:
+        """NumPy bor va indeks ishlatilishi mumkin"""
+        return self._load()
+
+    # ============ FAYL ============
+
+    def _load(self) -> bool:
+        """NumPy va fayldan o'qish - birinchi murojaatda (import paytida emas)"""
+        if self._loaded:
+            return self.enabled
+        self._loaded = True
+        try:
+            import numpy
+        except ImportError:
+            logger.warning("numpy o'rnatilmagan - takroriy postlarni aniqlash o'chiq")
+            self.enabled = False
+            return False
+        self._np = numpy
+
+        if not self.path:
+            return True
+        try:
+            with numpy.load(self.path, allow_pickle=False) as data:
+                self._vectors = data["vectors"].astype(numpy.float32)
+                self._kinds = data["kinds"].tolist()
+                self._texts = data["texts"].tolist()
+                self._keys = data["keys"].tolist() if "keys" in data.files else list(self._texts)
+                self._times = data["times"].tolist()
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Dedup indeksini yuklashda xato: {e}")
+        return True
+
+    def _write(self, vectors, kinds: list[str], texts: list[str], keys: list[str], times: list[float]):
+        np = self._np
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".dedup-", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, vectors=vectors.astype(np.float16), kinds=np.array(kinds),
+                         texts=np.array(texts), keys=np.array(keys), times=np.array(times, dtype=np.float64))
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    async def flush(self):
+        """Indeksni hozir faylga yozish"""
+        if not self.path or not self._loaded or self._vectors is None:
+            return
+        try:
+            await asyncio.to_thread(
+                self._write, self._vectors.copy(), list(self._kinds), list(self._texts), list(self._keys),
+                list(self._times)
+            )
+        except Exception as e:
+            logger.error(f"Dedup indeksini saqlashda xato: {e}")
+
+    async def _save_later(self):
+        await asyncio.sleep(self.save_delay)
+        self._save_task = None
+        await self.flush()
+
+    # ============ INDEKS ============
+
+    def vector(self, values):
+        """Embedding -> normallashtirilgan float32 vektor (indeks o'chiq bo'lsa - None)"""
+        if not self._load():
+            return None
+        np = self._np
+        vector = np.asarray(values, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def add(self, kind: str, text: str, vector, key: str | None = None):
+        """Yozuv qo'shish: text 200 belgigacha qisqartiriladi, key (berilmasa - text) to'liq saqlanadi"""
+        if not self._load():
+            return
+        np = self._np
+        row = vector[np.newaxis, :]
+        if self._vectors is None or self._vectors.shape[1] != row.shape[1]:
+            # Birinchi yozuv yoki embedding o'lchami o'zgargan - eski yozuvlar bilan solishtirib bo'lmaydi
+            self._vectors = row
+            self._kinds, self._texts, self._keys, self._times = [], [], [], []
+        else:
+            self._vectors = np.vstack((self._vectors, row))
+        self._kinds.append(kind)
+        self._texts.append(text[:200])
+        self._keys.append(text if key is None else key)
+        self._times.append(time.time())
+
+        excess = len(self._kinds) - self.max_items
+        if excess > 0:
+            self._vectors = self._vectors[excess:]
+            del self._kinds[:excess], self._texts[:excess], self._keys[:excess], self._times[:excess]
+
+        if self.path and self._save_task is None:
+            try:
+                self._save_task = asyncio.get_running_loop().create_task(self._save_later())
+            except RuntimeError:
+                pass
+
+    def nearest(self, vector, kind: str, max_age: float | None = None) -> tuple[float, str, str] | None:
+        """Shu turdagi (max_age soniyadan yangi) eng o'xshash yozuv: (cosine, matn, kalit)"""
+        if not self._load() or self._vectors is None or self._vectors.shape[1] != vector.shape[0]:
+            return None
+        np = self._np
+        mask = np.array(self._kinds) == kind
+        if max_age is not None:
+            mask &= np.array(self._times) >= time.time() - max_age
+        candidates = np.flatnonzero(mask)
+        if not len(candidates):
+            return None
+
+        scores = self._vectors[candidates] @ vector
+        best = int(np.argmax(scores))
+        index = candidates[best]
+        return float(scores[best]), self._texts[index], self._keys[index]
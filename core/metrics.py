@@ -0,0 +1,130 @@
+"""
+Metrics - Bosqichlar bo'yicha kechikish gistogrammalari, xato va bajarilayotganlar soni
+"""
+
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+
+# Gistogramma chegaralari (soniya): Telegram yuborish (~0.1s) dan web search (~60s) gacha
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+
+class StageStats:
+    """
+    Bitta bosqich: Prometheus uchun kumulyativ bo'lmagan bucket hisoblagichlari
+    va /perf persentillari uchun oxirgi `window` ta o'lchov.
+    """
+
+    __slots__ = ("buckets", "counts", "sum", "count", "errors", "inflight", "recent")
+
+    def __init__(self, buckets: tuple[float, ...], window: int):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+        self.errors = 0
+        self.inflight = 0
+        self.recent: deque[float] = deque(maxlen=window)
+
+    def observe(self, seconds: float):
+        self.sum += seconds
+        self.count += 1
+        i = bisect_left(self.buckets, seconds)
+        if i < len(self.counts):
+            self.counts[i] += 1
+        self.recent.append(seconds)
+
+    def percentiles(self, *qs: float) -> list[float | None]:
+        """Oxirgi o'lchovlar bo'yicha persentillar (0 < q < 1)"""
+        if not self.recent:
+            return [None] * len(qs)
+        values = sorted(self.recent)
+        return [values[min(len(values) - 1, int(q * len(values)))] for q in qs]
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metrics:
+    """Bosqichlar reyestri: track() bilan o'lchanadi, render() - Prometheus matn formati"""
+
+    def __init__(self, namespace: str = "smartbot", buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+                 window: int = 1000):
+        self.namespace = namespace
+        self.buckets = buckets
+        self.window = window
+        self._stages: dict[str, StageStats] = {}
+
+    def stage(self, name: str) -> StageStats:
+        stats = self._stages.get(name)
+        if stats is None:
+            stats = self._stages[name] = StageStats(self.buckets, self.window)
+        return stats
+
+    @contextmanager
+    def track(self, name: str):
+        """Blok davomiyligini o'lchash; Exception chiqsa - xato sifatida hisoblanadi"""
+        stats = self.stage(name)
+        stats.inflight += 1
+        start = time.perf_counter()
+        try:
+            yield stats
+        except Exception:
+            stats.errors += 1
+            raise
+        finally:
+            stats.inflight -= 1
+            stats.observe(time.perf_counter() - start)
+
+    def summary(self) -> dict[str, dict]:
+        """/perf uchun: bosqich -> count, errors, inflight, p50, p95, p99 (soniya)"""
+        result = {}
+        for name, stats in sorted(self._stages.items()):
+            p50, p95, p99 = stats.percentiles(0.5, 0.95, 0.99)
+            result[name] = {
+                "count": stats.count,
+                "errors": stats.errors,
+                "inflight": stats.inflight,
+                "p50": p50,
+                "p95": p95,
+                "p99": p99
+            }
+        return result
+
+    def render(self) -> str:
+        """Prometheus text exposition format (0.0.4)"""
+        ns = self.namespace
+        stages = sorted(self._stages.items())
+        lines = [
+            f"# HELP {ns}_stage_duration_seconds Bosqich davomiyligi",
+            f"# TYPE {ns}_stage_duration_seconds histogram"
+        ]
+        for name, stats in stages:
+            label = f'stage="{_label(name)}"'
+            cumulative = 0
+            for le, count in zip(stats.buckets, stats.counts):
+                cumulative += count
+                lines.append(f'{ns}_stage_duration_seconds_bucket{{{label},le="{le}"}} {cumulative}')
+            lines.append(f'{ns}_stage_duration_seconds_bucket{{{label},le="+Inf"}} {stats.count}')
+            lines.append(f"{ns}_stage_duration_seconds_sum{{{label}}} {stats.sum}")
+            lines.append(f"{ns}_stage_duration_seconds_count{{{label}}} {stats.count}")
+
+        lines += [
+            f"# HELP {ns}_stage_errors_total Bosqichdagi xatolar",
+            f"# TYPE {ns}_stage_errors_total counter"
+        ]
+        lines += [f'{ns}_stage_errors_total{{stage="{_label(name)}"}} {s.errors}' for name, s in stages]
+
+        lines += [
+            f"# HELP {ns}_stage_inflight Hozir bajarilayotganlar",
+            f"# TYPE {ns}_stage_inflight gauge"
+        ]
+        lines += [f'{ns}_stage_inflight{{stage="{_label(name)}"}} {s.inflight}' for name, s in stages]
+
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
@@ -0,0 +1,80 @@
+"""
+Pipeline - Bog'liqliklarni hisobga olgan holda bosqichlarni parallel bajarish
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class StageTimeout(Exception):
+    """Bosqich belgilangan vaqtda tugamadi"""
+
+
+class Stage:
+    """
+    Pipeline bosqichi.
+    func - bog'liq bosqichlar natijalarini (requires tartibida) argument sifatida oladi.
+    critical=False bo'lsa, xatolik yoki kechikish butun jarayonni to'xtatmaydi (natija None).
+    """
+
+    __slots__ = ("name", "func", "requires", "timeout", "critical")
+
+    def __init__(self, name: str, func: Callable[..., Awaitable[Any]], requires: tuple[str, ...] = (),
+                 timeout: float | None = None, critical: bool = True):
+        self.name = name
+        self.func = func
+        self.requires = requires
+        self.timeout = timeout
+        self.critical = critical
+
+
+async def run_pipeline(stages: list[Stage], grace: float = 0.0) -> dict[str, Any]:
+    """
+    Bosqichlarni bajarish. Mustaqil bosqichlar bir vaqtda ishlaydi.
+    Barcha muhim bosqichlar tugagach, qolganlarini ko'pi bilan `grace` soniya kutadi,
+    keyin bekor qiladi. Muhim bosqich xatosi chaqiruvchiga uzatiladi.
+    Bosqichlar bog'liqliklaridan keyin ro'yxatda kelishi kerak.
+    """
+    tasks: dict[str, asyncio.Future] = {}
+
+    async def _run(stage: Stage) -> Any:
+        args = [await tasks[name] for name in stage.requires]
+        try:
+            return await asyncio.wait_for(stage.func(*args), stage.timeout)
+        except asyncio.TimeoutError:
+            raise StageTimeout(f"'{stage.name}' bosqichi {stage.timeout} soniyada tugamadi") from None
+
+    for stage in stages:
+        tasks[stage.name] = asyncio.ensure_future(_run(stage))
+
+    critical = [tasks[s.name] for s in stages if s.critical]
+    optional = [tasks[s.name] for s in stages if not s.critical]
+
+    try:
+        await asyncio.gather(*critical)
+        pending = [t for t in optional if not t.done()]
+        if pending and grace > 0:
+            await asyncio.wait(pending, timeout=grace)
+    finally:
+        for task in tasks.values():
+            if not task.done():
+                task.cancel()
+        # Bekor qilinganlarni kutish va xatolarni "o'qilgan" deb belgilash
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+    results = {}
+    for stage in stages:
+        task = tasks[stage.name]
+        if task.cancelled():
+            logger.info(f"Bosqich kutilmadi: {stage.name}")
+            results[stage.name] = None
+        elif task.exception() is not None:
+            logger.warning(f"Bosqich xatosi ({stage.name}): {task.exception()}")
+            results[stage.name] = None
+        else:
+            results[stage.name] = task.result()
+
+    return results
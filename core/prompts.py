@@ -0,0 +1,193 @@
+"""
+Prompts - Tizim promptlari va OpenAI so'rovlarini yig'ish
+
+Provayder prompt keshi so'rov boshidagi bir xil qismni (1024+ token) qayta ishlatadi.
+Shuning uchun har bir so'rovda avval o'zgarmas qism (tools, ko'rsatmalar, tizim prompti),
+o'zgaruvchan ma'lumot (mavzu, tadqiqot matni, post) faqat oxirida keladi.
+prompt_cache_key bir xil amallarni bitta kesh bo'lagiga yo'naltiradi; kalit amal nomi va
+o'zgarmas qism (prompt versiyasi) xeshidan tuziladi - prompt o'zgarsa, kalit ham o'zgaradi.
+"""
+
+import hashlib
+from functools import lru_cache
+
+POST_SYSTEM_PROMPT = """Sen professional IT jurnalistsan va Telegram kanal yuritasan.
+
+VAZIFA: Berilgan ma'lumotlar asosida o'zbek tilida professional post yoz.
+
+POST FORMATI (Telegram HTML):
+<b>📱 SARLAVHA - KATTA HARFDA</b>
+
+Kirish - 1-2 jumla, mavzuni tanishtirish.
+
+🔹 <b>Muhim nuqta 1</b> - aniq fakt
+🔹 <b>Muhim nuqta 2</b> - aniq fakt  
+🔹 <b>Muhim nuqta 3</b> - aniq fakt
+
+<i>💡 Xulosa: Qisqa xulosa - 1-2 jumla</i>
+
+———
+📚 <b>Manbalar:</b>
+- Manba 1 nomi
+- Manba 2 nomi
+
+#hashtag1 #hashtag2 #hashtag3
+
+QOIDALAR:
+1. O'zbek tilida yoz
+2. Sodda va tushunarli til
+3. Faqat berilgan faktlarga asoslan
+4. 150-300 so'z oralig'ida
+5. Kod bo'lsa <code>kod</code> ichida yoz
+"""
+
+COMPARE_SYSTEM_PROMPT = """Sen texnologiya ekspertisan.
+
+FORMAT (Telegram HTML):
+<b>⚔️ TEXNOLOGIYA1 vs TEXNOLOGIYA2</b>
+
+Kirish - nima uchun solishtirmoqdamiz.
+
+<b>✅ Texnologiya1 afzalliklari:</b>
+- Afzallik 1
+- Afzallik 2
+
+<b>✅ Texnologiya2 afzalliklari:</b>
+- Afzallik 1
+- Afzallik 2
+
+<b>🎯 Qachon qaysi birini tanlash:</b>
+- <i>Holat 1</i> → Tanlash
+
+<i>💡 Xulosa: Qisqa tavsiya</i>
+
+#hashtag1 #hashtag2
+"""
+
+QUICK_SYSTEM_PROMPT = """Sen IT blogger san.
+
+FORMAT (Telegram HTML):
+<b>⚡ SARLAVHA</b>
+
+Asosiy ma'lumot - 2-3 jumla.
+
+🔗 <i>Batafsil: manba</i>
+
+#hashtag1 #hashtag2
+"""
+
+TRENDING_SYSTEM_PROMPT = """Sen IT yangiliklar tahlilchisisan.
+
+FORMAT (Telegram HTML):
+<b>🔥 BUGUNGI IT TRENDLAR</b>
+
+1️⃣ <b>Trend 1</b>
+   └ <i>Qisqa izoh</i>
+
+2️⃣ <b>Trend 2</b>
+   └ <i>Qisqa izoh</i>
+
+3️⃣ <b>Trend 3</b>
+   └ <i>Qisqa izoh</i>
+
+4️⃣ <b>Trend 4</b>
+   └ <i>Qisqa izoh</i>
+
+5️⃣ <b>Trend 5</b>
+   └ <i>Qisqa izoh</i>
+
+#trending #tech #news
+"""
+
+EDIT_SYSTEM_PROMPT = "Sen matn tahrirlovchisisan. Postni so'rov bo'yicha tahrirlash. HTML formatni to'g'ri saqlash - har bir ochilgan teg yopilishi kerak (<b></b>, <i></i>, <code></code>). Faqat tahrirlangan postni qaytar, boshqa hech narsa yozma."
+
+SEARCH_INSTRUCTIONS = """Berilgan mavzu bo'yicha internetdan eng so'nggi ma'lumotlarni top.
+
+FORMATDA BER:
+1. ASOSIY FAKTLAR (kamida 5 ta)
+2. MANBALAR
+3. SO'NGGI YANGILIKLAR (sana bilan)
+"""
+
+BATCH_SEARCH_INSTRUCTIONS = """Berilgan mavzularning HAR BIRI bo'yicha internetdan eng so'nggi ma'lumotlarni top.
+
+Har bir mavzu uchun alohida bo'lim yoz. Bo'limni aynan shu qator bilan boshla:
+=== MAVZU <raqam> ===
+
+Har bir bo'limda:
+1. ASOSIY FAKTLAR (kamida 5 ta)
+2. MANBALAR
+3. SO'NGGI YANGILIKLAR (sana bilan)
+"""
+
+KEYWORD_SYSTEM_PROMPT = "Rasm qidirish uchun 1-2 so'zlik inglizcha kalit so'z ber. Faqat so'zni yoz, boshqa hech narsa yozma."
+
+POST_PROMPTS = {
+    "compare": COMPARE_SYSTEM_PROMPT,
+    "quick": QUICK_SYSTEM_PROMPT,
+    "trending": TRENDING_SYSTEM_PROMPT,
+    "full": POST_SYSTEM_PROMPT
+}
+
+WEB_SEARCH_TOOLS = [{"type": "web_search_preview"}]
+
+
+# ============ SO'ROVLAR ============
+
+@lru_cache(maxsize=32)
+def _cache_key(operation: str, prefix: str) -> str:
+    """amal:prompt_versiyasi (o'zgarmas qismning qisqa xeshi)"""
+    return f"{operation}:{hashlib.sha256(prefix.encode()).hexdigest()[:12]}"
+
+
+def chat_request(operation: str, system: str, tail: str) -> dict:
+    """chat.completions uchun: o'zgarmas tizim prompti + o'zgaruvchan foydalanuvchi xabari"""
+    return {
+        "messages": [
+            {"role": "system", "content": system},
+            {"role": "user", "content": tail}
+        ],
+        "prompt_cache_key": _cache_key(operation, system)
+    }
+
+
+def search_request(query: str) -> dict:
+    """responses.create (web search): ko'rsatmalar instructions'da, mavzu - input'da"""
+    return {
+        "tools": WEB_SEARCH_TOOLS,
+        "instructions": SEARCH_INSTRUCTIONS,
+        "input": f"MAVZU: {query}",
+        "prompt_cache_key": _cache_key("search", SEARCH_INSTRUCTIONS)
+    }
+
+
+def batch_search_request(topics: list[str]) -> dict:
+    topic_list = "\n".join(f"{i}. {topic}" for i, topic in enumerate(topics, 1))
+    return {
+        "tools": WEB_SEARCH_TOOLS,
+        "instructions": BATCH_SEARCH_INSTRUCTIONS,
+        "input": topic_list,
+        "prompt_cache_key": _cache_key("batch_search", BATCH_SEARCH_INSTRUCTIONS)
+    }
+
+
+def post_request(research_data: dict, post_type: str) -> dict:
+    return chat_request(
+        post_type,
+        POST_PROMPTS.get(post_type, POST_SYSTEM_PROMPT),
+        f"MAVZU: {research_data['query']}\n\nMA'LUMOTLAR:\n{research_data['research']}"
+    )
+
+
+def edit_request(post: str, instruction: str) -> dict:
+    return chat_request("edit", EDIT_SYSTEM_PROMPT, f"POST:\n{post}\n\nSO'ROV: {instruction}")
+
+
+def keyword_request(topic: str) -> dict:
+    return chat_request("keyword", KEYWORD_SYSTEM_PROMPT, topic)
+
+
+def fresh_angle_query(topic: str, previous: str) -> str:
+    """Mavzu yaqinda kanalda yoritilgan - qidiruvni yangi jihatlarga yo'naltirish (faqat tail o'zgaradi)"""
+    return (f"{topic}\n\nBu mavzuda yaqinda post chiqqan: \"{previous}\". "
+            f"Undagi ma'lumotlarni takrorlama - faqat yangi jihatlar va so'nggi yangiliklarni top.")
@@ -2,134 +2,199 @@
 Smart Researcher - OpenAI bilan web search va post yaratish
 """
 
-from openai import AsyncOpenAI
-from config import OPENAI_API_KEY
+from config import (
+    OPENAI_API_KEY, RESEARCH_CACHE_TTL, RESEARCH_CACHE_SIZE, HTTP_POOL_SIZE, IMAGE_PROBE_TIMEOUT,
+    SEARCH_TIMEOUT, POST_TIMEOUT, IMAGE_TIMEOUT, IMAGE_GRACE, IMAGE_BASE_URL,
+    OPENAI_MAX_CONNECTIONS, OPENAI_MAX_KEEPALIVE, OPENAI_KEEPALIVE_EXPIRY, OPENAI_HTTP2,
+    DEDUP_ENABLED, DEDUP_FILE, DEDUP_MAX_ITEMS, DEDUP_WINDOW, DEDUP_TOPIC_THRESHOLD, DEDUP_POST_THRESHOLD,
+    DEDUP_TIMEOUT, EMBEDDING_DIMENSIONS, ARCHIVE_DB, ARCHIVE_REUSE_MAX_AGE
+)
+from .cache import ResearchCache, normalize_topic
+from .singleflight import SingleFlight
+from .pipeline import Stage, StageTimeout, run_pipeline
+from .metrics import metrics
+from .usage import usage
+from .routing import router
+from .resilience import DeadlineExceeded, resilience
+from .prompts import (
+    search_request, batch_search_request, post_request, edit_request, keyword_request, fresh_angle_query
+)
+from .dedup import DedupIndex, TOPIC, PUBLISHED, POST
+from .archive import Archive
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable
 import aiohttp
+import asyncio
+import logging
 import random
+import re
+import time
 
-client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
 
-# ============ PROMPTLAR ============
+logger = logging.getLogger(__name__)
 
-POST_SYSTEM_PROMPT = """Sen professional IT jurnalistsan va Telegram kanal yuritasan.
+_BATCH_SECTION_RE = re.compile(r"^\s*=+\s*MAVZU\s+(\d+)\s*=+\s*$", re.MULTILINE | re.IGNORECASE)
+_TAG_RE = re.compile(r"<[^>]+>")
 
-VAZIFA: Berilgan ma'lumotlar asosida o'zbek tilida professional post yoz.
 
-POST FORMATI (Telegram HTML):
-<b>📱 SARLAVHA - KATTA HARFDA</b>
+def _plain(post: str) -> str:
+    """HTML teglarisiz matn (embedding va sarlavha uchun)"""
+    return _TAG_RE.sub("", post).strip()
 
-Kirish - 1-2 jumla, mavzuni tanishtirish.
 
-🔹 <b>Muhim nuqta 1</b> - aniq fakt
-🔹 <b>Muhim nuqta 2</b> - aniq fakt  
-🔹 <b>Muhim nuqta 3</b> - aniq fakt
+class _SearchFailed(Exception):
+    """Web qidiruv muvaffaqiyatsiz tugadi"""
 
-<i>💡 Xulosa: Qisqa xulosa - 1-2 jumla</i>
 
-———
-📚 <b>Manbalar:</b>
-- Manba 1 nomi
-- Manba 2 nomi
-
-#hashtag1 #hashtag2 #hashtag3
-
-QOIDALAR:
-1. O'zbek tilida yoz
-2. Sodda va tushunarli til
-3. Faqat berilgan faktlarga asoslan
-4. 150-300 so'z oralig'ida
-5. Kod bo'lsa <code>kod</code> ichida yoz
-"""
-
-COMPARE_SYSTEM_PROMPT = """Sen texnologiya ekspertisan.
-
-FORMAT (Telegram HTML):
-<b>⚔️ TEXNOLOGIYA1 vs TEXNOLOGIYA2</b>
-
-Kirish - nima uchun solishtirmoqdamiz.
-
-<b>✅ Texnologiya1 afzalliklari:</b>
-- Afzallik 1
-- Afzallik 2
-
-<b>✅ Texnologiya2 afzalliklari:</b>
-- Afzallik 1
-- Afzallik 2
-
-<b>🎯 Qachon qaysi birini tanlash:</b>
-- <i>Holat 1</i> → Tanlash
-
-<i>💡 Xulosa: Qisqa tavsiya</i>
-
-#hashtag1 #hashtag2
-"""
-
-QUICK_SYSTEM_PROMPT = """Sen IT blogger san.
-
-FORMAT (Telegram HTML):
-<b>⚡ SARLAVHA</b>
-
-Asosiy ma'lumot - 2-3 jumla.
-
-🔗 <i>Batafsil: manba</i>
-
-#hashtag1 #hashtag2
-"""
-
-TRENDING_SYSTEM_PROMPT = """Sen IT yangiliklar tahlilchisisan.
-
-FORMAT (Telegram HTML):
-<b>🔥 BUGUNGI IT TRENDLAR</b>
-
-1️⃣ <b>Trend 1</b>
-   └ <i>Qisqa izoh</i>
-
-2️⃣ <b>Trend 2</b>
-   └ <i>Qisqa izoh</i>
-
-3️⃣ <b>Trend 3</b>
-   └ <i>Qisqa izoh</i>
+class SmartResearcher:
+    """OpenAI orqali tadqiqot va post yaratish"""
 
-4️⃣ <b>Trend 4</b>
-   └ <i>Qisqa izoh</i>
+    def __init__(self):
+        self._client: "AsyncOpenAI | None" = None
+        self.router = router
+        self.resilience = resilience
+        self.dedup = DedupIndex(DEDUP_FILE, max_items=DEDUP_MAX_ITEMS) if DEDUP_ENABLED else None
+        self.dedup_hits: dict[str, int] = {}
+        self._published: dict[str, float] = {}  # normallashtirilgan mavzu -> kanalga chiqqan vaqt
+        self.archive = Archive(ARCHIVE_DB)
+        self._embeddings: OrderedDict[str, Any] = OrderedDict()
+        self.cache = ResearchCache(ttl=RESEARCH_CACHE_TTL, max_size=RESEARCH_CACHE_SIZE)
+        self.inflight = SingleFlight()
+        self.usage = usage
+        self._http: aiohttp.ClientSession | None = None
+
+    @property
+    def client(self) -> "AsyncOpenAI":
+        """
+        OpenAI klienti - birinchi murojaatda (odatda start() da) yaratiladi.
+        Barcha so'rovlar (qidiruv, post, tahrirlash) bitta httpx pool'dan foydalanadi:
+        ulanishlar keep-alive bilan qayta ishlatiladi, h2 o'rnatilgan bo'lsa - HTTP/2.
+        """
+        if self._client is None:
+            import httpx
+            from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+            http2 = OPENAI_HTTP2
+            if http2:
+                try:
+                    import h2  # noqa: F401
+                except ImportError:
+                    http2 = False
+
+            self._client = AsyncOpenAI(
+                api_key=OPENAI_API_KEY,
+                # Qayta urinishlar Resilience'da (jitter, breaker) - SDK ikkinchi marta takrorlamasin
+                max_retries=0,
+                http_client=DefaultAsyncHttpxClient(
+                    http2=http2,
+                    limits=httpx.Limits(
+                        max_connections=OPENAI_MAX_CONNECTIONS,
+                        max_keepalive_connections=OPENAI_MAX_KEEPALIVE,
+                        keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY
+                    )
+                )
+            )
+        return self._client
+
+    async def start(self):
+        """OpenAI klienti va umumiy HTTP sessiyani ochish (bot ishga tushganda)"""
+        # Klient birinchi so'rovni kutmasdan yaratiladi
+        _ = self.client
+        if self._http is None or self._http.closed:
+            connector = aiohttp.TCPConnector(
+                limit=HTTP_POOL_SIZE,
+                limit_per_host=HTTP_POOL_SIZE // 2 or 1,
+                ttl_dns_cache=300,
+                keepalive_timeout=30
+            )
+            self._http = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=IMAGE_PROBE_TIMEOUT, connect=IMAGE_PROBE_TIMEOUT / 2)
+            )
 
-5️⃣ <b>Trend 5</b>
-   └ <i>Qisqa izoh</i>
+    async def close(self):
+        """Klientlarni yopish va token statistikasini saqlash (bot to'xtaganda)"""
+        if self._http is not None and not self._http.closed:
+            await self._http.close()
+        self._http = None
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+        await self.usage.flush()
+        if self.dedup is not None:
+            await self.dedup.flush()
+        await self.archive.close()
+
+    async def _call(self, operation: str, request: Callable[[str], Awaitable[Any]], deadline: float,
+                    hedge: bool = True) -> Any:
+        """
+        OpenAI so'rovi: marshrut (asosiy/zaxira model) -> har bir model uchun breaker,
+        qayta urinish va hedging. Hammasi birga `deadline` soniyada tugashi kerak; bitta urinish
+        amal uchun sozlangan chegara bilan cheklanadi (web search uchun uzunroq).
+        """
+        try:
+            return await asyncio.wait_for(
+                self.router.call(
+                    operation,
+                    lambda model: self.resilience.call(operation, model, lambda: request(model), hedge=hedge)
+                ),
+                deadline
+            )
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded(f"'{operation}' {deadline:g} soniyada tugamadi") from None
 
-#trending #tech #news
-"""
+    async def _probe_image(self, image_url: str) -> str | None:
+        """Rasm URL ishlashini tekshirish: avval HEAD, kerak bo'lsa GET"""
+        if self._http is None or self._http.closed:
+            await self.start()
 
+        with metrics.track("image_probe"):
+            async with self._http.head(image_url, allow_redirects=True) as resp:
+                if resp.status == 200:
+                    return str(resp.url)
+                if resp.status not in (405, 501):
+                    return None
 
-class SmartResearcher:
-    """OpenAI orqali tadqiqot va post yaratish"""
+            # Server HEAD ni qo'llamasa - GET (tanasini o'qimasdan)
+            async with self._http.get(image_url, allow_redirects=True) as resp:
+                if resp.status == 200:
+                    return str(resp.url)
 
-    def __init__(self):
-        self.client = client
-        self.model = "gpt-4o"
+        return None
 
-    async def search_and_analyze(self, query: str) -> dict:
+    async def search_and_analyze(self, query: str, use_cache: bool = True) -> dict:
         """Internetdan qidirish"""
+        if use_cache:
+            cached = self.cache.get(query)
+            if cached is not None:
+                return cached
+
+        # Bir xil qidiruvlar (masalan /research va /publish) bitta so'rovni kutadi
+        result = await self.inflight.do(("search", normalize_topic(query)), lambda: self._search(query))
+        result = dict(result)
+        result["query"] = query
+        return result
+
+    async def _search(self, query: str) -> dict:
+        async def call(model: str):
+            started = time.perf_counter()
+            response = await self.client.responses.create(model=model, **search_request(query))
+            self.usage.record("search", model, response.usage, time.perf_counter() - started)
+            return response
+
         try:
-            response = await self.client.responses.create(
-                model=self.model,
-                tools=[{"type": "web_search_preview"}],
-                input=f"""
-                Quyidagi mavzu bo'yicha internetdan eng so'nggi ma'lumotlarni top:
-
-                MAVZU: {query}
-
-                FORMATDA BER:
-                1. ASOSIY FAKTLAR (kamida 5 ta)
-                2. MANBALAR
-                3. SO'NGGI YANGILIKLAR (sana bilan)
-                """,
-            )
+            with metrics.track("search"):
+                response = await self._call("search", call, SEARCH_TIMEOUT)
 
-            return {
+            result = {
                 "query": query,
                 "research": response.output_text,
                 "status": "success"
             }
+            self.cache.set(query, result)
+            return result
         except Exception as e:
             return {
                 "query": query,
@@ -138,89 +203,218 @@ class SmartResearcher:
                 "error": str(e)
             }
 
-    async def generate_post(self, research_data: dict, post_type: str = "full") -> str:
-        """Post yaratish"""
+    async def generate_post(self, research_data: dict, post_type: str = "full", temperature: float = 0.7) -> str:
+        """Post yaratish (qayta yozishda boshqacha matn uchun - yuqoriroq temperature)"""
+        max_tokens = self.usage.budget(post_type)
 
-        prompts = {
-            "compare": COMPARE_SYSTEM_PROMPT,
-            "quick": QUICK_SYSTEM_PROMPT,
-            "trending": TRENDING_SYSTEM_PROMPT,
-            "full": POST_SYSTEM_PROMPT
-        }
+        async def call(model: str):
+            started = time.perf_counter()
+            response = await self.client.chat.completions.create(
+                model=model,
+                **post_request(research_data, post_type),
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
+            self.usage.record("post", model, response.usage, time.perf_counter() - started,
+                              post_type=post_type, finish_reason=response.choices[0].finish_reason,
+                              max_tokens=max_tokens)
+            return response
 
-        response = await self.client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": prompts.get(post_type, POST_SYSTEM_PROMPT)},
-                {"role": "user",
-                 "content": f"MAVZU: {research_data['query']}\n\nMA'LUMOTLAR:\n{research_data['research']}"}
-            ],
-            temperature=0.7,
-            max_tokens=1500
-        )
+        with metrics.track("generate_post"):
+            response = await self._call(post_type, call, POST_TIMEOUT)
 
         return response.choices[0].message.content
 
-    async def get_image_for_topic(self, topic: str) -> str | None:
-        """Mavzu uchun rasm URL olish"""
-        try:
-            # Kalit so'z olish
+    async def stream_post(self, research_data: dict, post_type: str = "full") -> AsyncIterator[str]:
+        """
+        Post yaratish (stream) - matn bo'laklarini kelishi bilan qaytaradi.
+        Zaxira modelga faqat stream ochilguncha o'tiladi (route o'lchovi - birinchi javobgacha).
+        """
+        max_tokens = self.usage.budget(post_type)
+        started = time.perf_counter()
+        finish_reason = None
+        stream_usage = None
+        used_model = self.router.model(post_type)
+
+        async def open_stream(model: str):
+            nonlocal used_model
+            used_model = model
+            return await self.client.chat.completions.create(
+                model=model,
+                **post_request(research_data, post_type),
+                temperature=0.7,
+                max_tokens=max_tokens,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+
+        with metrics.track("generate_post"):
+            # Stream ochilishida hedging yo'q: ortiqcha ochilgan stream'ni ham yopish kerak bo'lardi
+            stream = await self._call(post_type, open_stream, POST_TIMEOUT, hedge=False)
+            chunks = aiter(stream)
+
+            try:
+                while True:
+                    remaining = POST_TIMEOUT - (time.perf_counter() - started)
+                    try:
+                        chunk = await asyncio.wait_for(anext(chunks), max(remaining, 0))
+                    except StopAsyncIteration:
+                        break
+                    except asyncio.TimeoutError:
+                        raise DeadlineExceeded(f"'{post_type}' {POST_TIMEOUT:g} soniyada tugamadi") from None
+
+                    if chunk.usage is not None:
+                        # Oxirgi bo'lak: choices bo'sh, faqat usage
+                        stream_usage = chunk.usage
+                    if not chunk.choices:
+                        continue
+                    finish_reason = chunk.choices[0].finish_reason or finish_reason
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        yield delta
+            finally:
+                await stream.close()
+
+        self.usage.record("post", used_model, stream_usage, time.perf_counter() - started,
+                          post_type=post_type, finish_reason=finish_reason, max_tokens=max_tokens)
+
+    async def edit_post(self, post: str, instruction: str) -> str:
+        """Tayyor postni foydalanuvchi so'rovi bo'yicha tahrirlash"""
+        async def call(model: str):
+            started = time.perf_counter()
             response = await self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system",
-                     "content": "Rasm qidirish uchun 1-2 so'zlik inglizcha kalit so'z ber. Faqat so'zni yoz, boshqa hech narsa yozma."},
-                    {"role": "user", "content": topic}
-                ],
+                model=model,
+                **edit_request(post, instruction),
+                temperature=0.7
+            )
+            self.usage.record("edit", model, response.usage, time.perf_counter() - started)
+            return response
+
+        with metrics.track("edit_post"):
+            response = await self._call("edit", call, POST_TIMEOUT)
+
+        return response.choices[0].message.content
+
+    async def get_image_keyword(self, topic: str) -> str:
+        """Rasm qidirish uchun inglizcha kalit so'z"""
+        async def call(model: str):
+            started = time.perf_counter()
+            response = await self.client.chat.completions.create(
+                model=model,
+                **keyword_request(topic),
                 max_tokens=10
             )
-            keyword = response.choices[0].message.content.strip().replace(" ", "-")
+            self.usage.record("keyword", model, response.usage, time.perf_counter() - started)
+            return response
 
-            # Picsum - ishonchli bepul rasm
-            random_id = random.randint(1, 1000)
-            image_url = f"https://picsum.photos/seed/{keyword}{random_id}/800/600"
+        with metrics.track("image_keyword"):
+            response = await self._call("keyword", call, IMAGE_TIMEOUT)
+        return response.choices[0].message.content.strip().replace(" ", "-")
 
-            # URL ishlashini tekshirish
-            async with aiohttp.ClientSession() as session:
-                async with session.get(image_url, allow_redirects=True) as resp:
-                    if resp.status == 200:
-                        return str(resp.url)
+    async def find_image(self, keyword: str) -> str | None:
+        """Kalit so'z bo'yicha ishlaydigan rasm URL"""
+        # Picsum - ishonchli bepul rasm
+        random_id = random.randint(1, 1000)
+        image_url = f"{IMAGE_BASE_URL}/seed/{keyword}{random_id}/800/600"
 
-            return None
+        # URL ishlashini tekshirish
+        return await self._probe_image(image_url)
+
+    async def get_image_for_topic(self, topic: str) -> str | None:
+        """Mavzu uchun rasm URL olish"""
+        try:
+            with metrics.track("image"):
+                keyword = await self.get_image_keyword(topic)
+                return await self.find_image(keyword)
 
         except Exception as e:
             print(f"Rasm olishda xatolik: {e}")
             return None
 
-    async def full_research(self, topic: str, post_type: str = "full", with_image: bool = False) -> dict:
+    async def full_research(self, topic: str, post_type: str = "full", with_image: bool = False,
+                            use_cache: bool = True) -> dict:
         """To'liq jarayon: qidirish + post yaratish"""
 
-        # 1. Internetdan qidirish
-        research = await self.search_and_analyze(topic)
-
-        if research["status"] != "success":
-            return {"success": False, "error": research.get("error", "Qidirishda xatolik")}
-
-        # 2. Post yaratish
-        post = await self.generate_post(research, post_type)
+        # Bir xil mavzu bo'yicha parallel so'rovlar bitta vazifani kutadi
+        # (use_cache=False chaqiruvchi keshdan olingan natijaga qo'shilib qolmasligi uchun - kalitda)
+        key = (normalize_topic(topic), post_type, with_image, use_cache)
+        result = await self.inflight.do(
+            key, lambda: self._full_research(topic, post_type, with_image, use_cache)
+        )
 
-        # 3. Rasm olish
-        image_url = None
+        result = dict(result)
+        if result.get("success"):
+            result["topic"] = topic
+        return result
+
+    async def _full_research(self, topic: str, post_type: str, with_image: bool, use_cache: bool) -> dict:
+        # 1. Internetdan qidirish -> 2. Post yaratish
+        # 3. Rasm (kalit so'z -> URL) faqat mavzuga bog'liq, shuning uchun qidiruv bilan parallel
+        async def search() -> dict:
+            # Avval arzon tekshiruvlar (embedding so'rovisiz): aynan shu mavzu kanalga chiqqanmi,
+            # keshda yoki arxivda (post chiqarilmagan) tadqiqoti bormi
+            if await self._recently_published(topic):
+                self._hit("fresh_angle")
+                query, embedded = fresh_angle_query(topic, topic), False
+            else:
+                if use_cache:
+                    cached = self.cache.get(topic)
+                    if cached is not None:
+                        return dict(cached, query=topic)
+                    archived = await self.archive.fresh_research(topic, ARCHIVE_REUSE_MAX_AGE,
+                                                                 published_window=DEDUP_WINDOW)
+                    if archived is not None:
+                        self._hit("archive")
+                        return {"query": topic, "research": archived, "status": "success"}
+
+                # Faqat shu yerda embedding: o'xshash mavzu keshda - o'sha natija, kanalda - yangi jihatlar
+                reused, query = await self._check_topic(topic, reuse=use_cache)
+                if reused is not None:
+                    return reused
+                embedded = True
+
+            # Aynan shu mavzu keshda yo'qligi yuqorida tekshirilgan
+            research = await self.search_and_analyze(query, use_cache=use_cache and query != topic)
+            if research["status"] != "success":
+                raise _SearchFailed(research.get("error", "Qidirishda xatolik"))
+            if embedded:
+                # Embedding _check_topic dan keshda - qo'shimcha so'rov yo'q
+                await self._remember_topic(topic)
+            return dict(research, query=topic)
+
+        stages = [
+            Stage("search", search, timeout=SEARCH_TIMEOUT),
+            Stage("post", lambda research: self.generate_post(research, post_type),
+                  requires=("search",), timeout=POST_TIMEOUT)
+        ]
         if with_image:
-            image_url = await self.get_image_for_topic(topic)
+            stages += [
+                Stage("keyword", lambda: self.get_image_keyword(topic), timeout=IMAGE_TIMEOUT, critical=False),
+                Stage("image", self.find_image, requires=("keyword",), timeout=IMAGE_TIMEOUT, critical=False)
+            ]
 
+        try:
+            results = await run_pipeline(stages, grace=IMAGE_GRACE)
+        except (_SearchFailed, StageTimeout) as e:
+            return {"success": False, "error": str(e)}
+
+        research = results["search"]["research"]
         return {
             "success": True,
             "topic": topic,
-            "research": research["research"],
-            "post": post,
-            "image_url": image_url
+            "research": research,
+            "post": results["post"],
+            "image_url": results.get("image"),
+            "archive_id": await self.archive.add(topic, research, results["post"], post_type)
         }
 
-    async def compare_topics(self, topic1: str, topic2: str) -> dict:
+    async def compare_topics(self, topic1: str, topic2: str, use_cache: bool = True) -> dict:
         """Ikki mavzuni solishtirish"""
 
-        research = await self.search_and_analyze(f"{topic1} vs {topic2} comparison advantages disadvantages")
+        research = await self.search_and_analyze(
+            f"{topic1} vs {topic2} comparison advantages disadvantages",
+            use_cache=use_cache
+        )
 
         if research["status"] != "success":
             return {"success": False, "error": "Qidirishda xatolik"}
@@ -232,17 +426,22 @@ class SmartResearcher:
             "success": True,
             "topic1": topic1,
             "topic2": topic2,
-            "post": post
+            "research": research["research"],
+            "post": post,
+            "archive_id": await self.archive.add(research["query"], research["research"], post, "compare")
         }
 
     async def quick_post(self, topic: str) -> dict:
         """Tezkor qisqa post"""
         return await self.full_research(topic, "quick", with_image=False)
 
-    async def get_trending(self) -> dict:
+    async def get_trending(self, use_cache: bool = True) -> dict:
         """Trendlar ro'yxati"""
 
-        research = await self.search_and_analyze("trending tech AI programming news today 2024 2025")
+        research = await self.search_and_analyze(
+            "trending tech AI programming news today 2024 2025",
+            use_cache=use_cache
+        )
 
         if research["status"] != "success":
             return {"success": False, "error": "Qidirishda xatolik"}
@@ -251,5 +450,200 @@ class SmartResearcher:
 
         return {
             "success": True,
-            "post": post
-        }
\ No newline at end of file
+            "research": research["research"],
+            "post": post,
+            "archive_id": await self.archive.add("Bugungi trendlar", research["research"], post, "trending")
+        }
+    # ============ TAKRORLAR ============
+
+    async def _embed(self, text: str):
+        """Normallashtirilgan embedding (oxirgi 256 tasi keshlanadi); indeks o'chiq yoki xato bo'lsa - None"""
+        if self.dedup is None or not self.dedup.available():
+            return None
+        vector = self._embeddings.get(text)
+        if vector is not None:
+            self._embeddings.move_to_end(text)
+            return vector
+
+        async def call(model: str):
+            started = time.perf_counter()
+            response = await self.client.embeddings.create(
+                model=model, input=text, dimensions=EMBEDDING_DIMENSIONS, encoding_format="float"
+            )
+            self.usage.record("embed", model, response.usage, time.perf_counter() - started)
+            return response
+
+        try:
+            with metrics.track("embed"):
+                response = await self._call("embed", call, DEDUP_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"Embedding olishda xatolik: {e}")
+            return None
+
+        vector = self.dedup.vector(response.data[0].embedding)
+        self._embeddings[text] = vector
+        if len(self._embeddings) > 256:
+            self._embeddings.popitem(last=False)
+        return vector
+
+    def _hit(self, kind: str):
+        self.dedup_hits[kind] = self.dedup_hits.get(kind, 0) + 1
+
+    async def _recently_published(self, topic: str) -> bool:
+        """Aynan shu mavzu (normallashtirilgan kalit) DEDUP_WINDOW ichida kanalga chiqqan (embeddingsiz)"""
+        since = time.time() - DEDUP_WINDOW
+        published_at = self._published.get(normalize_topic(topic))
+        if published_at is None:
+            published_at = await self.archive.last_published(topic)
+        return published_at is not None and published_at >= since
+
+    async def _check_topic(self, topic: str, reuse: bool = True) -> tuple[dict | None, str]:
+        """
+        Mavzuni oldingilari bilan solishtirish -> (qayta ishlatiladigan tadqiqot, qidiruv so'rovi):
+        - o'xshash mavzuda DEDUP_WINDOW ichida post chiqqan bo'lsa - qidiruv yangi jihatlarga
+          yo'naltiriladi (eski tadqiqot qayta ishlatilmaydi - u allaqachon kanalda);
+        - aks holda o'xshash mavzu keshda bo'lsa - uning tadqiqoti (web search kerak emas).
+        """
+        vector = await self._embed(topic)
+        if vector is None:
+            return None, topic
+
+        published = self.dedup.nearest(vector, PUBLISHED, max_age=DEDUP_WINDOW)
+        if published is not None and published[0] >= DEDUP_TOPIC_THRESHOLD:
+            self._hit("fresh_angle")
+            return None, fresh_angle_query(topic, published[1])
+
+        if reuse:
+            similar = self.dedup.nearest(vector, TOPIC, max_age=RESEARCH_CACHE_TTL)
+            if similar is not None and similar[0] >= DEDUP_TOPIC_THRESHOLD:
+                # Kalit - to'liq mavzu (matn ustuni 200 belgigacha qisqartirilgan)
+                cached = self.cache.get(similar[2])
+                if cached is not None:
+                    self._hit("research")
+                    return dict(cached, query=topic), topic
+
+        return None, topic
+
+    async def _remember_topic(self, topic: str):
+        vector = await self._embed(topic)
+        if vector is None:
+            return
+        similar = self.dedup.nearest(vector, TOPIC, max_age=RESEARCH_CACHE_TTL)
+        if similar is None or similar[0] < 0.99:
+            self.dedup.add(TOPIC, topic, vector, key=topic)
+
+    async def find_published_duplicate(self, post: str) -> str | None:
+        """Kanalda DEDUP_WINDOW ichida deyarli bir xil post chiqqan bo'lsa - uning sarlavhasi"""
+        vector = await self._embed(_plain(post))
+        if vector is None:
+            return None
+        match = self.dedup.nearest(vector, POST, max_age=DEDUP_WINDOW)
+        if match is not None and match[0] >= DEDUP_POST_THRESHOLD:
+            self._hit("post")
+            return match[1]
+        return None
+
+    async def remember_published(self, post: str, topic: str | None = None):
+        """Kanalga chiqqan post (va mavzusi) indeksga qo'shiladi"""
+        if topic:
+            now = time.time()
+            self._published[normalize_topic(topic)] = now
+            if len(self._published) > DEDUP_MAX_ITEMS:
+                self._published = {key: ts for key, ts in self._published.items() if ts >= now - DEDUP_WINDOW}
+        text = _plain(post)
+        vector = await self._embed(text)
+        if vector is None:
+            return
+        self.dedup.add(POST, text.split("\n", 1)[0], vector)
+        if topic:
+            topic_vector = await self._embed(topic)
+            if topic_vector is not None:
+                self.dedup.add(PUBLISHED, topic, topic_vector)
+
+    # ============ BATCH ============
+
+    async def _batch_search(self, topics: list[str]) -> dict[str, dict]:
+        """Bir nechta mavzuni bitta web search so'rovida qidirish"""
+
+        async def call(model: str):
+            started = time.perf_counter()
+            response = await self.client.responses.create(model=model, **batch_search_request(topics))
+            self.usage.record("batch_search", model, response.usage, time.perf_counter() - started)
+            return response
+
+        try:
+            with metrics.track("batch_search"):
+                response = await self._call("search", call, SEARCH_TIMEOUT)
+            text = response.output_text
+        except Exception as e:
+            logger.exception(f"Batch qidiruvda xatolik: {e}")
+            text = ""
+
+        # "=== MAVZU 2 ===" bo'yicha bo'laklash: [oldingi, "1", matn1, "2", matn2, ...]
+        parts = _BATCH_SECTION_RE.split(text)
+        sections = {int(parts[i]): parts[i + 1].strip() for i in range(1, len(parts) - 1, 2)}
+
+        results = {}
+        for i, topic in enumerate(topics, 1):
+            if sections.get(i):
+                results[topic] = {"query": topic, "research": sections[i], "status": "success"}
+                self.cache.set(topic, results[topic])
+
+        # Javobda bo'limi yo'q mavzular - alohida qidiruv
+        missing = [topic for topic in topics if topic not in results]
+        for topic, research in zip(missing, await asyncio.gather(
+                *[self.search_and_analyze(topic, use_cache=False) for topic in missing])):
+            results[topic] = research
+
+        return results
+
+    async def batch_research(self, topics: list[str], post_type: str = "full", with_image: bool = False,
+                             use_cache: bool = True) -> list[dict]:
+        """
+        Bir nechta mavzu: bitta web search so'rovi, keyin postlar parallel yoziladi.
+        Natijalar topics tartibida, har biri full_research natijasi formatida.
+        """
+        researches = {}
+        to_search = []
+        seen = set()
+
+        for topic in topics:
+            key = normalize_topic(topic)
+            if key in seen:
+                continue
+            seen.add(key)
+
+            cached = self.cache.get(topic) if use_cache else None
+            if cached is not None:
+                researches[topic] = cached
+            else:
+                to_search.append(topic)
+
+        if len(to_search) == 1:
+            researches[to_search[0]] = await self.search_and_analyze(to_search[0], use_cache=False)
+        elif to_search:
+            researches.update(await self._batch_search(to_search))
+
+        async def write(topic: str) -> dict:
+            research = researches.get(topic) or self.cache.get(topic)
+            if research is None or research["status"] != "success":
+                return {"success": False, "topic": topic, "error": (research or {}).get("error", "Qidirishda xatolik")}
+
+            post, image_url = await asyncio.gather(
+                self.generate_post(research, post_type),
+                self.get_image_for_topic(topic) if with_image else asyncio.sleep(0)
+            )
+            return {
+                "success": True,
+                "topic": topic,
+                "research": research["research"],
+                "post": post,
+                "image_url": image_url,
+                "archive_id": await self.archive.add(topic, research["research"], post, post_type)
+            }
+
+        results = await asyncio.gather(*[write(topic) for topic in topics], return_exceptions=True)
+        return [
+            {"success": False, "topic": topic, "error": str(r)} if isinstance(r, Exception) else r
+            for topic, r in zip(topics, results)
+        ]
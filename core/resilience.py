@@ -0,0 +1,250 @@
+"""
+Resilience - OpenAI chaqiruvlari uchun qayta urinish, hedging va circuit breaker
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, TypeVar
+
+from config import (
+    OPENAI_RETRIES, OPENAI_RETRY_BASE_DELAY, OPENAI_RETRY_MAX_DELAY, OPENAI_ATTEMPT_TIMEOUT,
+    OPENAI_SEARCH_ATTEMPT_TIMEOUT, BREAKER_FAILURES, BREAKER_RESET_TIMEOUT, HEDGE_OPERATIONS
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(Exception):
+    """Amal belgilangan vaqtda tugamadi (qayta urinishlar va zaxira model bilan birga)"""
+
+
+class CircuitOpen(Exception):
+    """Model ketma-ket xato berdi - so'rovlar vaqtincha yuborilmaydi"""
+
+
+class AttemptTimeout(asyncio.TimeoutError):
+    """Urinish mijoz tomonidagi `attempt_timeout` chegarasidan oshdi"""
+
+
+def is_retriable(error: Exception) -> bool:
+    """Vaqtinchalik xato: kechikish, ulanish, 429 yoki 5xx"""
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+    try:
+        import openai
+    except ImportError:
+        return False
+    return isinstance(error, (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError))
+
+
+class CircuitBreaker:
+    """
+    closed - so'rovlar o'tadi; ketma-ket `failure_threshold` ta vaqtinchalik xatodan keyin - open.
+    open - so'rovlar darhol CircuitOpen bilan qaytadi; `reset_timeout` o'tgach - half_open.
+    half_open - bitta sinov so'rovi: muvaffaqiyatli bo'lsa closed, aks holda yana open.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at = 0.0
+        self._open = False
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if not self._open:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def retry_in(self) -> float:
+        """Open holatda sinov so'rovigacha qolgan vaqt (soniya)"""
+        if not self._open:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def release(self):
+        """So'rov natijasiz tugadi (bekor qilindi) - sinov huquqini qaytarish"""
+        self._probing = False
+
+    def success(self):
+        if self._open:
+            logger.info(f"Circuit breaker {self.name}: yopildi")
+        self.failures = 0
+        self._open = False
+        self._probing = False
+
+    def failure(self):
+        self.failures += 1
+        if self._probing or (not self._open and self.failures >= self.failure_threshold):
+            if not self._open:
+                logger.warning(f"Circuit breaker {self.name}: ochildi ({self.failures} ta xato)")
+            self._open = True
+            self._opened_at = time.monotonic()
+        self._probing = False
+
+
+class Resilience:
+    """
+    call(operation, model, func) - bitta model bilan so'rov:
+    - model breaker'i ochiq bo'lsa - darhol CircuitOpen (router zaxira modelga o'tadi);
+    - har bir urinish `attempt_timeout` (amal uchun `attempt_timeouts` dagi) soniya bilan cheklanadi;
+      osilib qolgan urinish qayta urinib ko'riladi, lekin breaker uchun xato hisoblanmaydi -
+      bu chegarani model emas, mijoz qo'ygan;
+    - vaqtinchalik xatoda `retries` martagacha qayta urinish (full jitter: 0..min(max_delay, base * 2^n));
+    - hedge=True va amal `hedge_operations` da bo'lsa: javob shu amal+model p95 kechikishidan
+      oshsa, ikkinchi bir xil so'rov yuboriladi, birinchi kelgan javob olinadi.
+    """
+
+    def __init__(self, retries: int = 2, base_delay: float = 0.5, max_delay: float = 8, attempt_timeout: float = 0,
+                 attempt_timeouts: dict[str, float] | None = None, failure_threshold: int = 5, reset_timeout: float = 30,
+                 hedge_operations: frozenset[str] = frozenset(), hedge_min_samples: int = 20, window: int = 200):
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.attempt_timeout = attempt_timeout
+        self.attempt_timeouts = attempt_timeouts or {}
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.hedge_operations = hedge_operations
+        self.hedge_min_samples = hedge_min_samples
+        self.window = window
+        self.breakers: dict[str, CircuitBreaker] = {}
+        self.hedged: dict[str, int] = {}
+        self._latency: dict[tuple[str, str], deque[float]] = {}
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        breaker = self.breakers.get(model)
+        if breaker is None:
+            breaker = self.breakers[model] = CircuitBreaker(model, self.failure_threshold, self.reset_timeout)
+        return breaker
+
+    def hedge_delay(self, operation: str, model: str) -> float | None:
+        """Ikkinchi so'rovgacha kutish: muvaffaqiyatli urinishlar p95 (kuzatuvlar yetarli bo'lsa)"""
+        if operation not in self.hedge_operations:
+            return None
+        samples = self._latency.get((operation, model))
+        if not samples or len(samples) < self.hedge_min_samples:
+            return None
+        values = sorted(samples)
+        return values[min(len(values) - 1, int(0.95 * len(values)))]
+
+    def attempt_timeout_for(self, operation: str) -> float:
+        """Amal uchun bitta urinish chegarasi (0 - cheklanmagan)"""
+        return self.attempt_timeouts.get(operation, self.attempt_timeout)
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def _timed(self, operation: str, model: str, func: Callable[[], Awaitable[T]]) -> T:
+        started = time.perf_counter()
+        result = await func()
+        self._latency.setdefault((operation, model), deque(maxlen=self.window)).append(
+            time.perf_counter() - started
+        )
+        return result
+
+    async def _attempt(self, operation: str, model: str, func: Callable[[], Awaitable[T]], hedge: bool) -> T:
+        delay = self.hedge_delay(operation, model) if hedge else None
+        if delay is None:
+            return await self._timed(operation, model, func)
+
+        pending = {asyncio.ensure_future(self._timed(operation, model, func))}
+        error = None
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return done.pop().result()
+
+            self.hedged[operation] = self.hedged.get(operation, 0) + 1
+            pending.add(asyncio.ensure_future(self._timed(operation, model, func)))
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _capped(self, operation: str, model: str, func: Callable[[], Awaitable[T]], hedge: bool,
+                      timeout: float) -> T:
+        try:
+            async with asyncio.timeout(timeout) as cap:
+                return await self._attempt(operation, model, func, hedge)
+        except TimeoutError:
+            if cap.expired():
+                raise AttemptTimeout(f"{operation}/{model}: urinish {timeout:g} soniyadan oshdi") from None
+            raise
+
+    async def call(self, operation: str, model: str, func: Callable[[], Awaitable[T]], hedge: bool = True,
+                   attempt_timeout: float | None = None) -> T:
+        breaker = self.breaker(model)
+        if attempt_timeout is None:
+            attempt_timeout = self.attempt_timeout_for(operation)
+
+        for attempt in range(self.retries + 1):
+            if not breaker.allow():
+                raise CircuitOpen(
+                    f"{model} vaqtincha ishlamayapti, {breaker.retry_in():.0f} soniyadan keyin qayta urinib ko'ring"
+                )
+            try:
+                if attempt_timeout:
+                    result = await self._capped(operation, model, func, hedge, attempt_timeout)
+                else:
+                    result = await self._attempt(operation, model, func, hedge)
+            except asyncio.CancelledError:
+                breaker.release()
+                raise
+            except Exception as e:
+                if not is_retriable(e):
+                    # Server javob berdi (masalan 400) - model ishlayapti
+                    breaker.success()
+                    raise
+                if isinstance(e, AttemptTimeout):
+                    # Sekin javob (masalan uzoq web search) - model ishlamayapti degani emas
+                    breaker.release()
+                else:
+                    breaker.failure()
+                if attempt == self.retries:
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f"{operation}/{model}: {type(e).__name__}, {delay:.1f}s dan keyin qayta urinish")
+                await asyncio.sleep(delay)
+            else:
+                breaker.success()
+                return result
+
+
+resilience = Resilience(
+    retries=OPENAI_RETRIES,
+    base_delay=OPENAI_RETRY_BASE_DELAY,
+    max_delay=OPENAI_RETRY_MAX_DELAY,
+    attempt_timeout=OPENAI_ATTEMPT_TIMEOUT,
+    attempt_timeouts={"search": OPENAI_SEARCH_ATTEMPT_TIMEOUT},
+    failure_threshold=BREAKER_FAILURES,
+    reset_timeout=BREAKER_RESET_TIMEOUT,
+    hedge_operations=frozenset(op.strip() for op in HEDGE_OPERATIONS.split(",") if op.strip())
+)
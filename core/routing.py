@@ -0,0 +1,116 @@
+"""
+Model Routing - Har bir amal uchun model darajasi (tier) va zaxira modelga o'tish
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, TypeVar
+
+from config import MODEL_LARGE, MODEL_SMALL, MODEL_ROUTES, MODEL_PRIMARY_TIMEOUT, EMBEDDING_MODEL
+from .metrics import metrics
+from .resilience import CircuitOpen, is_retriable
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Amal -> (asosiy daraja, zaxira daraja). MODEL_ROUTES bilan o'zgartiriladi
+DEFAULT_ROUTES = {
+    "search": ("large", "small"),
+    "full": ("large", "small"),
+    "compare": ("large", "small"),
+    "quick": ("small", "large"),
+    "trending": ("small", "large"),
+    "edit": ("large", "small"),
+    "keyword": ("small", "large"),
+    "embed": ("embedding", None)
+}
+
+
+class Route:
+    """Amal uchun asosiy va zaxira model"""
+
+    __slots__ = ("operation", "primary", "fallback")
+
+    def __init__(self, operation: str, primary: str, fallback: str | None = None):
+        self.operation = operation
+        self.primary = primary
+        self.fallback = fallback if fallback != primary else None
+
+    @property
+    def models(self) -> list[str]:
+        return [self.primary] + ([self.fallback] if self.fallback else [])
+
+
+def parse_routes(spec: str, tiers: dict[str, str],
+                 defaults: dict[str, tuple[str, str | None]] = DEFAULT_ROUTES) -> dict[str, Route]:
+    """
+    "quick=small:large,edit=small" ko'rinishidagi qatorni o'qish.
+    Daraja o'rniga model nomi ham yozilishi mumkin (masalan edit=gpt-4.1-mini).
+    Ko'rsatilmagan amallar uchun - DEFAULT_ROUTES.
+    """
+    routes = dict(defaults)
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        operation, _, value = item.partition("=")
+        primary, _, fallback = value.strip().partition(":")
+        if not operation.strip() or not primary:
+            logger.warning(f"MODEL_ROUTES: noto'g'ri qiymat '{item}' - o'tkazib yuborildi")
+            continue
+        routes[operation.strip()] = (primary, fallback or None)
+
+    return {
+        operation: Route(operation, tiers.get(primary, primary), tiers.get(fallback, fallback) if fallback else None)
+        for operation, (primary, fallback) in routes.items()
+    }
+
+
+def _should_fallback(error: Exception) -> bool:
+    """Asosiy model kechikdi, limitga tushdi yoki breaker'i ochiq - zaxira modelni sinash kerak"""
+    return isinstance(error, CircuitOpen) or is_retriable(error)
+
+
+class ModelRouter:
+    """
+    call("quick", func) - func(model) ni amalning asosiy modeli bilan chaqiradi.
+    Asosiy model primary_timeout ichida javob bermasa, qayta urinishlardan keyin ham
+    vaqtinchalik xato (429, 5xx, ulanish) qaytarsa yoki breaker'i ochiq bo'lsa -
+    xuddi shu so'rov zaxira model bilan takrorlanadi (zaxiraga vaqt chegarasi qo'yilmaydi,
+    uni pipeline bosqichi cheklaydi).
+    Har bir urinish route:<amal>:<model> sifatida o'lchanadi (/perf, /metrics).
+    """
+
+    def __init__(self, routes: dict[str, Route], primary_timeout: float = 0, default: str = "full"):
+        self.routes = routes
+        self.primary_timeout = primary_timeout
+        self.default = default
+        self.fallbacks: dict[str, int] = {}
+
+    def route(self, operation: str) -> Route:
+        return self.routes.get(operation) or self.routes[self.default]
+
+    def model(self, operation: str) -> str:
+        return self.route(operation).primary
+
+    async def call(self, operation: str, func: Callable[[str], Awaitable[T]]) -> T:
+        route = self.route(operation)
+        operation, models = route.operation, route.models
+
+        for i, model in enumerate(models):
+            last = i == len(models) - 1
+            try:
+                with metrics.track(f"route:{operation}:{model}"):
+                    if last or not self.primary_timeout:
+                        return await func(model)
+                    return await asyncio.wait_for(func(model), self.primary_timeout)
+            except Exception as e:
+                if last or not _should_fallback(e):
+                    raise
+                self.fallbacks[operation] = self.fallbacks.get(operation, 0) + 1
+                logger.warning(f"{operation}: {model} javob bermadi ({type(e).__name__}), "
+                               f"{models[i + 1]} ga o'tildi")
+
+
+router = ModelRouter(
+    parse_routes(MODEL_ROUTES, {"large": MODEL_LARGE, "small": MODEL_SMALL, "embedding": EMBEDDING_MODEL}),
+    primary_timeout=MODEL_PRIMARY_TIMEOUT
+)
@@ -0,0 +1,54 @@
+"""
+Single Flight - Bir xil parallel so'rovlarni bitta vazifaga birlashtirish
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class _Call:
+    """Bajarilayotgan umumiy vazifa va uni kutayotganlar soni"""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Bir xil kalitli parallel chaqiruvlar bitta vazifani kutadi"""
+
+    def __init__(self):
+        self._calls: dict[Hashable, _Call] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def _forget(self, key: Hashable, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Kalit bo'yicha vazifa bo'lsa - unga qo'shilish, bo'lmasa - yangisini boshlash.
+        Xatolik barcha kutayotganlarga uzatiladi. Vazifa faqat oxirgi kutuvchi
+        chiqib ketganda bekor qilinadi.
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(func()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _, k=key, c=call: self._forget(k, c))
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+                self._forget(key, call)
@@ -0,0 +1,202 @@
+"""
+Usage - OpenAI tokenlari va narxini hisoblash, post turlari uchun moslashuvchan max_tokens
+"""
+
+import asyncio
+import copy
+import json
+import logging
+import math
+import os
+import tempfile
+from collections import deque
+from contextvars import ContextVar
+from datetime import date, timedelta
+
+from config import USAGE_FILE, ADAPTIVE_MAX_TOKENS
+
+logger = logging.getLogger(__name__)
+
+# So'rov qaysi buyruqdan kelgani (MetricsMiddleware / scheduler o'rnatadi)
+current_command: ContextVar[str] = ContextVar("current_command", default="other")
+
+# USD / 1M token: (kirish, keshdan kirish, chiqish)
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "text-embedding-3-small": (0.02, 0.02, 0.0)
+}
+
+# Kuzatuvlar yetarli bo'lguncha post turlari uchun max_tokens
+DEFAULT_BUDGETS = {
+    "quick": 400,
+    "full": 1500,
+    "compare": 1500,
+    "trending": 1500
+}
+
+
+def usage_tokens(usage) -> tuple[int, int, int]:
+    """(prompt, completion, cached) - chat.completions va responses API uchun"""
+    if usage is None:
+        return 0, 0, 0
+    prompt = getattr(usage, "prompt_tokens", None)
+    if prompt is None:
+        prompt = getattr(usage, "input_tokens", 0) or 0
+    completion = getattr(usage, "completion_tokens", None)
+    if completion is None:
+        completion = getattr(usage, "output_tokens", 0) or 0
+    details = getattr(usage, "prompt_tokens_details", None) or getattr(usage, "input_tokens_details", None)
+    cached = getattr(details, "cached_tokens", 0) or 0
+    return prompt, completion, cached
+
+
+def cost_usd(model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> float:
+    """Narx (USD); prompt keshidan olingan kirish tokenlari arzonroq"""
+    input_price, cached_price, output_price = MODEL_PRICES.get(model, MODEL_PRICES["gpt-4o"])
+    return ((prompt_tokens - cached_tokens) * input_price + cached_tokens * cached_price
+            + completion_tokens * output_price) / 1_000_000
+
+
+class UsageTracker:
+    """
+    Har bir chaqiruv kunlik yig'indiga qo'shiladi (buyruq, amal, post turi, model bo'yicha)
+    va faylga kechiktirib (bir necha chaqiruvni birga) yoziladi.
+
+    Post turlari uchun max_tokens oxirgi postlar uzunligining p99 * headroom qiymati.
+    Kesilgan (finish_reason=length) post limitdan 1.5 barobar uzun deb hisoblanadi -
+    shunda limit faqat pasayib ketmaydi.
+    """
+
+    def __init__(self, path: str, default_budgets: dict[str, int] = DEFAULT_BUDGETS, adaptive: bool = True,
+                 min_budget: int = 150, max_budget: int = 1500, min_samples: int = 20,
+                 window: int = 200, headroom: float = 1.25, keep_days: int = 30, save_delay: float = 5):
+        self.path = path
+        self.default_budgets = default_budgets
+        self.adaptive = adaptive
+        self.min_budget = min_budget
+        self.max_budget = max_budget
+        self.min_samples = min_samples
+        self.window = window
+        self.headroom = headroom
+        self.keep_days = keep_days
+        self.save_delay = save_delay
+        self._days: dict[str, dict[str, dict]] = {}
+        self._samples: dict[str, deque[int]] = {}
+        self._save_task: asyncio.Task | None = None
+        self._loaded = False
+
+    # ============ FAYL ============
+
+    def _load(self):
+        """Fayldan o'qish - birinchi murojaatda (import paytida emas)"""
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.path:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.error(f"Token statistikasini yuklashda xato: {e}")
+            return
+
+        self._days = data.get("days", {})
+        for post_type, values in data.get("samples", {}).items():
+            self._samples[post_type] = deque(values, maxlen=self.window)
+
+    def _snapshot(self) -> dict:
+        oldest = (date.today() - timedelta(days=self.keep_days)).isoformat()
+        for day in [d for d in self._days if d < oldest]:
+            del self._days[day]
+        return {
+            "days": self._days,
+            "samples": {post_type: list(values) for post_type, values in self._samples.items()}
+        }
+
+    def _write(self, data: dict):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".usage-", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    async def flush(self):
+        """Yig'indilarni hozir faylga yozish"""
+        if not self.path or not self._loaded:
+            return
+        try:
+            await asyncio.to_thread(self._write, copy.deepcopy(self._snapshot()))
+        except Exception as e:
+            logger.error(f"Token statistikasini saqlashda xato: {e}")
+
+    async def _save_later(self):
+        await asyncio.sleep(self.save_delay)
+        self._save_task = None
+        await self.flush()
+
+    # ============ HISOB ============
+
+    def record(self, operation: str, model: str, usage, latency: float, post_type: str | None = None,
+               finish_reason: str | None = None, max_tokens: int | None = None):
+        """Bitta OpenAI chaqiruvini hisobga olish"""
+        self._load()
+        prompt, completion, cached = usage_tokens(usage)
+        key = f"{current_command.get()}|{operation}|{post_type or '-'}|{model}"
+        day = self._days.setdefault(date.today().isoformat(), {})
+        row = day.get(key)
+        if row is None:
+            row = day[key] = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                              "cached_tokens": 0, "latency": 0.0, "cost": 0.0, "truncated": 0}
+
+        row["calls"] += 1
+        row["prompt_tokens"] += prompt
+        row["completion_tokens"] += completion
+        row["cached_tokens"] += cached
+        row["latency"] += latency
+        row["cost"] += cost_usd(model, prompt, completion, cached)
+
+        if post_type is not None and completion:
+            truncated = finish_reason == "length"
+            row["truncated"] += truncated
+            sample = math.ceil((max_tokens or completion) * 1.5) if truncated else completion
+            self._samples.setdefault(post_type, deque(maxlen=self.window)).append(sample)
+
+        if self.path and self._save_task is None:
+            try:
+                self._save_task = asyncio.get_running_loop().create_task(self._save_later())
+            except RuntimeError:
+                pass
+
+    def budget(self, post_type: str) -> int:
+        """Post turi uchun max_tokens"""
+        self._load()
+        default = self.default_budgets.get(post_type, self.max_budget)
+        samples = self._samples.get(post_type)
+        if not self.adaptive or not samples or len(samples) < self.min_samples:
+            return default
+
+        values = sorted(samples)
+        p99 = values[min(len(values) - 1, int(0.99 * len(values)))]
+        return max(self.min_budget, min(self.max_budget, math.ceil(p99 * self.headroom)))
+
+    def today(self) -> dict[str, dict]:
+        """Bugungi yig'indilar: "buyruq|amal|post_turi|model" -> hisob"""
+        self._load()
+        return self._days.get(date.today().isoformat(), {})
+
+    def budgets(self) -> dict[str, int]:
+        return {post_type: self.budget(post_type) for post_type in self.default_budgets}
+
+
+usage = UsageTracker(USAGE_FILE, adaptive=ADAPTIVE_MAX_TOKENS)
@@ -6,18 +6,18 @@ Ishlatish:
 1. .env faylni sozlang (BOT_TOKEN, OPENAI_API_KEY)
 2. pip install -r requirements.txt
 3. python main.py
+
+Webhook rejimi: .env da WEBHOOK_URL (va ixtiyoriy WEBHOOK_SECRET, WEBAPP_PORT) bering.
+Prometheus: webhook rejimida WEBAPP_PORT/metrics, polling rejimida METRICS_PORT/metrics.
+Bir nechta nusxa: REDIS_URL bering - FSM, qoralamalar va sozlamalar umumiy bo'ladi,
+avtomatik postlarni faqat lider nusxa chiqaradi.
 """
 
 import asyncio
 import logging
 import sys
 
-from aiogram import Bot, Dispatcher
-from aiogram.client.default import DefaultBotProperties
-from aiogram.enums import ParseMode
-
-from config import BOT_TOKEN
-from bot import router
+from config import BOT_TOKEN, WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_SECRET, WEBAPP_HOST, WEBAPP_PORT, METRICS_PORT
 
 # Logging sozlash
 logging.basicConfig(
@@ -28,46 +28,137 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+class AppContext:
+    """
+    Ilova konteksti: bot, dispatcher va ularning resurslari.
+    Og'ir modullar (aiogram, bot, OpenAI) shu yerda - BOT_TOKEN tekshirilgandan keyin yuklanadi;
+    SmartResearcher va AutoPoster shu yerda yaratiladi, handlerlarga dispatcher orqali beriladi.
+    OpenAI/HTTP klientlari on_startup da ochiladi, on_shutdown da yopiladi.
+    """
+
+    def __init__(self):
+        from aiogram import Bot, Dispatcher
+        from aiogram.client.default import DefaultBotProperties
+        from aiogram.enums import ParseMode
+
+        from bot import router
+        from bot.handlers import drafts
+        from bot.scheduler import AutoPoster
+        from bot.state import state_backend, create_fsm_storage
+        from core import SmartResearcher
+
+        self.researcher = SmartResearcher()
+        self.auto_poster = AutoPoster(self.researcher)
+        self.drafts = drafts
+        self.state_backend = state_backend
+
+        # Bot yaratish
+        self.bot = Bot(
+            token=BOT_TOKEN,
+            default=DefaultBotProperties(parse_mode=ParseMode.HTML)
+        )
+
+        # Dispatcher yaratish (REDIS_URL bo'lsa - FSM holatlari Redis'da);
+        # researcher handlerlarga argument sifatida uzatiladi
+        self.dp = Dispatcher(storage=create_fsm_storage(), researcher=self.researcher)
+
+        # Routerlarni ulash
+        self.dp.include_router(router)
+        self.dp.startup.register(self.on_startup)
+        self.dp.shutdown.register(self.on_shutdown)
+
+    async def on_startup(self, bot):
+        """Dispatcher ishga tushganda (polling va webhook uchun umumiy)"""
+        # OpenAI klienti va umumiy HTTP sessiya
+        await self.researcher.start()
+
+        # Avtomatik posting
+        self.auto_poster.start(bot)
+
+        if WEBHOOK_URL:
+            await bot.set_webhook(
+                f"{WEBHOOK_URL}{WEBHOOK_PATH}",
+                secret_token=WEBHOOK_SECRET or None,
+                drop_pending_updates=True
+            )
+        else:
+            # Oldingi xabarlarni o'tkazib yuborish
+            await bot.delete_webhook(drop_pending_updates=True)
+
+    async def on_shutdown(self, dispatcher):
+        """Dispatcher to'xtaganda"""
+        await self.auto_poster.stop()
+        await self.researcher.close()
+        await self.drafts.close()
+        await dispatcher.storage.close()
+        if self.state_backend is not None:
+            await self.state_backend.close()
+
+    async def run_webhook(self):
+        """Webhook rejimi: aiohttp server Telegram yuborgan update'larni qabul qiladi"""
+        from aiohttp import web
+        from bot.webhook import create_webhook_app
+
+        app = create_webhook_app(self.dp, self.bot, WEBHOOK_PATH, WEBHOOK_SECRET or None)
+        runner = web.AppRunner(app)
+        await runner.setup()
+
+        try:
+            await web.TCPSite(runner, WEBAPP_HOST, WEBAPP_PORT).start()
+            logger.info(f"✅ Webhook tayyor: {WEBHOOK_URL}{WEBHOOK_PATH} ({WEBAPP_HOST}:{WEBAPP_PORT})")
+            await asyncio.Event().wait()
+        finally:
+            await runner.cleanup()
+
+    async def run_polling(self):
+        """Polling rejimi (METRICS_PORT berilsa - /metrics va /health ham)"""
+        runner = None
+        if METRICS_PORT:
+            from aiohttp import web
+            from bot.webhook import create_metrics_app
+
+            runner = web.AppRunner(create_metrics_app())
+            await runner.setup()
+            await web.TCPSite(runner, WEBAPP_HOST, METRICS_PORT).start()
+            logger.info(f"📈 Metrics: {WEBAPP_HOST}:{METRICS_PORT}/metrics")
+
+        try:
+            logger.info("✅ Bot tayyor! Telegram'ga o'ting va /start bosing.")
+            await self.dp.start_polling(self.bot)
+        finally:
+            if runner is not None:
+                await runner.cleanup()
+
+    async def run(self):
+        try:
+            if WEBHOOK_URL:
+                await self.run_webhook()
+            else:
+                await self.run_polling()
+
+        except Exception as e:
+            logger.error(f"❌ Xatolik: {e}")
+
+        finally:
+            await self.bot.session.close()
+
+
 async def main():
     """Botni ishga tushirish"""
 
-    # Token tekshiruvi
+    # Token tekshiruvi (og'ir modullar yuklanishidan oldin)
     if not BOT_TOKEN:
         logger.error("❌ BOT_TOKEN topilmadi! .env faylni tekshiring.")
         return
 
-    # Bot yaratish
-    bot = Bot(
-        token=BOT_TOKEN,
-        default=DefaultBotProperties(parse_mode=ParseMode.HTML)
-    )
-
-    # Dispatcher yaratish
-    dp = Dispatcher()
-
-    # Routerlarni ulash
-    dp.include_router(router)
-
     # Startup xabar
     logger.info("🚀 Smart Research Bot ishga tushmoqda...")
 
-    try:
-        # Oldingi xabarlarni o'tkazib yuborish
-        await bot.delete_webhook(drop_pending_updates=True)
-
-        # Pollingni boshlash
-        logger.info("✅ Bot tayyor! Telegram'ga o'ting va /start bosing.")
-        await dp.start_polling(bot)
-
-    except Exception as e:
-        logger.error(f"❌ Xatolik: {e}")
-
-    finally:
-        await bot.session.close()
+    await AppContext().run()
 
 
 if __name__ == "__main__":
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
-        logger.info("Bot to'xtatildi.")
\ No newline at end of file
+        logger.info("Bot to'xtatildi.")